@@ -11,6 +11,36 @@ class Settings:
     zones_table: str = "zones"
     gcp_credentials_path: str = ""
     maps_api_key: str = ""
+    forecast_cache_ttl_seconds: float = 900.0
+    zones_cache_ttl_seconds: float = 3600.0
+    cache_stale_seconds: float = 300.0
+    road_network_path: str = ""
+    road_nodes_path: str = ""
+    landmarks_path: str = ""
+    alt_landmarks: int = 8
+    gauge_bucket_seconds: int = 300
+    gauge_horizon_hours: int = 24
+    query_timeout_seconds: float = 120.0
+    bigquery_max_concurrency: int = 4
+    snapshot_path: str = ""
+    snapshot_interval_seconds: float = 30.0
+    road_assets_path: str = ""
+    clearance_top_k: int = 5
+    events_poll_seconds: float = 5.0
+    events_queue_size: int = 64
+    profiling_enabled: bool = False
+    profile_interval_ms: float = 5.0
+    risk_scorer: str = "heuristic"
+    flood_model_path: str = ""
+    rainfall_history_path: str = ""
+    forecast_horizon_days: int = 7
+    forecast_confidence: float = 0.8
+    forecast_lookback_days: int = 90
+    forecast_id_column: str = "zone_id"
+    ensemble_workers: int = 0
+    zone_polygons_path: str = ""
+    warm_start_path: str = ""
+    warm_start_interval_seconds: float = 300.0
 
 
 @lru_cache
@@ -22,4 +52,34 @@ def get_settings() -> Settings:
         zones_table=os.getenv("ZONES_TABLE", "zones"),
         gcp_credentials_path=os.getenv("GCP_CREDENTIALS_PATH", ""),
         maps_api_key=os.getenv("MAPS_API_KEY", ""),
+        forecast_cache_ttl_seconds=float(os.getenv("FORECAST_CACHE_TTL_SECONDS", "900")),
+        zones_cache_ttl_seconds=float(os.getenv("ZONES_CACHE_TTL_SECONDS", "3600")),
+        cache_stale_seconds=float(os.getenv("CACHE_STALE_SECONDS", "300")),
+        road_network_path=os.getenv("ROAD_NETWORK_PATH", ""),
+        road_nodes_path=os.getenv("ROAD_NODES_PATH", ""),
+        landmarks_path=os.getenv("LANDMARKS_PATH", ""),
+        alt_landmarks=int(os.getenv("ALT_LANDMARKS", "8")),
+        gauge_bucket_seconds=int(os.getenv("GAUGE_BUCKET_SECONDS", "300")),
+        gauge_horizon_hours=int(os.getenv("GAUGE_HORIZON_HOURS", "24")),
+        query_timeout_seconds=float(os.getenv("QUERY_TIMEOUT_SECONDS", "120")),
+        bigquery_max_concurrency=int(os.getenv("BIGQUERY_MAX_CONCURRENCY", "4")),
+        snapshot_path=os.getenv("SNAPSHOT_PATH", ""),
+        snapshot_interval_seconds=float(os.getenv("SNAPSHOT_INTERVAL_SECONDS", "30")),
+        road_assets_path=os.getenv("ROAD_ASSETS_PATH", ""),
+        clearance_top_k=int(os.getenv("CLEARANCE_TOP_K", "5")),
+        events_poll_seconds=float(os.getenv("EVENTS_POLL_SECONDS", "5")),
+        events_queue_size=int(os.getenv("EVENTS_QUEUE_SIZE", "64")),
+        profiling_enabled=os.getenv("PROFILING_ENABLED", "").lower() in ("1", "true", "yes"),
+        profile_interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+        risk_scorer=os.getenv("RISK_SCORER", "heuristic"),
+        flood_model_path=os.getenv("FLOOD_MODEL_PATH", ""),
+        rainfall_history_path=os.getenv("RAINFALL_HISTORY_PATH", ""),
+        forecast_horizon_days=int(os.getenv("FORECAST_HORIZON_DAYS", "7")),
+        forecast_confidence=float(os.getenv("FORECAST_CONFIDENCE", "0.8")),
+        forecast_lookback_days=int(os.getenv("FORECAST_LOOKBACK_DAYS", "90")),
+        forecast_id_column=os.getenv("FORECAST_ID_COLUMN", "zone_id"),
+        ensemble_workers=int(os.getenv("ENSEMBLE_WORKERS", "0")),
+        zone_polygons_path=os.getenv("ZONE_POLYGONS_PATH", ""),
+        warm_start_path=os.getenv("WARM_START_PATH", ""),
+        warm_start_interval_seconds=float(os.getenv("WARM_START_INTERVAL_SECONDS", "300")),
     )
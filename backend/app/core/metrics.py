@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import sys
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import Counter as FrequencyCounter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+QUANTILES = (0.5, 0.95, 0.99)
+# Log-spaced latency buckets (~10% wide) from 10us to ~3 minutes; the last bucket is open.
+LATENCY_BOUNDS: Tuple[float, ...] = tuple(1e-5 * 1.1**i for i in range(176))
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Profiler of the request whose context the current code runs in, when that request is profiled.
+_request_profiler: ContextVar[Optional["SamplingProfiler"]] = ContextVar("request_profiler", default=None)
+
+
+class _Shard:
+    __slots__ = ("counts", "total")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.total = 0.0
+
+
+class Histogram:
+    """Latency histogram whose hot path takes no lock.
+
+    Each thread writes to its own shard of bucket counts; readers merge the shards.
+    A scrape racing a write may miss that one observation, which is fine for
+    percentiles and keeps ``observe`` to a bisect and two additions.
+    """
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BOUNDS) -> None:
+        self.bounds = bounds
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._new_shard()
+        shard.counts[bisect_left(self.bounds, value)] += 1
+        shard.total += value
+
+    def _new_shard(self) -> _Shard:
+        shard = self._local.shard = _Shard(len(self.bounds) + 1)
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            shards = list(self._shards)
+        counts = [0] * (len(self.bounds) + 1)
+        total = 0.0
+        for shard in shards:
+            for i, count in enumerate(shard.counts):
+                counts[i] += count
+            total += shard.total
+        return counts, total
+
+    def quantiles(self, quantiles: Iterable[float] = QUANTILES) -> Dict[float, float]:
+        counts, _ = self.snapshot()
+        return _quantiles(self.bounds, counts, quantiles)
+
+
+def _quantiles(bounds: Tuple[float, ...], counts: List[int], quantiles: Iterable[float]) -> Dict[float, float]:
+    """Quantiles interpolated linearly inside the bucket that holds them."""
+    total = sum(counts)
+    result = {}
+    for q in quantiles:
+        if total == 0:
+            result[q] = 0.0
+            continue
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = bounds[i - 1] if i > 0 else 0.0
+                upper = bounds[i] if i < len(bounds) else bounds[-1]
+                result[q] = lower + (upper - lower) * (rank - seen) / count
+                break
+            seen += count
+    return result
+
+
+class CounterMetric:
+    """Monotonic counter with the same per-thread sharding as Histogram."""
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = [0.0]
+            with self._lock:
+                self._shards.append(shard)
+        shard[0] += amount
+
+    def value(self) -> float:
+        with self._lock:
+            return sum(shard[0] for shard in self._shards)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, CounterMetric]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def histogram(self, name: str, help_text: str = "", **labels: str) -> Histogram:
+        return self._get(self._histograms, Histogram, name, help_text, labels)
+
+    def counter(self, name: str, help_text: str = "", **labels: str) -> CounterMetric:
+        return self._get(self._counters, CounterMetric, name, help_text, labels)
+
+    def _get(self, family: dict, factory, name: str, help_text: str, labels: Dict[str, str]):
+        key = tuple(sorted(labels.items()))
+        metric = family.get(name, {}).get(key)
+        if metric is None:
+            with self._lock:
+                series = family.setdefault(name, {})
+                metric = series.get(key)
+                if metric is None:
+                    metric = series[key] = factory()
+                    if help_text:
+                        self._help.setdefault(name, help_text)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """Register a callable yielding extra exposition lines at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus text exposition: histograms as summaries (p50/p95/p99), then counters."""
+        with self._lock:
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            collectors = list(self._collectors)
+
+        lines: List[str] = []
+        for name, series in sorted(histograms.items()):
+            lines += self._header(name, "summary")
+            for labels, histogram in sorted(series.items()):
+                counts, total = histogram.snapshot()
+                for q, value in _quantiles(histogram.bounds, counts, QUANTILES).items():
+                    lines.append(f"{name}{format_labels(labels + (('quantile', str(q)),))} {value:.6g}")
+                lines.append(f"{name}_sum{format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{name}_count{format_labels(labels)} {sum(counts)}")
+        for name, series in sorted(counters.items()):
+            lines += self._header(name, "counter")
+            for labels, counter in sorted(series.items()):
+                lines.append(f"{name}{format_labels(labels)} {_format_value(counter.value())}")
+        for collector in collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+    def _header(self, name: str, kind: str) -> List[str]:
+        header = [f"# TYPE {name} {kind}"]
+        if name in self._help:
+            header.insert(0, f"# HELP {name} {self._help[name]}")
+        return header
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Exact sample value: an integer when whole, else the shortest float that round-trips."""
+    value = float(value)
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = MetricsRegistry()
+
+STAGE_METRIC = "flood_stage_seconds"
+STAGE_HELP = "Wall time per pipeline stage"
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block into the ``flood_stage_seconds{stage=name}`` histogram."""
+    histogram = metrics.histogram(STAGE_METRIC, STAGE_HELP, stage=name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started)
+
+
+def timed(name: str):
+    """Decorator form of ``stage`` for service methods."""
+
+    def decorate(func):
+        histogram = metrics.histogram(STAGE_METRIC, STAGE_HELP, stage=name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorate
+
+
+class SamplingProfiler:
+    """Stack sampler reading ``sys._current_frames`` from a helper thread.
+
+    Samples ``thread_id``, or with ``thread_id`` None only the request entering it:
+    the event loop while one of the request's tasks runs, and pool threads while
+    they run a call the request offloaded (see ``install_request_profiling``), so
+    concurrent requests and background threads stay out of the profile. Stacks are
+    folded into ``frame;frame;frame count`` lines that flamegraph tools read
+    directly. Nothing runs unless a profile is explicitly requested.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval_seconds: float = 0.005, max_depth: int = 64) -> None:
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.max_depth = max_depth
+        self.samples: FrequencyCounter = FrequencyCounter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._threads: FrequencyCounter = FrequencyCounter()
+        self._tasks: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._token = None
+
+    def __enter__(self) -> "SamplingProfiler":
+        if self.thread_id is None:
+            try:
+                self._loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._loop = None
+            else:
+                self._loop_thread = threading.get_ident()
+                self._tasks.add(asyncio.current_task())
+            self._token = _request_profiler.set(self)
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        if self._token is not None:
+            _request_profiler.reset(self._token)
+
+    def run(self, func: Callable, *args, **kwargs):
+        """Call ``func`` with the calling thread included in the samples."""
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._threads[ident] -= 1
+                if not self._threads[ident]:
+                    del self._threads[ident]
+
+    def add_task(self, task: "asyncio.Task") -> None:
+        self._tasks.add(task)
+
+    def _targets(self, frames: dict) -> dict:
+        if self.thread_id is not None:
+            return {self.thread_id: frames.get(self.thread_id)}
+        with self._lock:
+            targets = {ident: frames.get(ident) for ident in self._threads}
+        if self._loop is not None and asyncio.current_task(self._loop) in self._tasks:
+            targets[self._loop_thread] = frames.get(self._loop_thread)
+        return targets
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            for thread_id, frame in self._targets(sys._current_frames()).items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if stack:
+                    self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+class ProfiledThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool whose calls count toward the profile of the request that submitted them."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        profiler = _request_profiler.get()
+        if profiler is None:
+            return super().submit(fn, *args, **kwargs)
+        return super().submit(profiler.run, fn, *args, **kwargs)
+
+
+def profiled_task_factory(loop: asyncio.AbstractEventLoop, coro, **kwargs) -> asyncio.Task:
+    """Task factory that adds tasks created inside a profiled request to its profile."""
+    task = asyncio.Task(coro, loop=loop, **kwargs)
+    context = kwargs.get("context")
+    profiler = context.get(_request_profiler) if context is not None else _request_profiler.get()
+    if profiler is not None:
+        profiler.add_task(task)
+    return task
+
+
+def install_request_profiling(loop: asyncio.AbstractEventLoop) -> None:
+    """Let request profiles follow work onto the loop's default executor and into new tasks."""
+    loop.set_default_executor(ProfiledThreadPoolExecutor())
+    loop.set_task_factory(profiled_task_factory)
+
+
+class ProfileLog:
+    """Most recent request profiles, newest last."""
+
+    def __init__(self, size: int = 20) -> None:
+        self._profiles: Deque[dict] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, profile: dict) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def entries(self) -> List[dict]:
+        with self._lock:
+            return list(self._profiles)
+
+
+profiles = ProfileLog()
@@ -1,11 +1,15 @@
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, confloat
 
 
 class ForecastPoint(BaseModel):
+    zone_id: Optional[str] = None
     forecast_timestamp: str
     predicted_rainfall: float
+    lower_bound: Optional[float] = None
+    upper_bound: Optional[float] = None
 
 
 class ZoneRisk(BaseModel):
@@ -16,9 +20,17 @@ class ZoneRisk(BaseModel):
     estimated_water_depth: float
 
 
+class Coordinates(BaseModel):
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+
+
 class RouteRequest(BaseModel):
-    source: str
-    destination: str
+    # A place is a road node name or a GPS position snapped to the nearest road node.
+    source: Optional[str] = None
+    destination: Optional[str] = None
+    source_location: Optional[Coordinates] = None
+    destination_location: Optional[Coordinates] = None
 
 
 class RouteResponse(BaseModel):
@@ -28,9 +40,77 @@ class RouteResponse(BaseModel):
     blocked_edges: List[List[str]]
 
 
+class RouteBatchRequest(BaseModel):
+    pairs: List[RouteRequest] = Field(min_length=1, max_length=1000)
+    alternatives: int = Field(default=0, ge=0, le=5)
+
+
+class AlternativeRoute(BaseModel):
+    route: List[str]
+    total_cost: float
+
+
+class BatchRoute(BaseModel):
+    source: str
+    destination: str
+    algorithm: str
+    route: List[str]
+    total_cost: float
+    alternatives: List[AlternativeRoute] = []
+
+
+class RouteBatchResponse(BaseModel):
+    routes: List[BatchRoute]
+    blocked_edges: List[List[str]]
+
+
+class TimedRouteRequest(BaseModel):
+    source: Optional[str] = None
+    destination: Optional[str] = None
+    source_location: Optional[Coordinates] = None
+    destination_location: Optional[Coordinates] = None
+    depart_at: Optional[datetime] = None
+    rainfall_increase_pct: float = Field(default=0, ge=0, le=500)
+    time_steps: Literal["hourly", "daily"] = "hourly"
+    speed_kmph: float = Field(default=35, gt=0)
+
+
+class TimedLeg(BaseModel):
+    source: str
+    target: str
+    enter_at: str
+    exit_at: str
+    wait_minutes: float
+
+
+class TimedRouteResponse(BaseModel):
+    algorithm: str
+    route: List[str]
+    depart_at: str
+    arrive_at: Optional[str] = None
+    travel_minutes: Optional[float] = None
+    wait_minutes: float
+    legs: List[TimedLeg]
+
+
+class SnapRequest(BaseModel):
+    points: List[Coordinates] = Field(min_length=1, max_length=100000)
+
+
+class SnappedPoint(BaseModel):
+    zone_id: str
+    node: str
+    distance_km: float
+
+
+class SnapResponse(BaseModel):
+    points: List[SnappedPoint]
+
+
 class EmergencyUnit(BaseModel):
     unit_id: str
-    current_zone: str
+    current_zone: Optional[str] = None
+    location: Optional[Coordinates] = None
     speed_kmph: float = 35
 
 
@@ -68,7 +148,19 @@ class SimulationRequest(BaseModel):
     rainfall_increase_pct: float = Field(ge=0, le=500)
     source: Optional[str] = None
     destination: Optional[str] = None
+    source_location: Optional[Coordinates] = None
+    destination_location: Optional[Coordinates] = None
     units: Optional[List[EmergencyUnit]] = None
+    time_steps: Optional[Literal["hourly", "daily"]] = None
+
+
+class InundationResponse(BaseModel):
+    step_hours: float
+    timestamps: List[str]
+    zone_ids: List[str]
+    depth_cm: List[List[float]]
+    peak_depth_cm: List[float]
+    peak_at: List[str]
 
 
 class SimulationResponse(BaseModel):
@@ -78,6 +170,98 @@ class SimulationResponse(BaseModel):
     dispatch: List[DeploymentAssignment]
     route: Optional[RouteResponse] = None
     clearance_top5: List[ClearanceResult]
+    inundation: Optional[InundationResponse] = None
+
+
+class BatchSimulationRequest(BaseModel):
+    rainfall_increase_pcts: Optional[List[confloat(ge=0, le=500)]] = None
+    start_pct: float = Field(default=0, ge=0, le=500)
+    stop_pct: float = Field(default=500, ge=0, le=500)
+    step_pct: float = Field(default=10, gt=0)
+
+
+class ScenarioResult(BaseModel):
+    rainfall_increase_pct: float
+    rainfall_multiplier: float
+    flood_probability: List[float]
+    risk_levels: List[str]
+    estimated_water_depth: List[float]
+    blocked_roads: List[List[str]]
+
+
+class RoadBlockThreshold(BaseModel):
+    source: str
+    target: str
+    blocked_above_pct: Optional[float] = None
+
+
+class BatchSimulationResponse(BaseModel):
+    zone_ids: List[str]
+    scenarios: List[ScenarioResult]
+    road_thresholds: List[RoadBlockThreshold]
+
+
+class EnsembleRequest(BaseModel):
+    members: int = Field(default=1000, ge=1, le=20000)
+    seed: int = Field(default=0, ge=0)
+    rainfall_increase_pct: float = Field(default=0, ge=0, le=500)
+    risk_level: Literal["MEDIUM", "HIGH", "CRITICAL"] = "HIGH"
+    depth_threshold_cm: float = Field(default=20, gt=0)
+    source: Optional[str] = None
+    destination: Optional[str] = None
+    source_location: Optional[Coordinates] = None
+    destination_location: Optional[Coordinates] = None
+
+
+class ZoneExceedance(BaseModel):
+    zone_id: str
+    risk_exceedance_probability: float
+    depth_exceedance_probability: float
+    mean_flood_probability: float
+    mean_water_depth: float
+
+
+class RoadBlockage(BaseModel):
+    source: str
+    target: str
+    probability: float
+
+
+class EnsembleRoute(BaseModel):
+    route: List[str]
+    total_cost: float
+    probability: float
+
+
+class EnsembleResponse(BaseModel):
+    members: int
+    seed: int
+    rainfall_multiplier: float
+    zones: List[ZoneExceedance]
+    blocked_roads: List[RoadBlockage]
+    routes: Optional[List[EnsembleRoute]] = None
+    unreachable_probability: Optional[float] = None
+    routed_probability: Optional[float] = None
+
+
+class GaugeReading(BaseModel):
+    zone_id: str
+    timestamp: datetime
+    rainfall_mm: float = Field(ge=0)
+
+
+class GaugeBatch(BaseModel):
+    readings: List[GaugeReading]
+
+
+class GaugeIngestResponse(BaseModel):
+    accepted: int
+    dropped: int
+
+
+class RainfallAggregatesResponse(BaseModel):
+    windows_hours: List[int]
+    zones: Dict[str, List[float]]
 
 
 class HealthResponse(BaseModel):
@@ -85,6 +269,12 @@ class HealthResponse(BaseModel):
     service: str
 
 
+class ReadinessResponse(BaseModel):
+    status: str
+    # "snapshot", "warm_start" or "live" once ready; "starting" before any risk state can be served.
+    state: str
+
+
 class ZonesResponse(BaseModel):
     zones: List[ZoneRisk]
 
@@ -100,3 +290,7 @@ class ErrorResponse(BaseModel):
 
 class HeatmapResponse(BaseModel):
     heatmap: Dict[str, float]
+
+
+class CacheStatsResponse(BaseModel):
+    caches: Dict[str, Dict[str, float]]
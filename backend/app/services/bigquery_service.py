@@ -1,45 +1,263 @@
 from __future__ import annotations
 
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Dict, List, Optional
 
 import pandas as pd
-try:
-    from google.cloud import bigquery
-    from google.oauth2 import service_account
-except ImportError:  # pragma: no cover - optional dependency fallback for offline environments
-    bigquery = None
-    service_account = None
 
 from backend.app.core.config import get_settings
+from backend.app.core.metrics import metrics, timed
+from backend.app.services.forecast_service import LocalForecaster
 
+logger = logging.getLogger(__name__)
 
+
+@lru_cache
+def _bigquery_modules():
+    """``(bigquery, service_account)``, imported on first use so loading this module stays cheap."""
+    try:
+        from google.cloud import bigquery
+        from google.oauth2 import service_account
+    except ImportError:  # pragma: no cover - optional dependency fallback for offline environments
+        return None, None
+    return bigquery, service_account
+
+
+# Only the last {lookback_days} days are sent as context. The constant window bound lets
+# BigQuery prune partitions of a table partitioned on DATE(timestamp), so bytes scanned stay
+# flat as history grows. history_watermark is the newest reading the forecast has seen.
 FORECAST_SQL = """
+WITH context AS (
+  SELECT
+    {id_context}timestamp,
+    rainfall_mm
+  FROM `{project_id}.{dataset_id}.{rainfall_table}`
+  WHERE timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {lookback_days} DAY)
+)
 SELECT
-  forecast_timestamp,
-  forecast_value AS predicted_rainfall
+  {id_output}forecast_timestamp,
+  forecast_value AS predicted_rainfall,
+  prediction_interval_lower_bound AS lower_bound,
+  prediction_interval_upper_bound AS upper_bound,
+  (SELECT MAX(timestamp) FROM context) AS history_watermark
 FROM AI.FORECAST(
-  MODEL `bigquery-public-data.ml_datasets.timesfm_model`,
-  (
-    SELECT
-      timestamp,
-      rainfall_mm
-    FROM `{project_id}.{dataset_id}.{rainfall_table}`
-    ORDER BY timestamp
-  ),
-  STRUCT(7 AS horizon, 0.8 AS confidence_level)
+  (SELECT * FROM context),
+  data_col => 'rainfall_mm',
+  timestamp_col => 'timestamp',
+  model => 'TimesFM 2.0',
+  {id_arg}horizon => {horizon},
+  confidence_level => {confidence_level}
 )
-ORDER BY forecast_timestamp;
+ORDER BY {id_order}forecast_timestamp;
+""".strip()
+
+FRESHNESS_SQL = """
+SELECT MAX(timestamp) AS history_watermark
+FROM `{project_id}.{dataset_id}.{rainfall_table}`
+WHERE timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {lookback_days} DAY)
 """.strip()
 
 
+FORECAST_CACHE_KEY = "forecast"
+ZONES_CACHE_KEY = "zones"
+FRESHNESS_QUERY = "forecast_freshness"
+FORECAST_COLUMNS = ["zone_id", "forecast_timestamp", "predicted_rainfall", "lower_bound", "upper_bound"]
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    version: int
+    loaded_at: float
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    refreshes: int = 0
+    errors: int = 0
+    loads: int = 0
+    load_seconds_total: float = 0.0
+    last_load_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        avg = self.load_seconds_total / self.loads if self.loads else 0.0
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "loads": self.loads,
+            "avg_load_seconds": round(avg, 6),
+            "last_load_seconds": round(self.last_load_seconds, 6),
+        }
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+class QueryCache:
+    """Versioned TTL cache with single-flight loads and stale-while-revalidate.
+
+    A fresh entry is returned directly. Once its TTL has passed it is still served
+    for ``stale_seconds`` while one background thread reloads it; after that the
+    next caller loads it synchronously. Concurrent callers of a missing key wait on
+    the same in-flight load instead of issuing their own query.
+    """
+
+    def __init__(self, ttls: Dict[str, float], stale_seconds: float = 0.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttls = dict(ttls)
+        self.stale_seconds = stale_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, CacheEntry] = {}
+        self._flights: Dict[str, _Flight] = {}
+        self._stats: Dict[str, CacheStats] = {}
+        self._versions: Dict[str, int] = {}
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            found, value = self._lookup_locked(key, loader)
+            if found:
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats[key].misses += 1
+            else:
+                self._stats[key].coalesced += 1
+
+        if leader:
+            self._load(key, loader, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def peek(self, key: str, loader: Callable[[], Any]) -> tuple[bool, Any]:
+        """Non-blocking lookup: ``(True, value)`` for fresh or stale entries, else ``(False, None)``.
+
+        A stale entry still schedules its background refresh through ``loader``.
+        """
+        with self._lock:
+            return self._lookup_locked(key, loader)
+
+    def put(self, key: str, value: Any, load_seconds: float = 0.0) -> None:
+        """Store a value loaded outside the cache, e.g. by an async query path."""
+        with self._lock:
+            stats = self._stats.setdefault(key, CacheStats())
+            stats.misses += 1
+            self._record_load_locked(key, stats, value, None, load_seconds)
+
+    def _lookup_locked(self, key: str, loader: Callable[[], Any]) -> tuple[bool, Any]:
+        ttl = self.ttls.get(key, 0.0)
+        stats = self._stats.setdefault(key, CacheStats())
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        age = self._clock() - entry.loaded_at
+        if age < ttl:
+            stats.hits += 1
+            return True, entry.value
+        if age < ttl + self.stale_seconds:
+            stats.stale_hits += 1
+            if key not in self._flights:
+                flight = self._flights[key] = _Flight()
+                stats.refreshes += 1
+                threading.Thread(target=self._load, args=(key, loader, flight), daemon=True).start()
+            return True, entry.value
+        return False, None
+
+    def _load(self, key: str, loader: Callable[[], Any], flight: _Flight) -> None:
+        started = time.perf_counter()
+        try:
+            flight.value = loader()
+        except Exception as exc:  # noqa: BLE001 - surfaced to every waiter of this flight
+            flight.error = exc
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            stats = self._stats.setdefault(key, CacheStats())
+            self._record_load_locked(key, stats, flight.value, flight.error, elapsed)
+            self._flights.pop(key, None)
+        flight.done.set()
+
+    def _record_load_locked(self, key: str, stats: CacheStats, value: Any, error: Optional[BaseException], elapsed: float) -> None:
+        stats.loads += 1
+        stats.load_seconds_total += elapsed
+        stats.last_load_seconds = elapsed
+        if error is not None:
+            stats.errors += 1
+            return
+        version = self._versions.get(key, 0) + 1
+        self._versions[key] = version
+        self._entries[key] = CacheEntry(value=value, version=version, loaded_at=self._clock())
+
+    def version(self, key: str) -> int:
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                key: {**stats.as_dict(), "version": self._versions.get(key, 0)}
+                for key, stats in self._stats.items()
+            }
+
+
 class BigQueryRepository:
-    def __init__(self) -> None:
+    def __init__(self, client=None) -> None:
         self.settings = get_settings()
-        self.client = self._create_client()
+        self.client = client if client is not None else self._create_client()
+        self.cache = QueryCache(
+            ttls={
+                FORECAST_CACHE_KEY: self.settings.forecast_cache_ttl_seconds,
+                ZONES_CACHE_KEY: self.settings.zones_cache_ttl_seconds,
+            },
+            stale_seconds=self.settings.cache_stale_seconds,
+        )
+        history = self.settings.rainfall_history_path
+        self.local_forecast = (
+            LocalForecaster(history, self.settings.forecast_horizon_days, self.settings.forecast_confidence) if history else None
+        )
+        # Newest rainfall_history timestamp behind the last remote forecast; an unchanged
+        # watermark means the forecast would come out the same, so it is reused.
+        self.forecast_watermark: Optional[pd.Timestamp] = None
+        self.last_forecast: Optional[pd.DataFrame] = None
+        self._watermark_lock = threading.Lock()
+        # Dry-run byte estimates by SQL text; the query texts are fixed by settings.
+        self.estimates: Dict[str, int] = {}
 
     def _create_client(self):
-        if not self.settings.project_id or bigquery is None:
+        if not self.settings.project_id:
+            return None
+        bigquery, service_account = _bigquery_modules()
+        if bigquery is None:
             return None
 
         credentials_path = self.settings.gcp_credentials_path
@@ -49,34 +267,131 @@ class BigQueryRepository:
 
         return bigquery.Client(project=self.settings.project_id)
 
+    @timed("forecast_rainfall")
     def forecast_rainfall(self) -> pd.DataFrame:
-        if self.client is None:
-            return self._mock_forecast()
+        return self.cache.get(FORECAST_CACHE_KEY, self._query_forecast)
+
+    @timed("fetch_zones")
+    def fetch_zones(self) -> pd.DataFrame:
+        return self.cache.get(ZONES_CACHE_KEY, self._query_zones)
 
-        query = FORECAST_SQL.format(
+    def cache_stats(self) -> Dict[str, dict]:
+        return self.cache.stats()
+
+    def forecast_sql(self) -> str:
+        id_column = self.settings.forecast_id_column
+        return FORECAST_SQL.format(
             project_id=self.settings.project_id,
             dataset_id=self.settings.dataset_id,
             rainfall_table=self.settings.rainfall_table,
+            lookback_days=int(self.settings.forecast_lookback_days),
+            horizon=int(self.settings.forecast_horizon_days),
+            confidence_level=float(self.settings.forecast_confidence),
+            id_context=f"CAST({id_column} AS STRING) AS zone_id,\n    " if id_column else "",
+            id_output="zone_id,\n  " if id_column else "",
+            id_arg="id_cols => ['zone_id'],\n  " if id_column else "",
+            id_order="zone_id, " if id_column else "",
         )
-        job = self.client.query(query)
-        df = job.result().to_dataframe()
-        return df[["forecast_timestamp", "predicted_rainfall"]]
 
-    def fetch_zones(self) -> pd.DataFrame:
-        if self.client is None:
-            return self._mock_zones()
+    def freshness_sql(self) -> str:
+        return FRESHNESS_SQL.format(
+            project_id=self.settings.project_id,
+            dataset_id=self.settings.dataset_id,
+            rainfall_table=self.settings.rainfall_table,
+            lookback_days=int(self.settings.forecast_lookback_days),
+        )
+
+    def reusable_forecast(self, freshness_df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """The last forecast when rainfall_history has no readings newer than its watermark."""
+        with self._watermark_lock:
+            if self.last_forecast is None or self.forecast_watermark is None:
+                return None
+            if _watermark(freshness_df) != self.forecast_watermark:
+                return None
+            metrics.counter("flood_forecast_reused_total", "Forecast refreshes skipped because no new rainfall arrived").inc()
+            return self.last_forecast
+
+    def accept_forecast(self, df: pd.DataFrame) -> pd.DataFrame:
+        forecast = self._forecast_columns(df)
+        with self._watermark_lock:
+            self.forecast_watermark = _watermark(df)
+            self.last_forecast = forecast
+        return forecast
 
+    def zones_sql(self) -> str:
         table = f"`{self.settings.project_id}.{self.settings.dataset_id}.{self.settings.zones_table}`"
-        query = f"""
+        return f"""
         SELECT
           CAST(zone_id AS STRING) AS zone_id,
           CAST(elevation AS FLOAT64) AS elevation,
           CAST(drainage_capacity AS FLOAT64) AS drainage_capacity,
           CAST(population_density AS FLOAT64) AS population_density,
-          CAST(road_importance_score AS FLOAT64) AS road_importance_score
+          CAST(road_importance_score AS FLOAT64) AS road_importance_score,
+          CAST(latitude AS FLOAT64) AS latitude,
+          CAST(longitude AS FLOAT64) AS longitude
         FROM {table}
         """
-        return self.client.query(query).result().to_dataframe()
+
+    def _query_forecast(self) -> pd.DataFrame:
+        if self.client is None:
+            local = self.local_forecast_frame()
+            return local if local is not None else self._mock_forecast()
+        if self.last_forecast is not None:
+            reused = self.reusable_forecast(self._run_query(self.freshness_sql(), FRESHNESS_QUERY))
+            if reused is not None:
+                return reused
+        return self.accept_forecast(self._run_query(self.forecast_sql(), FORECAST_CACHE_KEY))
+
+    def _query_zones(self) -> pd.DataFrame:
+        if self.client is None:
+            return self._mock_zones()
+        return self._run_query(self.zones_sql(), ZONES_CACHE_KEY)
+
+    def local_forecast_frame(self) -> Optional[pd.DataFrame]:
+        """Forecast from the local rainfall history (per zone when it has zone_id), or None when there is none."""
+        if self.local_forecast is None or not self.local_forecast.available():
+            return None
+        try:
+            return self.local_forecast.zone_forecast()
+        except (OSError, ValueError, KeyError):
+            logger.exception("Local forecast from %s failed", self.local_forecast.path)
+            return None
+
+    @staticmethod
+    def _forecast_columns(df: pd.DataFrame) -> pd.DataFrame:
+        return df[[name for name in FORECAST_COLUMNS if name in df.columns]]
+
+    def dry_run(self, query: str, name: str = "query") -> Optional[int]:
+        """Log and record BigQuery's estimate of the bytes ``query`` would scan.
+
+        Each distinct SQL text is dry-run once; later submissions reuse its estimate.
+        """
+        estimate = self.estimates.get(query)
+        if estimate is None:
+            bigquery, _ = _bigquery_modules()
+            if bigquery is None:
+                return None
+            try:
+                job = self.client.query(query, job_config=bigquery.QueryJobConfig(dry_run=True, use_query_cache=False))
+            except Exception as exc:  # noqa: BLE001 - the estimate is advisory; the real query reports its own errors
+                logger.warning("Dry run of %s query failed: %s", name, exc)
+                return None
+            estimate = self.estimates[query] = int(job.total_bytes_processed or 0)
+            logger.info("Query %s will process an estimated %d bytes", name, estimate)
+        metrics.counter("flood_bigquery_estimated_bytes_total", "Dry-run byte estimates for submitted queries", query=name).inc(estimate)
+        return estimate
+
+    def _run_query(self, query: str, name: str = "query") -> pd.DataFrame:
+        self.dry_run(query, name)
+        started = time.perf_counter()
+        job = self.client.query(query)
+        try:
+            df = job.result(timeout=self.settings.query_timeout_seconds).to_dataframe()
+        except (TimeoutError, concurrent.futures.TimeoutError):
+            _cancel_job(job)
+            raise
+        _record_job(job, name, time.perf_counter() - started)
+        return df
 
     @staticmethod
     def _mock_forecast() -> pd.DataFrame:
@@ -88,11 +403,11 @@ class BigQueryRepository:
     def _mock_zones() -> pd.DataFrame:
         return pd.DataFrame(
             [
-                ["T_Nagar", 6.0, 35.0, 28000.0, 0.95],
-                ["Guindy", 8.0, 45.0, 21000.0, 0.8],
-                ["Velachery", 4.0, 25.0, 25000.0, 0.9],
-                ["Saidapet", 5.0, 30.0, 23000.0, 0.85],
-                ["Adyar", 3.0, 20.0, 19000.0, 0.75],
+                ["T_Nagar", 6.0, 35.0, 28000.0, 0.95, 13.0418, 80.2341],
+                ["Guindy", 8.0, 45.0, 21000.0, 0.8, 13.0067, 80.2206],
+                ["Velachery", 4.0, 25.0, 25000.0, 0.9, 12.9815, 80.2180],
+                ["Saidapet", 5.0, 30.0, 23000.0, 0.85, 13.0213, 80.2231],
+                ["Adyar", 3.0, 20.0, 19000.0, 0.75, 13.0012, 80.2565],
             ],
             columns=[
                 "zone_id",
@@ -100,10 +415,140 @@ class BigQueryRepository:
                 "drainage_capacity",
                 "population_density",
                 "road_importance_score",
+                "latitude",
+                "longitude",
             ],
         )
 
 
+class AsyncBigQueryRepository:
+    """Non-blocking front end to a BigQueryRepository for async request handlers.
+
+    Cached values are returned without leaving the event loop. Misses submit the
+    job and poll it with ``asyncio.sleep`` between status checks, so a slow
+    TimesFM job holds no worker thread while it runs. Concurrent callers of one
+    key share the same query and at most ``max_concurrency`` jobs run at once.
+    Jobs that exceed ``timeout_seconds`` are cancelled in BigQuery; a shared load
+    keeps running when one of its callers goes away so the result still lands in
+    the cache for the others.
+    """
+
+    POLL_INITIAL_SECONDS = 0.05
+    POLL_MAX_SECONDS = 1.0
+
+    def __init__(self, repo: Optional[BigQueryRepository] = None, max_concurrency: Optional[int] = None, timeout_seconds: Optional[float] = None) -> None:
+        self.repo = repo or BigQueryRepository()
+        settings = self.repo.settings
+        self.timeout_seconds = timeout_seconds if timeout_seconds is not None else settings.query_timeout_seconds
+        self.max_concurrency = max_concurrency or settings.bigquery_max_concurrency
+        self._limiter: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def forecast_rainfall(self) -> pd.DataFrame:
+        return await self._fetch(FORECAST_CACHE_KEY, self.repo._query_forecast, self._load_forecast, self.repo.local_forecast_frame)
+
+    async def fetch_zones(self) -> pd.DataFrame:
+        return await self._fetch(ZONES_CACHE_KEY, self.repo._query_zones, lambda: self.run_query(self.repo.zones_sql(), ZONES_CACHE_KEY))
+
+    async def fetch_inputs(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Forecast and zones, fetched concurrently."""
+        forecast_df, zones_df = await asyncio.gather(self.forecast_rainfall(), self.fetch_zones())
+        return forecast_df, zones_df
+
+    async def _fetch(self, key: str, sync_loader, loader, warm_start=None) -> pd.DataFrame:
+        found, value = self.repo.cache.peek(key, sync_loader)
+        if found:
+            return value
+
+        offline = self.repo.client is None
+        task = self._inflight.get(key)
+        if task is None:
+            if offline:
+                # Offline loaders may fit the local forecast model, which must not stall the event loop.
+                task = asyncio.ensure_future(asyncio.to_thread(self.repo.cache.get, key, sync_loader))
+            else:
+                task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        if warm_start is not None and not offline:
+            # Answer from the local model while the remote job runs; its result fills the cache for later calls.
+            local = await asyncio.to_thread(warm_start)
+            if local is not None:
+                task.add_done_callback(_log_failure)
+                return local
+        # Shield the shared load so one caller going away does not cancel it for the rest.
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader) -> pd.DataFrame:
+        started = time.perf_counter()
+        df = await loader()
+        self.repo.cache.put(key, df, time.perf_counter() - started)
+        return df
+
+    async def _load_forecast(self) -> pd.DataFrame:
+        repo = self.repo
+        if repo.last_forecast is not None:
+            reused = repo.reusable_forecast(await self.run_query(repo.freshness_sql(), FRESHNESS_QUERY))
+            if reused is not None:
+                return reused
+        return repo.accept_forecast(await self.run_query(repo.forecast_sql(), FORECAST_CACHE_KEY))
+
+    async def run_query(self, query: str, name: str = "query") -> pd.DataFrame:
+        if query in self.repo.estimates:
+            self.repo.dry_run(query, name)
+        else:
+            await asyncio.to_thread(self.repo.dry_run, query, name)
+        if self._limiter is None:
+            self._limiter = asyncio.Semaphore(self.max_concurrency)
+        async with self._limiter:
+            started = time.perf_counter()
+            job = await asyncio.to_thread(self.repo.client.query, query)
+            try:
+                await asyncio.wait_for(self._wait_done(job), timeout=self.timeout_seconds)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                threading.Thread(target=_cancel_job, args=(job,), daemon=True).start()
+                raise
+            df = await asyncio.to_thread(lambda: job.result().to_dataframe())
+            _record_job(job, name, time.perf_counter() - started)
+            return df
+
+    async def _wait_done(self, job) -> None:
+        delay = self.POLL_INITIAL_SECONDS
+        while not await asyncio.to_thread(job.done):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.POLL_MAX_SECONDS)
+
+
+def _record_job(job, name: str, elapsed: float) -> None:
+    """Warehouse spend per query: bytes processed, BigQuery result-cache hits and job latency."""
+    metrics.histogram("flood_bigquery_job_seconds", "BigQuery job wall time", query=name).observe(elapsed)
+    metrics.counter("flood_bigquery_jobs_total", "BigQuery jobs run", query=name).inc()
+    bytes_processed = getattr(job, "total_bytes_processed", None)
+    if isinstance(bytes_processed, (int, float)):
+        metrics.counter("flood_bigquery_bytes_processed_total", "Bytes processed by BigQuery jobs", query=name).inc(bytes_processed)
+    if getattr(job, "cache_hit", None) is True:
+        metrics.counter("flood_bigquery_cache_hits_total", "BigQuery jobs answered from its result cache", query=name).inc()
+
+
+def _watermark(df: pd.DataFrame) -> Optional[pd.Timestamp]:
+    if "history_watermark" not in df.columns or df.empty:
+        return None
+    value = df["history_watermark"].iloc[0]
+    return None if pd.isna(value) else pd.Timestamp(value)
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Background query failed: %s", task.exception())
+
+
+def _cancel_job(job) -> None:
+    try:
+        job.cancel()
+    except Exception:  # noqa: BLE001 - best effort; the job may already be finished
+        logger.warning("Could not cancel BigQuery job %s", getattr(job, "job_id", "?"))
+
+
 def fetch_forecast_with_pandas() -> pd.DataFrame:
     """Utility function for standalone scripts using google-cloud-bigquery + pandas."""
     return BigQueryRepository().forecast_rainfall()
@@ -114,7 +559,14 @@ def forecast_sql_template() -> str:
 
 
 def to_forecast_rows(df: pd.DataFrame) -> List[dict]:
+    bounds = [name for name in ("lower_bound", "upper_bound") if name in df.columns]
+    by_zone = "zone_id" in df.columns
     return [
-        {"forecast_timestamp": str(row.forecast_timestamp), "predicted_rainfall": float(row.predicted_rainfall)}
+        {
+            **({"zone_id": str(row.zone_id)} if by_zone else {}),
+            "forecast_timestamp": str(row.forecast_timestamp),
+            "predicted_rainfall": float(row.predicted_rainfall),
+            **{name: float(getattr(row, name)) for name in bounds},
+        }
         for row in df.itertuples(index=False)
     ]
@@ -1,42 +1,101 @@
 from __future__ import annotations
 
-from typing import List
+import logging
+from pathlib import Path
+from typing import List, Optional
 
+import numpy as np
 import pandas as pd
 
-from backend.app.models.schemas import ClearanceResult
+from backend.app.core.config import get_settings
+from backend.app.core.metrics import timed
+from backend.app.models.schemas import ClearanceResult, ClearanceRoad
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROAD_ASSETS_PATH = Path(__file__).resolve().parents[2] / "data" / "road_assets.csv"
+ASSET_COLUMNS = list(ClearanceRoad.model_fields)
+
+# Used for blocked roads missing from the asset table.
+DEFAULT_ROAD_AREA_M2 = 3500.0
+DEFAULT_PUMP_CAPACITY_M3_PER_HOUR = 320.0
+DEFAULT_HOSPITAL_PROXIMITY_KM = 2.5
+MIN_HOSPITAL_PROXIMITY_KM = 0.1
+
+
+def load_road_assets(path: str = "") -> pd.DataFrame:
+    """ClearanceRoad rows keyed by ``zone_id`` ("source-target"); empty if the table is missing."""
+    path = Path(path) if path else DEFAULT_ROAD_ASSETS_PATH
+    if not path.exists():
+        logger.warning("Road asset table %s not found; using default clearance assets", path)
+        return pd.DataFrame(columns=ASSET_COLUMNS)
+    df = pd.read_csv(path, dtype={"road_id": str, "zone_id": str})
+    missing = set(ASSET_COLUMNS) - set(df.columns)
+    if missing:
+        raise ValueError(f"{path} is missing columns: {sorted(missing)}")
+    return df[ASSET_COLUMNS].drop_duplicates("zone_id")
 
 
 class RoadClearanceService:
-    def prioritize(self, blocked_edges: List[List[str]], zone_risk_df: pd.DataFrame) -> List[ClearanceResult]:
-        zone_map = zone_risk_df.set_index("zone_id").to_dict("index")
-        rows = []
-
-        for idx, (source, target) in enumerate(blocked_edges, start=1):
-            source_data = zone_map.get(source)
-            target_data = zone_map.get(target)
-            if not source_data or not target_data:
-                continue
-
-            water_depth_cm = max(source_data["estimated_water_depth"], target_data["estimated_water_depth"])
-            road_area = 3500 + (idx * 400)
-            depth_m = water_depth_cm / 100
-            volume = road_area * depth_m
-            pump_capacity = 320 + (idx * 15)
-            clearance_time = volume / pump_capacity
-            pop_density = max(source_data["population_density"], target_data["population_density"])
-            road_importance = max(source_data["road_importance_score"], target_data["road_importance_score"])
-            hospital_proximity = 1.0 + (idx % 4)
-            priority_score = pop_density * road_importance * (1 / hospital_proximity)
-
-            rows.append(
-                ClearanceResult(
-                    road_id=f"R-{idx:03d}",
-                    zone_id=f"{source}-{target}",
-                    water_depth_cm=round(float(water_depth_cm), 2),
-                    clearance_time_hours=round(float(clearance_time), 2),
-                    priority_score=round(float(priority_score), 2),
-                )
-            )
+    def __init__(self, assets: Optional[pd.DataFrame] = None, top_k: Optional[int] = None) -> None:
+        settings = get_settings()
+        self.top_k = settings.clearance_top_k if top_k is None else top_k
+        if assets is None:
+            assets = load_road_assets(settings.road_assets_path)
+        assets = assets.drop_duplicates("zone_id")
+        self._asset_index = pd.Index(assets["zone_id"].astype(str))
+        # Trailing entry holds the defaults so a -1 lookup lands on them.
+        self._road_id = np.append(assets["road_id"].astype(str).to_numpy(dtype=object), None)
+        self._area = np.append(assets["road_area_m2"].to_numpy(dtype=float), DEFAULT_ROAD_AREA_M2)
+        self._pump = np.append(assets["pump_capacity_m3_per_hour"].to_numpy(dtype=float), DEFAULT_PUMP_CAPACITY_M3_PER_HOUR)
+        self._hospital = np.append(assets["hospital_proximity_km"].to_numpy(dtype=float), DEFAULT_HOSPITAL_PROXIMITY_KM)
+
+    @timed("prioritize")
+    def prioritize(self, blocked_edges: List[List[str]], zone_risk_df: pd.DataFrame, k: Optional[int] = None) -> List[ClearanceResult]:
+        """Top ``k`` blocked roads by priority, scored as column operations over every blocked road."""
+        k = self.top_k if k is None else k
+        if not len(blocked_edges) or k <= 0:
+            return []
+        edges = np.asarray(blocked_edges, dtype=object).reshape(-1, 2)
+        zones = pd.Index(zone_risk_df["zone_id"].astype(str))
+        src, dst = zones.get_indexer(edges[:, 0]), zones.get_indexer(edges[:, 1])
+        known = (src >= 0) & (dst >= 0)
+        if not known.any():
+            return []
+        edges, src, dst = edges[known], src[known], dst[known]
 
-        return sorted(rows, key=lambda item: item.priority_score, reverse=True)[:5]
+        depth = zone_risk_df["estimated_water_depth"].to_numpy(dtype=float)
+        population = zone_risk_df["population_density"].to_numpy(dtype=float)
+        importance = zone_risk_df["road_importance_score"].to_numpy(dtype=float)
+        water_depth_cm = np.maximum(depth[src], depth[dst])
+
+        keys = edges[:, 0] + "-" + edges[:, 1]
+        row = self._asset_index.get_indexer(keys)
+        reverse = row < 0
+        if reverse.any():
+            row[reverse] = self._asset_index.get_indexer(edges[reverse, 1] + "-" + edges[reverse, 0])
+
+        volume = self._area[row] * (water_depth_cm / 100.0)
+        clearance_time = volume / self._pump[row]
+        hospital = np.clip(self._hospital[row], MIN_HOSPITAL_PROXIMITY_KM, None)
+        priority = np.maximum(population[src], population[dst]) * np.maximum(importance[src], importance[dst]) / hospital
+
+        if len(priority) > k:
+            top = np.argpartition(-priority, k - 1)[:k]
+        else:
+            top = np.arange(len(priority))
+        top = top[np.lexsort((top, -priority[top]))]
+
+        road_ids = self._road_id[row[top]]
+        return [
+            ClearanceResult(
+                road_id=road_id if road_id is not None else key,
+                zone_id=key,
+                water_depth_cm=round(float(water), 2),
+                clearance_time_hours=round(float(hours), 2),
+                priority_score=round(float(score), 2),
+            )
+            for road_id, key, water, hours, score in zip(
+                road_ids, keys[top], water_depth_cm[top], clearance_time[top], priority[top]
+            )
+        ]
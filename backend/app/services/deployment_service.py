@@ -1,51 +1,196 @@
 from __future__ import annotations
 
-from typing import List
+import threading
+from typing import Dict, List, Optional
 
 import numpy as np
 import pandas as pd
-from scipy.optimize import linear_sum_assignment
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
 
+from backend.app.core.metrics import stage, timed
 from backend.app.models.schemas import DeploymentAssignment, EmergencyUnit
+from backend.app.services.route_matrix import RouteMatrixService
+from backend.app.services.routing_service import FloodGraph
+
+# Minutes of travel the first unit at a fully likely flood is worth; later units at the same zone are worth less.
+RISK_BOOST_MINUTES = 10.0
+# Units a zone needs at the reference population density, by risk level.
+UNITS_BY_LEVEL = {"HIGH": 1, "CRITICAL": 2}
+REFERENCE_DENSITY = 20_000.0
+MAX_UNITS_PER_ZONE = 6
+# Candidate units per demand slot, nearest by road, on top of each unit's nearest severe zone.
+CANDIDATES_PER_SLOT = 4
+MIN_CANDIDATES = 8
+# Minutes a re-dispatch must save before a unit already sent somewhere is moved to another zone.
+SWITCH_PENALTY_MINUTES = 2.0
+
+
+def zone_demand(severe: pd.DataFrame) -> np.ndarray:
+    """Units needed per zone: a base count by risk level, scaled up for denser-than-reference zones."""
+    base = severe["risk_level"].map(UNITS_BY_LEVEL).fillna(1).to_numpy(dtype=float)
+    if "population_density" in severe.columns:
+        density = severe["population_density"].to_numpy(dtype=float)
+        base = base * np.maximum(np.nan_to_num(density / REFERENCE_DENSITY, nan=1.0), 1.0)
+    return np.clip(np.ceil(base - 1e-9), 1, MAX_UNITS_PER_ZONE).astype(np.intp)
+
+
+def solve_dispatch(demand, slot_value, arc_zone, arc_unit, arc_cost, n_units: int) -> np.ndarray:
+    """Min-cost max-flow from zone demand slots to units over sparse candidate arcs.
+
+    Zone ``z`` is expanded into ``demand[z]`` slots worth ``slot_value[z][j]`` minutes
+    (non-increasing, so slots fill in order), and the flow becomes a sparse assignment
+    of slots to units. Every slot also gets a private dummy unit priced above any
+    rearrangement of real arcs: a full matching always exists, and the solver places
+    as many real units as the candidates allow before it minimises travel minus value.
+    Returns the arc index per unit, -1 where the unit is left unassigned.
+    """
+    demand = np.asarray(demand, dtype=np.intp)
+    arc_zone = np.asarray(arc_zone, dtype=np.intp)
+    arc_unit = np.asarray(arc_unit, dtype=np.intp)
+    slot_start = np.concatenate([[0], np.cumsum(demand)])
+    n_slots = int(slot_start[-1])
+    per_arc = demand[arc_zone]
+    arc_of = np.repeat(np.arange(len(arc_zone)), per_arc)
+    slot = slot_start[arc_zone[arc_of]] + np.arange(len(arc_of)) - np.repeat(np.cumsum(per_arc) - per_arc, per_arc)
+    value = np.concatenate([np.asarray(values, dtype=float)[:count] for values, count in zip(slot_value, demand)])
+    weight = np.asarray(arc_cost, dtype=float)[arc_of] - value[slot]
+    if len(weight):
+        # Every full matching has n_slots edges, so a common shift keeps the optimum; entries must be non-zero to exist.
+        weight = weight - weight.min() + 1.0
+    dummy = (n_slots + 1) * (weight.max() + 1.0) if len(weight) else 1.0
+    matrix = csr_matrix(
+        (np.concatenate([weight, np.full(n_slots, dummy)]), (np.concatenate([slot, np.arange(n_slots)]), np.concatenate([arc_unit[arc_of], n_units + np.arange(n_slots)]))),
+        shape=(n_slots, n_units + n_slots),
+    )
+    with stage("min_weight_matching"):
+        matched = min_weight_full_bipartite_matching(matrix)[1]
+    result = np.full(n_units, -1, dtype=np.intp)
+    real = np.flatnonzero(matched < n_units)
+    # (zone, unit) pairs are unique among the arcs, so a sorted key finds each matched arc.
+    key = arc_zone * n_units + arc_unit
+    order = np.argsort(key)
+    zone_of_slot = np.searchsorted(slot_start, real, side="right") - 1
+    units = matched[real]
+    result[units] = order[np.searchsorted(key, zone_of_slot * n_units + units, sorter=order)]
+    return result
 
 
 class EmergencyDeploymentService:
-    def assign_units(self, units: List[EmergencyUnit], zone_risk_df: pd.DataFrame) -> List[DeploymentAssignment]:
-        severe = zone_risk_df[zone_risk_df["risk_level"].isin(["HIGH", "CRITICAL"])].copy()
+    """Dispatches units to HIGH and CRITICAL zones as a min-cost flow over road travel times.
+
+    Each severe zone asks for ``zone_demand`` units. Only each zone's nearest units (and
+    each unit's nearest zone) are candidate arcs, so the flow network stays sparse as the
+    fleet grows. The committed dispatch is kept, and moving a unit it placed to another
+    zone costs ``SWITCH_PENALTY_MINUTES`` extra, so re-dispatches do not reshuffle the
+    fleet for marginal gains.
+    """
+
+    def __init__(self, route_matrix: Optional[RouteMatrixService] = None) -> None:
+        self.route_matrix = route_matrix or RouteMatrixService()
+        self.committed: Dict[str, str] = {}
+        self._committed_lock = threading.Lock()
+
+    @timed("assign_units")
+    def assign_units(
+        self,
+        units: List[EmergencyUnit],
+        zone_risk_df: pd.DataFrame,
+        graph: FloodGraph,
+        unit_nodes: Optional[np.ndarray] = None,
+        commit: bool = False,
+    ) -> List[DeploymentAssignment]:
+        """Send units to severe zones; ``unit_nodes`` (road node per unit, -1 for none) overrides a unit's zone node.
+
+        ``commit=True`` makes this the dispatch later solves are kept stable against;
+        what-if simulations leave it alone.
+        """
+        severe = zone_risk_df[zone_risk_df["risk_level"].isin(["HIGH", "CRITICAL"])]
         if severe.empty or not units:
+            if commit:
+                with self._committed_lock:
+                    self.committed = {}
             return []
 
-        severe = severe.sort_values("flood_probability", ascending=False).reset_index(drop=True)
-        targets = severe["zone_id"].tolist()
+        severe = severe.sort_values("flood_probability", ascending=False)
+        targets = severe["zone_id"].astype(str).tolist()
+        unit_ids = [unit.unit_id for unit in units]
+        eta = self._eta_minutes(units, targets, graph, unit_nodes)
+        demand = zone_demand(severe)
+        probability = severe["flood_probability"].to_numpy(dtype=float)
+        slot_value = [RISK_BOOST_MINUTES * p / np.arange(1, d + 1) for p, d in zip(probability, demand)]
+        arc_unit, arc_zone = self._candidates(eta, demand)
 
-        size = max(len(units), len(targets))
-        cost_matrix = np.full((size, size), fill_value=1e6, dtype=float)
+        cost = eta[arc_unit, arc_zone]
+        with self._committed_lock:
+            committed = self.committed
+        if committed:
+            position = {zone_id: z for z, zone_id in enumerate(targets)}
+            current = np.array([position.get(committed.get(unit_id), -1) for unit_id in unit_ids], dtype=np.intp)
+            moved = (current[arc_unit] >= 0) & (current[arc_unit] != arc_zone)
+            cost = cost + np.where(moved, SWITCH_PENALTY_MINUTES, 0.0)
 
-        for i, unit in enumerate(units):
-            for j, zone in enumerate(targets):
-                pseudo_distance = self._zone_distance(unit.current_zone, zone)
-                eta_minutes = (pseudo_distance / max(unit.speed_kmph, 1.0)) * 60
-                risk_boost = float(severe.loc[j, "flood_probability"]) * 10
-                cost_matrix[i, j] = eta_minutes - risk_boost
+        arcs = solve_dispatch(demand, slot_value, arc_zone, arc_unit, cost, len(units))
+        placed = np.flatnonzero(arcs >= 0)
+        assignments = [
+            DeploymentAssignment(unit_id=unit_ids[u], zone_id=targets[arc_zone[arcs[u]]], eta_minutes=round(float(eta[u, arc_zone[arcs[u]]]), 2))
+            for u in placed
+        ]
+        if commit:
+            with self._committed_lock:
+                self.committed = {assignment.unit_id: assignment.zone_id for assignment in assignments}
+        return assignments
 
-        row_idx, col_idx = linear_sum_assignment(cost_matrix)
-        assignments: List[DeploymentAssignment] = []
+    @staticmethod
+    def _candidates(eta: np.ndarray, demand: np.ndarray):
+        """Sparse (unit, zone) arcs: each zone's nearest units by road, plus each unit's nearest zone."""
+        n_units, n_zones = eta.shape
+        k = int(min(n_units, max(MIN_CANDIDATES, CANDIDATES_PER_SLOT * int(demand.max()))))
+        nearest_units = np.argpartition(eta, k - 1, axis=0)[:k] if k < n_units else np.broadcast_to(np.arange(n_units)[:, None], (n_units, n_zones))
+        units = np.concatenate([nearest_units.reshape(-1), np.arange(n_units)])
+        zones = np.concatenate([np.broadcast_to(np.arange(n_zones), nearest_units.shape).reshape(-1), eta.argmin(axis=1)])
+        keep = np.isfinite(eta[units, zones])
+        pairs = np.unique(units[keep] * n_zones + zones[keep])
+        return pairs // n_zones, pairs % n_zones
 
-        for r, c in zip(row_idx, col_idx):
-            if r >= len(units) or c >= len(targets):
-                continue
-            unit = units[r]
-            zone = targets[c]
-            eta = (self._zone_distance(unit.current_zone, zone) / max(unit.speed_kmph, 1.0)) * 60
-            assignments.append(
-                DeploymentAssignment(unit_id=unit.unit_id, zone_id=zone, eta_minutes=round(float(eta), 2))
-            )
+    def _eta_minutes(
+        self, units: List[EmergencyUnit], targets: List[str], graph: FloodGraph, unit_nodes: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """(units x targets) travel time over open roads, plus a flooded final road into the target; ``inf`` where unreachable."""
+        network = graph.network
+        zone_nodes = np.array([self._node(network, unit.current_zone) for unit in units], dtype=np.intp)
+        unit_nodes = zone_nodes if unit_nodes is None else np.where(np.asarray(unit_nodes) >= 0, unit_nodes, zone_nodes)
+        target_nodes = np.array([self._node(network, zone) for zone in targets], dtype=np.intp)
+        known_units = np.flatnonzero(unit_nodes >= 0)
+        known_targets = np.flatnonzero(target_nodes >= 0)
 
-        return assignments
+        km = np.full((len(units), len(targets)), np.inf)
+        km[np.ix_(known_units, known_targets)] = self._rescue_km(graph, unit_nodes[known_units], target_nodes[known_targets])
+        speed = np.maximum(np.array([unit.speed_kmph for unit in units], dtype=float), 1.0)
+        return km / speed[:, None] * 60
+
+    def _rescue_km(self, graph: FloodGraph, sources: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """Road km from units to target nodes where the last road into a target may be flooded.
+
+        A zone deeper than the blocking depth closes every road into it, so over open
+        roads alone only units already inside could reach it. Rescue units drive open
+        roads to a neighbour and cross the final flooded road into the zone.
+        """
+        net = graph.network
+        km = self.route_matrix.distances_km(graph, sources, targets)
+        counts = net.indptr[targets + 1] - net.indptr[targets]
+        entries = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(net.indptr[targets], counts)
+        owner = np.repeat(np.arange(len(targets)), counts)
+        flooded = graph.blocked[net.edge_ids[entries]]
+        if not flooded.any():
+            return km
+        entries, owner = entries[flooded], owner[flooded]
+        neighbours, inverse = np.unique(net.indices[entries], return_inverse=True)
+        via = self.route_matrix.distances_km(graph, sources, neighbours)[:, inverse] + net.base_distance[net.edge_ids[entries]]
+        np.minimum.at(km.T, owner, via.T)
+        return km
 
     @staticmethod
-    def _zone_distance(zone_a: str, zone_b: str) -> float:
-        if zone_a == zone_b:
-            return 1.0
-        token_distance = abs(len(zone_a) - len(zone_b)) + 3
-        return float(token_distance)
+    def _node(network, zone_id: str) -> int:
+        node = network.zone_node(zone_id)
+        return -1 if node is None else node
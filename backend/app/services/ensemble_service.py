@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.app.core.metrics import stage
+from backend.app.services.risk_engine import RiskEngine
+from backend.app.services.routing_service import BLOCKED_DEPTH_CM, FloodGraph, RoutingEngine
+
+MAX_ENSEMBLE_MEMBERS = 20_000
+# Members per task. Fixed, so a seed gives the same result whatever the worker count.
+CHUNK_MEMBERS = 256
+# Below this many members the pool start-up costs more than it saves.
+MIN_POOL_MEMBERS = 2 * CHUNK_MEMBERS
+# Correlation of a series' forecast error from one day to the next; wet spells persist.
+DAY_CORRELATION = 0.7
+# Spread (as a fraction of the forecast) assumed for forecast rows without prediction bounds.
+DEFAULT_RELATIVE_SPREAD = 0.25
+# Route searches per ensemble; members whose pattern is still unanswered are reported as unrouted.
+MAX_ROUTED_PATTERNS = 64
+
+
+@dataclass
+class RainfallDistribution:
+    """Daily rainfall per forecast series as split normals fitted to the prediction interval.
+
+    ``mean``, ``sigma_low`` and ``sigma_high`` are (days x series). Each zone reads the
+    series in ``zone_series``: its own per-zone forecast, or the all-row mean (last series).
+    """
+
+    mean: np.ndarray
+    sigma_low: np.ndarray
+    sigma_high: np.ndarray
+    zone_series: np.ndarray
+    day_correlation: float = DAY_CORRELATION
+
+    @classmethod
+    def from_forecast(cls, forecast_df: pd.DataFrame, zone_ids, confidence: float = 0.8) -> "RainfallDistribution":
+        frame = forecast_df.assign(day=pd.to_datetime(forecast_df["forecast_timestamp"], utc=True))
+        mean = frame["predicted_rainfall"].astype(float)
+        lower = frame["lower_bound"].astype(float) if "lower_bound" in frame.columns else pd.Series(np.nan, index=frame.index)
+        upper = frame["upper_bound"].astype(float) if "upper_bound" in frame.columns else pd.Series(np.nan, index=frame.index)
+        # Rows without prediction bounds fall back to a relative spread around the forecast.
+        lower = lower.fillna(mean * (1.0 - DEFAULT_RELATIVE_SPREAD))
+        upper = upper.fillna(mean * (1.0 + DEFAULT_RELATIVE_SPREAD))
+        frame = frame.assign(mean=mean, lower=lower, upper=upper)
+
+        series = frame["zone_id"].astype(str) if "zone_id" in frame.columns else pd.Series("", index=frame.index)
+        names = list(dict.fromkeys(series)) if "zone_id" in frame.columns else []
+        tables = [frame.assign(series=series).pivot_table(index="day", columns="series", values=column, aggfunc="mean") for column in ("mean", "lower", "upper")]
+        city = [frame.groupby("day")[column].mean() for column in ("mean", "lower", "upper")]
+        days = city[0].index.sort_values()
+        stacked = [
+            np.column_stack([table.reindex(index=days, columns=names).to_numpy(dtype=float), overall.reindex(days).to_numpy(dtype=float)])
+            for table, overall in zip(tables, city)
+        ]
+        # A zone's missing day takes the all-row value for that day, as in RiskEngine.
+        stacked = [np.where(np.isnan(values), values[:, -1:], values) for values in stacked]
+        mean, lower, upper = stacked
+        z = NormalDist().inv_cdf(0.5 + confidence / 2.0)
+        position = {name: i for i, name in enumerate(names)}
+        zone_series = np.array([position.get(str(zone_id), len(names)) for zone_id in zone_ids], dtype=np.intp)
+        return cls(
+            mean=mean,
+            sigma_low=np.clip(mean - lower, 0.0, None) / z,
+            sigma_high=np.clip(upper - mean, 0.0, None) / z,
+            zone_series=zone_series,
+        )
+
+    def sample(self, rng: np.random.Generator, members: int) -> np.ndarray:
+        """Mean daily rain per zone over the forecast horizon, (members x zones), one AR(1) trajectory per series."""
+        days, n_series = self.mean.shape
+        innovation = np.float32(np.sqrt(1.0 - self.day_correlation**2))
+        # float32 and in-place updates: this loop is most of an ensemble's run time.
+        noise = rng.standard_normal((members, n_series), dtype=np.float32)
+        fresh = np.empty_like(noise)
+        rain = np.empty_like(noise)
+        total = np.zeros((members, n_series))
+        for day in range(days):
+            if day:
+                rng.standard_normal(dtype=np.float32, out=fresh)
+                noise *= np.float32(self.day_correlation)
+                fresh *= innovation
+                noise += fresh
+            np.multiply(noise, self.sigma_high[day].astype(np.float32), out=rain)
+            np.multiply(noise, self.sigma_low[day].astype(np.float32), out=rain, where=noise < 0)
+            rain += self.mean[day].astype(np.float32)
+            np.maximum(rain, 0.0, out=rain)
+            total += rain
+        return (total / max(days, 1))[:, self.zone_series]
+
+
+@dataclass
+class EnsembleKernel:
+    """Everything a worker needs to evaluate members: the detached risk state and edge endpoints."""
+
+    engine: RiskEngine
+    rainfall: RainfallDistribution
+    rainfall_multiplier: float
+    edge_src: np.ndarray
+    edge_dst: np.ndarray
+    risk_code: int
+    depth_threshold_cm: float = BLOCKED_DEPTH_CM
+
+    def run(self, seed: np.random.SeedSequence, members: int) -> "EnsembleTally":
+        batch = self.engine.evaluate_forecasts(self.rainfall.sample(np.random.default_rng(seed), members), self.rainfall_multiplier)
+        depth = batch.estimated_water_depth
+        flooded = depth > BLOCKED_DEPTH_CM
+        blocked = flooded[:, self.edge_src] | flooded[:, self.edge_dst]
+        patterns, counts = np.unique(np.packbits(flooded, axis=1), axis=0, return_counts=True)
+        return EnsembleTally(
+            members=members,
+            risk_exceeded=(batch.risk_code >= self.risk_code).sum(axis=0),
+            depth_exceeded=(depth > self.depth_threshold_cm).sum(axis=0),
+            probability_sum=batch.flood_probability.sum(axis=0),
+            depth_sum=depth.sum(axis=0),
+            edge_blocked=blocked.sum(axis=0),
+            patterns={row.tobytes(): int(count) for row, count in zip(patterns, counts)},
+        )
+
+
+@dataclass
+class EnsembleTally:
+    """Counts summed over members; ``patterns`` maps a packed flooded-zone mask to its member count."""
+
+    members: int
+    risk_exceeded: np.ndarray
+    depth_exceeded: np.ndarray
+    probability_sum: np.ndarray
+    depth_sum: np.ndarray
+    edge_blocked: np.ndarray
+    patterns: Dict[bytes, int] = field(default_factory=dict)
+
+    def merge(self, other: "EnsembleTally") -> "EnsembleTally":
+        self.members += other.members
+        self.risk_exceeded = self.risk_exceeded + other.risk_exceeded
+        self.depth_exceeded = self.depth_exceeded + other.depth_exceeded
+        self.probability_sum = self.probability_sum + other.probability_sum
+        self.depth_sum = self.depth_sum + other.depth_sum
+        self.edge_blocked = self.edge_blocked + other.edge_blocked
+        for pattern, count in other.patterns.items():
+            self.patterns[pattern] = self.patterns.get(pattern, 0) + count
+        return self
+
+
+@dataclass
+class EnsembleResult:
+    """Per-zone and per-edge probabilities over the members, plus the route distribution when asked for."""
+
+    members: int
+    seed: int
+    rainfall_multiplier: float
+    zone_ids: np.ndarray
+    risk_exceedance: np.ndarray
+    depth_exceedance: np.ndarray
+    mean_flood_probability: np.ndarray
+    mean_water_depth: np.ndarray
+    edges: List[List[str]]
+    edge_blockage: np.ndarray
+    routes: Optional[List[Dict]] = None
+    unreachable_probability: Optional[float] = None
+    routed_probability: Optional[float] = None
+
+
+class EnsemblePool:
+    """Long-lived worker processes for ensembles, reused across requests.
+
+    Workers come from a ``forkserver`` (or ``spawn``) context: forking the
+    multi-threaded server could copy locks held by its background threads into
+    a child that then deadlocks on them. The executor starts on first use.
+    """
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context(method))
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def _run_chunks(job: Tuple[EnsembleKernel, List[Tuple[np.random.SeedSequence, int]]]) -> List[EnsembleTally]:
+    kernel, tasks = job
+    return [kernel.run(*task) for task in tasks]
+
+
+def run_ensemble(
+    kernel: EnsembleKernel, members: int, seed: int = 0, workers: Optional[int] = None, pool: Optional[EnsemblePool] = None
+) -> EnsembleTally:
+    """Evaluate ``members`` draws in fixed-size seeded chunks, across a process pool when worth it.
+
+    Without a ``pool`` a temporary one is started for the call.
+    """
+    sizes = [CHUNK_MEMBERS] * (members // CHUNK_MEMBERS) + ([members % CHUNK_MEMBERS] if members % CHUNK_MEMBERS else [])
+    tasks = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+    workers = min(workers or (pool.workers if pool is not None else os.cpu_count()) or 1, len(tasks))
+    with stage("ensemble_members"):
+        if workers <= 1 or members < MIN_POOL_MEMBERS:
+            tallies = [kernel.run(*task) for task in tasks]
+        else:
+            owned = pool is None
+            pool = pool or EnsemblePool(workers)
+            try:
+                # One job per worker, so the kernel is pickled once per worker rather than once per chunk.
+                jobs = [(kernel, tasks[i::workers]) for i in range(workers)]
+                tallies = [tally for batch in pool.executor().map(_run_chunks, jobs) for tally in batch]
+            finally:
+                if owned:
+                    pool.shutdown()
+    total = tallies[0]
+    for tally in tallies[1:]:
+        total.merge(tally)
+    return total
+
+
+def route_patterns(
+    routing: RoutingEngine,
+    graph: FloodGraph,
+    tally: EnsembleTally,
+    zone_ids: np.ndarray,
+    edge_index: np.ndarray,
+    edge_src: np.ndarray,
+    edge_dst: np.ndarray,
+    source: str,
+    destination: str,
+) -> Tuple[List[Dict], float, float]:
+    """Route the members' blockage patterns on the baseline edge weights, searching as few as possible.
+
+    Closing more roads never shortens a route, so the answer for a flooded-zone
+    pattern also holds for every pattern that floods at least those zones and none
+    of the zones on its route (for "no route": every such superset). Searches
+    start from the all-clear pattern, then take the most frequent unanswered
+    pattern, up to MAX_ROUTED_PATTERNS searches.
+
+    Returns the distinct routes with their probability, the probability of no route,
+    and the share of members whose pattern was answered at all.
+    """
+    n_zones = len(zone_ids)
+    zone_pos = {zone_id: i for i, zone_id in enumerate(zone_ids)}
+    network = routing.network
+    clear = bytes((n_zones + 7) // 8)
+    keys = [clear] + [pattern for pattern in tally.patterns if pattern != clear]
+    patterns = np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(len(keys), -1)
+    counts = np.array([tally.patterns.get(pattern, 0) for pattern in keys], dtype=np.int64)
+    # The all-clear pattern goes first whether or not any member had it: it answers most members at once.
+    order = np.concatenate([[0], 1 + np.argsort(-counts[1:], kind="stable")])
+    open_rows = np.ones(len(keys), dtype=bool)
+    routes: Dict[Tuple[str, ...], Dict] = {}
+    unreachable = routed = searches = 0
+    with stage("ensemble_routes"):
+        for row in order:
+            if not open_rows[row]:
+                continue
+            if searches == MAX_ROUTED_PATTERNS:
+                break
+            searches += 1
+            flooded = np.unpackbits(patterns[row], count=n_zones).astype(bool)
+            blocked = np.zeros(routing.network.num_edges, dtype=bool)
+            blocked[edge_index] = flooded[edge_src] | flooded[edge_dst]
+            result = routing.get_safe_route(routing.with_blocked(graph, blocked), source, destination)
+
+            answered = open_rows & ~np.any(patterns[row] & ~patterns, axis=1)
+            if result["route"]:
+                on_route = np.zeros(n_zones, dtype=bool)
+                zones = [network.node_zone[network.node_index[node]] for node in result["route"]]
+                on_route[[zone_pos[zone] for zone in zones if zone in zone_pos]] = True
+                answered &= ~np.any(patterns & np.packbits(on_route), axis=1)
+            open_rows &= ~answered
+            count = int(counts[answered].sum())
+            routed += count
+            if not result["route"]:
+                unreachable += count
+                continue
+            entry = routes.setdefault(tuple(result["route"]), {"route": result["route"], "total_cost": result["total_cost"], "members": 0})
+            entry["members"] += count
+    members = tally.members
+    ranked = sorted((entry for entry in routes.values() if entry["members"]), key=lambda entry: -entry["members"])
+    return (
+        [{"route": entry["route"], "total_cost": entry["total_cost"], "probability": entry["members"] / members} for entry in ranked],
+        unreachable / members,
+        routed / members,
+    )
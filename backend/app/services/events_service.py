@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from backend.app.services.serialization import json_default
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_SECONDS = 15.0
+KEEPALIVE_EVENT = b": keepalive\n\n"
+
+
+@dataclass
+class RiskState:
+    """What dashboards display: per-zone risk, blocked roads and the clearance ranking."""
+
+    zones: Dict[str, Tuple[str, float]] = field(default_factory=dict)
+    blocked: Set[Tuple[str, str]] = field(default_factory=set)
+    clearance: List[dict] = field(default_factory=list)
+
+    @classmethod
+    def from_results(cls, zone_df: pd.DataFrame, blocked_edges, clearance) -> "RiskState":
+        zones = dict(
+            zip(
+                zone_df["zone_id"].astype(str).tolist(),
+                zip(zone_df["risk_level"].astype(str).tolist(), zone_df["flood_probability"].round(4).tolist()),
+            )
+        )
+        return cls(
+            zones=zones,
+            blocked={tuple(edge) for edge in blocked_edges},
+            clearance=[item.model_dump() for item in clearance],
+        )
+
+    def as_event(self) -> dict:
+        return {
+            "zones": [_zone_row(zone_id, value) for zone_id, value in self.zones.items()],
+            "blocked_roads": sorted(list(edge) for edge in self.blocked),
+            "clearance": self.clearance,
+        }
+
+    def diff(self, previous: "RiskState") -> dict:
+        """Changes since ``previous``; empty when nothing a dashboard shows has moved."""
+        changes = {}
+        zones = [
+            _zone_row(zone_id, value)
+            for zone_id, value in self.zones.items()
+            if previous.zones.get(zone_id, (None,))[0] != value[0]
+        ]
+        if zones:
+            changes["zones"] = zones
+        removed = sorted(set(previous.zones) - set(self.zones))
+        if removed:
+            changes["removed_zones"] = removed
+        if self.blocked - previous.blocked:
+            changes["blocked"] = sorted(list(edge) for edge in self.blocked - previous.blocked)
+        if previous.blocked - self.blocked:
+            changes["reopened"] = sorted(list(edge) for edge in previous.blocked - self.blocked)
+        if [item["road_id"] for item in self.clearance] != [item["road_id"] for item in previous.clearance]:
+            changes["clearance"] = self.clearance
+        return changes
+
+
+def _zone_row(zone_id: str, value: Tuple[str, float]) -> dict:
+    return {"zone_id": zone_id, "risk_level": value[0], "flood_probability": value[1]}
+
+
+def encode_event(event: str, event_id: int, data: dict) -> bytes:
+    payload = json.dumps(data, default=json_default, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode()
+
+
+class RiskEventBroadcaster:
+    """Single producer of risk-state events fanned out to many server-sent event streams.
+
+    One task recomputes the state every ``poll_seconds`` (or sooner after
+    ``notify``) and encodes each diff once; subscribers only receive the bytes.
+    A subscriber whose bounded queue fills up is dropped back to a full snapshot
+    instead of holding back everyone else.
+    """
+
+    def __init__(self, compute: Callable[[], Awaitable[RiskState]], poll_seconds: float = 5.0, queue_size: int = 64) -> None:
+        self._compute = compute
+        self.poll_seconds = poll_seconds
+        self.queue_size = queue_size
+        self.state: Optional[RiskState] = None
+        self.event_id = 0
+        self.computations = 0
+        self._snapshot_event: Optional[bytes] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self) -> None:
+        """Ask for an early recompute; safe to call from worker threads."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._snapshot_event is not None:
+            queue.put_nowait(self._snapshot_event)
+        else:
+            self.notify()
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    async def stream(self, is_disconnected: Callable[[], Awaitable[bool]]):
+        queue = self.subscribe()
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        return
+                    chunk = KEEPALIVE_EVENT
+                yield chunk
+        finally:
+            self.unsubscribe(queue)
+
+    async def refresh(self) -> bool:
+        """Recompute once and broadcast what changed; returns whether an event went out."""
+        state = await self._compute()
+        self.computations += 1
+        previous, self.state = self.state, state
+        if previous is None:
+            self.event_id += 1
+            self._snapshot_event = encode_event("snapshot", self.event_id, state.as_event())
+            self._broadcast(self._snapshot_event)
+            return True
+
+        changes = state.diff(previous)
+        if not changes:
+            return False
+        self.event_id += 1
+        self._snapshot_event = encode_event("snapshot", self.event_id, state.as_event())
+        self._broadcast(encode_event("diff", self.event_id, changes))
+        return True
+
+    def _broadcast(self, chunk: bytes) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(chunk)
+            except asyncio.QueueFull:
+                # A stalled screen resyncs from the latest snapshot once it drains.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._snapshot_event)
+
+    async def _run(self) -> None:
+        while True:
+            if self._subscribers:
+                try:
+                    await self.refresh()
+                except Exception:
+                    logger.exception("Risk state refresh failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import threading
+from pathlib import Path
+from statistics import NormalDist
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from backend.app.core.metrics import stage
+
+logger = logging.getLogger(__name__)
+
+SEASON_DAYS = 365
+# Damping keeps a short-lived trend from being extrapolated across the whole horizon.
+DAMPING = 0.9
+ALPHAS = (0.05, 0.1, 0.2, 0.4, 0.7)
+BETAS = (0.0, 0.05, 0.2)
+GAMMAS = (0.05, 0.15, 0.3)
+LOCAL_FORECAST_SOURCE = "Local Holt-Winters (rainfall_history)"
+CITY_SERIES = "city"
+
+
+class HoltWinters:
+    """Additive damped-trend Holt-Winters fitted to many series in one pass.
+
+    ``fit`` runs every (series, smoothing-parameter) combination through the
+    recursions together as one array, then keeps each series' parameters with the
+    lowest one-step-ahead squared error. ``update`` applies further observations
+    to the fitted state without refitting. Seasonality is used only when the
+    history covers at least two seasons.
+    """
+
+    def __init__(self, season_length: int = SEASON_DAYS, alphas: Sequence[float] = ALPHAS, betas: Sequence[float] = BETAS, gammas: Sequence[float] = GAMMAS, damping: float = DAMPING) -> None:
+        self.season_length = season_length
+        self.alphas, self.betas, self.gammas = tuple(alphas), tuple(betas), tuple(gammas)
+        self.damping = damping
+        self.alpha = self.beta = self.gamma = np.empty(0)
+        self.level = self.trend = np.empty(0)
+        self.season = np.empty((0, 1))
+        self.position = 0
+        self._m = 1
+        self.sse = np.empty(0)
+        self.count = np.empty(0)
+
+    @property
+    def n_series(self) -> int:
+        return len(self.level)
+
+    @property
+    def sigma(self) -> np.ndarray:
+        return np.sqrt(self.sse / np.maximum(self.count, 1))
+
+    def fit(self, values: np.ndarray) -> "HoltWinters":
+        """Fit to ``values`` shaped (time, series); NaNs are treated as missing."""
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values[:, None]
+        steps, n_series = values.shape
+        m = self.season_length if self.season_length > 1 and steps >= 2 * self.season_length else 1
+        gammas = self.gammas if m > 1 else (0.0,)
+        grid = np.array(list(itertools.product(self.alphas, self.betas, gammas)))
+        alpha, beta, gamma = (np.broadcast_to(grid[:, i], (n_series, len(grid))) for i in range(3))
+
+        first = values[:m]
+        # Series with no observations in the first season (e.g. added later) start at zero.
+        level = np.nansum(first, axis=0) / np.maximum(np.sum(~np.isnan(first), axis=0), 1) if m > 1 else np.nan_to_num(values[0])
+        season = np.nan_to_num(first - level).T if m > 1 else np.zeros((n_series, 1))
+        state = (
+            np.repeat(level[:, None], len(grid), axis=1),
+            np.zeros((n_series, len(grid))),
+            np.repeat(season[:, None, :], len(grid), axis=1),
+        )
+        sse = np.zeros((n_series, len(grid)))
+        count = np.zeros((n_series, len(grid)))
+        state, sse, count = self._run(values[m:] if m > 1 else values[1:], state, 0, alpha, beta, gamma, sse, count)
+
+        best = np.argmin(np.where(count > 0, sse, np.inf), axis=1) if len(grid) > 1 else np.zeros(n_series, dtype=np.intp)
+        rows = np.arange(n_series)
+        self.alpha, self.beta, self.gamma = alpha[rows, best].copy(), beta[rows, best].copy(), gamma[rows, best].copy()
+        self.level, self.trend, self.season = state[0][rows, best], state[1][rows, best], state[2][rows, best]
+        self.sse, self.count = sse[rows, best], count[rows, best]
+        self._m = m
+        self.position = (steps - m) % m if m > 1 else 0
+        return self
+
+    def update(self, values: np.ndarray) -> None:
+        """Apply new observations (time, series) to the fitted state."""
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values[None, :]
+        state = (self.level, self.trend, self.season)
+        state, self.sse, self.count = self._run(values, state, self.position, self.alpha, self.beta, self.gamma, self.sse, self.count)
+        self.level, self.trend, self.season = state
+        self.position = (self.position + len(values)) % self._m
+
+    def forecast(self, horizon: int, confidence: float = 0.8):
+        """Mean, lower and upper bounds, each shaped (series, horizon), clipped at zero rain."""
+        steps = np.arange(1, horizon + 1)
+        damp = np.cumsum(self.damping ** steps)
+        season = self.season[:, (self.position + steps - 1) % self._m]
+        mean = self.level[:, None] + damp[None, :] * self.trend[:, None] + season
+        # Error variance of the h-step forecast grows with the smoothing weights carried forward.
+        carried = self.alpha[:, None] * (1.0 + self.beta[:, None] * np.concatenate([[0.0], damp[:-1]])[None, :])
+        variance = np.cumsum(np.concatenate([np.ones((len(mean), 1)), carried[:, :-1] ** 2], axis=1), axis=1)
+        z = NormalDist().inv_cdf(0.5 + confidence / 2.0)
+        spread = z * self.sigma[:, None] * np.sqrt(variance)
+        return np.clip(mean, 0.0, None), np.clip(mean - spread, 0.0, None), np.clip(mean + spread, 0.0, None)
+
+    def _run(self, values, state, position, alpha, beta, gamma, sse, count):
+        level, trend, season = (array.copy() for array in state)
+        m = season.shape[-1]
+        phi = self.damping
+        sse, count = sse.copy(), count.copy()
+        for row in values:
+            y = row[:, None] if level.ndim == 2 else row
+            slot = season[..., position]
+            predicted = level + phi * trend + slot
+            seen = ~np.isnan(y)
+            # Missing observations are replaced by the forecast, which leaves the state on its trajectory.
+            observed = np.where(seen, y, predicted)
+            error = np.where(seen, observed - predicted, 0.0)
+            sse += error**2
+            count += seen
+            new_level = alpha * (observed - slot) + (1.0 - alpha) * (level + phi * trend)
+            trend = beta * (new_level - level) + (1.0 - beta) * phi * trend
+            season[..., position] = gamma * (observed - new_level) + (1.0 - gamma) * slot
+            level = new_level
+            position = (position + 1) % m
+        return (level, trend, season), sse, count
+
+
+def daily_totals(history: pd.DataFrame) -> pd.DataFrame:
+    """Daily rainfall totals, one column per series (per zone when ``zone_id`` is present)."""
+    frame = history.assign(day=pd.to_datetime(history["timestamp"], utc=True).dt.floor("D"))
+    series = frame["zone_id"].astype(str) if "zone_id" in frame.columns else CITY_SERIES
+    table = frame.assign(series=series).pivot_table(index="day", columns="series", values="rainfall_mm", aggfunc="sum")
+    return table.asfreq("D")
+
+
+class LocalForecaster:
+    """Rainfall forecasts from a locally stored ``rainfall_history`` file.
+
+    The file (CSV or parquet with ``timestamp`` and ``rainfall_mm``, optionally
+    ``zone_id``) is re-read only when it changes. Days after the last one fitted
+    are applied incrementally; a changed set of series or rewritten past days
+    trigger a full refit. ``update`` may carry only some series: the others count
+    as missing for those days, and series it adds are merged with the fitted ones.
+    """
+
+    def __init__(self, path: str, horizon: int = 7, confidence: float = 0.8, season_length: int = SEASON_DAYS) -> None:
+        self.path = Path(path)
+        self.horizon = horizon
+        self.confidence = confidence
+        self.season_length = season_length
+        self.model: Optional[HoltWinters] = None
+        self.series: list = []
+        self.last_day: Optional[pd.Timestamp] = None
+        self._fitted_days: Optional[pd.DataFrame] = None
+        self._file_state = None
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return self.path.exists()
+
+    def forecast(self, horizon: Optional[int] = None) -> pd.DataFrame:
+        with stage("local_forecast"), self._lock:
+            self._refresh()
+            horizon = horizon or self.horizon
+            mean, lower, upper = self.model.forecast(horizon, self.confidence)
+        periods = pd.date_range(self.last_day + pd.Timedelta(days=1), periods=horizon, freq="D")
+        frame = pd.DataFrame(
+            {
+                "zone_id": np.repeat(np.asarray(self.series, dtype=object), horizon),
+                "forecast_timestamp": np.tile(periods.strftime("%Y-%m-%d %H:%M:%S+00:00"), len(self.series)),
+                "predicted_rainfall": mean.reshape(-1),
+                "lower_bound": lower.reshape(-1),
+                "upper_bound": upper.reshape(-1),
+            }
+        )
+        frame.attrs["source"] = LOCAL_FORECAST_SOURCE
+        return frame
+
+    def city_forecast(self, horizon: Optional[int] = None) -> pd.DataFrame:
+        """Forecast averaged over series per day, in the shape of the remote city-wide forecast."""
+        frame = self.forecast(horizon)
+        city = frame.groupby("forecast_timestamp", sort=True)[["predicted_rainfall", "lower_bound", "upper_bound"]].mean().reset_index()
+        city.attrs["source"] = LOCAL_FORECAST_SOURCE
+        return city
+
+    def zone_forecast(self, horizon: Optional[int] = None) -> pd.DataFrame:
+        """Per-zone rows when the history is per zone, otherwise the city-wide forecast."""
+        frame = self.forecast(horizon)
+        if self.series == [CITY_SERIES]:
+            frame = frame.drop(columns="zone_id")
+            frame.attrs["source"] = LOCAL_FORECAST_SOURCE
+        return frame
+
+    def update(self, history: pd.DataFrame) -> None:
+        """Fold new raw rows into the model; only days after the last fitted day are applied."""
+        with self._lock:
+            self._apply(daily_totals(history), complete=False)
+
+    def _refresh(self) -> None:
+        stat = os.stat(self.path)
+        state = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if state == self._file_state and self.model is not None:
+            return
+        self._apply(daily_totals(_read_history(self.path)))
+        self._file_state = state
+
+    def _apply(self, days: pd.DataFrame, complete: bool = True) -> None:
+        """Fold daily totals into the model; ``complete`` days (the whole file) replace the fitted history."""
+        if days.empty:
+            if self.model is None:
+                raise ValueError(f"no rainfall history in {self.path}")
+            return
+        days = days.set_axis([str(name) for name in days.columns], axis=1)
+        series = list(days.columns)
+        if self.model is not None and not complete:
+            added = [name for name in series if name not in self.series]
+            if added or self._rewrites_history(days, partial=True):
+                # Partial updates extend the fitted history instead of replacing it.
+                merged = days.combine_first(self._fitted_days).reindex(columns=self.series + added)
+                self._fit(merged.asfreq("D"))
+                return
+            days = days.reindex(columns=self.series)
+        elif self.model is None or series != self.series or self._rewrites_history(days):
+            self._fit(days)
+            return
+        fresh = days[days.index > self.last_day]
+        if fresh.empty:
+            return
+        # Days with no rows between the last fit and the new data count as missing, not zero.
+        fresh = fresh.reindex(pd.date_range(self.last_day + pd.Timedelta(days=1), fresh.index[-1], freq="D"))
+        self.model.update(fresh.to_numpy())
+        self._fitted_days = pd.concat([self._fitted_days, fresh])
+        self.last_day = fresh.index[-1]
+
+    def _fit(self, days: pd.DataFrame) -> None:
+        self._fitted_days = days
+        self.model = HoltWinters(self.season_length).fit(days.to_numpy())
+        self.series, self.last_day = list(days.columns), days.index[-1]
+        logger.info("Fitted local forecaster on %d days x %d series", len(days), len(self.series))
+
+    def _rewrites_history(self, days: pd.DataFrame, partial: bool = False) -> bool:
+        """Whether ``days`` changes an already fitted value; a ``partial`` update's missing values change nothing."""
+        overlap = days.index.intersection(self._fitted_days.index)
+        shared = [name for name in days.columns if name in self._fitted_days.columns]
+        before = self._fitted_days.loc[overlap, shared].to_numpy()
+        after = days.loc[overlap, shared].to_numpy()
+        given = ~np.isnan(after) if partial else np.ones(after.shape, dtype=bool)
+        return not np.allclose(before[given], after[given], equal_nan=True)
+
+
+def _read_history(path: Path) -> pd.DataFrame:
+    columns = ["timestamp", "rainfall_mm", "zone_id"]
+    if path.suffix == ".parquet":
+        frame = pd.read_parquet(path)
+        return frame[[name for name in columns if name in frame.columns]]
+    return pd.read_csv(path, usecols=lambda name: name in columns)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Container, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.app.core.metrics import timed
+
+ROLLING_WINDOWS_HOURS: Tuple[int, ...] = (1, 6, 24)
+
+
+class GaugeIngestor:
+    """Rolling per-zone rain accumulations over fixed-size ring buffers.
+
+    Readings are summed into ``bucket_seconds`` buckets; each zone owns one row of
+    ``horizon_hours * 3600 / bucket_seconds`` slots that are reused as time moves
+    on, so memory depends on the zone count only, never on history length.
+    """
+
+    def __init__(self, bucket_seconds: int = 300, horizon_hours: int = 24, clock: Callable[[], float] = time.time) -> None:
+        if (horizon_hours * 3600) % bucket_seconds:
+            raise ValueError("horizon_hours must be a whole number of buckets")
+        self.bucket_seconds = bucket_seconds
+        self.num_slots = horizon_hours * 3600 // bucket_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._zone_index: Dict[str, int] = {}
+        self._zone_ids: List[str] = []
+        self._buckets = np.zeros((0, self.num_slots))
+        self._slot_bucket = np.full(self.num_slots, -1, dtype=np.int64)
+        self.revision = 0
+        self.readings = 0
+        self.dropped = 0
+
+    @timed("ingest_gauges")
+    def ingest(
+        self,
+        zone_ids: Iterable[str],
+        timestamps: Iterable[float],
+        rainfall_mm: Iterable[float],
+        known_zones: Optional[Container[str]] = None,
+    ) -> int:
+        """Add readings (epoch seconds, mm); returns how many fell inside the horizon.
+
+        Only readings that are kept give their zone a row, and with ``known_zones``
+        readings for any other zone are dropped, so payloads cannot grow the buffers
+        with made-up zone ids.
+        """
+        zone_ids = list(zone_ids)
+        bucket = np.floor_divide(np.asarray(list(timestamps), dtype=float), self.bucket_seconds).astype(np.int64)
+        rain = np.asarray(list(rainfall_mm), dtype=float)
+        with self._lock:
+            current = self._current_bucket()
+            bucket = np.minimum(bucket, current)
+            keep = (bucket > current - self.num_slots) & (rain >= 0)
+            if known_zones is not None:
+                keep &= np.fromiter((zone_id in known_zones for zone_id in zone_ids), dtype=bool, count=len(zone_ids))
+            kept = np.flatnonzero(keep)
+            rows = np.fromiter((self._row(zone_ids[i]) for i in kept), dtype=np.intp, count=len(kept))
+
+            bucket, rain = bucket[kept], rain[kept]
+            slots = bucket % self.num_slots
+            # A slot still holding an older bucket is recycled before new rain lands in it.
+            for slot, newest in zip(*self._newest_per_slot(slots, bucket)):
+                if self._slot_bucket[slot] < newest:
+                    self._buckets[:, slot] = 0.0
+                    self._slot_bucket[slot] = newest
+            fresh = self._slot_bucket[slots] == bucket
+            np.add.at(self._buckets, (rows[fresh], slots[fresh]), rain[fresh])
+
+            accepted = int(fresh.sum())
+            self.readings += accepted
+            self.dropped += len(zone_ids) - accepted
+            self.revision += 1
+            return accepted
+
+    def aggregates(self) -> Tuple[List[str], Dict[int, np.ndarray]]:
+        """Zone ids and their rolling rain totals (mm) for each window in hours."""
+        with self._lock:
+            current = self._current_bucket()
+            age = current - self._slot_bucket
+            buckets = self._buckets[: len(self._zone_ids)]
+            totals = {}
+            for hours in ROLLING_WINDOWS_HOURS:
+                window = min(hours * 3600 // self.bucket_seconds, self.num_slots)
+                live = (self._slot_bucket >= 0) & (age >= 0) & (age < window)
+                totals[hours] = buckets[:, live].sum(axis=1)
+            return list(self._zone_ids), totals
+
+    def state_key(self) -> Tuple[int, int]:
+        """Changes whenever aggregates may differ: new readings or a bucket rollover."""
+        return self.revision, self._current_bucket()
+
+    def _current_bucket(self) -> int:
+        return int(self._clock() // self.bucket_seconds)
+
+    def _row(self, zone_id: str) -> int:
+        row = self._zone_index.get(zone_id)
+        if row is None:
+            row = self._zone_index[zone_id] = len(self._zone_ids)
+            self._zone_ids.append(zone_id)
+            if row >= len(self._buckets):
+                grown = np.zeros((max(8, 2 * len(self._buckets)), self.num_slots))
+                grown[: len(self._buckets)] = self._buckets
+                self._buckets = grown
+        return row
+
+    @staticmethod
+    def _newest_per_slot(slots: np.ndarray, bucket: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if len(slots) == 0:
+            return slots, bucket
+        order = np.lexsort((bucket, slots))
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = slots[order][1:] != slots[order][:-1]
+        return slots[order][last], bucket[order][last]
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in kilometres; broadcasts over array inputs."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, dtype=float)) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def undirected_csr(num_nodes: int, source: np.ndarray, target: np.ndarray, weight: np.ndarray) -> csr_matrix:
+    """Symmetric CSR matrix keeping the cheapest of any parallel edges."""
+    rows = np.concatenate([source, target])
+    cols = np.concatenate([target, source])
+    data = np.concatenate([weight, weight])
+    order = np.lexsort((data, cols, rows))
+    rows, cols, data = rows[order], cols[order], data[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+    return csr_matrix((data[first], (rows[first], cols[first])), shape=(num_nodes, num_nodes))
+
+
+def topology_fingerprint(network) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for array in (network.edge_source, network.edge_target, network.base_distance):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    digest.update("\0".join(map(str, network.nodes)).encode())
+    return digest.hexdigest()
+
+
+@dataclass
+class LandmarkTable:
+    """ALT preprocessing: shortest base distances from a few landmarks to every node.
+
+    Flood penalties only add to base distances and blocking only removes edges, so
+    ``|d(L, t) - d(L, v)|`` over base distances stays a lower bound for every risk
+    state and the table never needs recomputing when weights change.
+    """
+
+    fingerprint: str
+    landmarks: np.ndarray
+    distances: np.ndarray
+
+    @classmethod
+    def build(cls, network, num_landmarks: int) -> "LandmarkTable":
+        matrix = undirected_csr(network.num_nodes, network.edge_source, network.edge_target, network.base_distance)
+        count = min(num_landmarks, network.num_nodes)
+        landmarks = np.empty(count, dtype=np.intp)
+        distances = np.empty((count, network.num_nodes))
+        nearest = np.full(network.num_nodes, np.inf)
+        candidate = 0
+        for i in range(count):
+            # Farthest-first selection; unreachable nodes seed new components first.
+            landmarks[i] = candidate
+            distances[i] = dijkstra(matrix, directed=False, indices=candidate)
+            nearest = np.minimum(nearest, distances[i])
+            spread = np.where(np.isfinite(nearest), nearest, np.finfo(float).max)
+            candidate = int(np.argmax(spread))
+        return cls(fingerprint=topology_fingerprint(network), landmarks=landmarks, distances=distances)
+
+    @classmethod
+    def load_or_build(cls, network, num_landmarks: int, path: str = "") -> "LandmarkTable":
+        fingerprint = topology_fingerprint(network)
+        if path and Path(path).exists():
+            table = cls.load(path)
+            if table is not None and table.fingerprint == fingerprint:
+                return table
+            logger.info("Landmark table at %s is stale; rebuilding", path)
+
+        table = cls.build(network, num_landmarks)
+        if path:
+            table.save(path)
+        return table
+
+    @classmethod
+    def load(cls, path: str) -> Optional["LandmarkTable"]:
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return cls(
+                    fingerprint=str(data["fingerprint"]),
+                    landmarks=data["landmarks"],
+                    distances=data["distances"],
+                )
+        except (OSError, KeyError, ValueError):
+            logger.warning("Could not read landmark table at %s", path)
+            return None
+
+    def save(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as handle:
+            np.savez(handle, fingerprint=np.array(self.fingerprint), landmarks=self.landmarks, distances=self.distances)
+
+    def lower_bounds(self, target: int) -> np.ndarray:
+        """Lower bound on the distance from every node to ``target``."""
+        if len(self.landmarks) == 0:
+            return np.zeros(self.distances.shape[1])
+        with np.errstate(invalid="ignore"):
+            bounds = np.abs(self.distances[:, target][:, None] - self.distances)
+        bounds[~np.isfinite(bounds)] = 0.0
+        return bounds.max(axis=0)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import importlib.util
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from backend.app.core.config import get_settings
+from backend.app.core.metrics import metrics, stage
+
+logger = logging.getLogger(__name__)
+
+MODEL_FEATURES = ("rainfall_mm", "soil_moisture", "drain_capacity")
+MODEL_DIR = Path(__file__).resolve().parents[3] / "ml_models" / "saved_models"
+DEFAULT_MODEL_PATH = MODEL_DIR / "rf_flood_model.npz"
+COMPACT_FORMAT_VERSION = 1
+# Rows scored per pass through CompactForest; bounds the (rows x trees) node-index array.
+PREDICT_CHUNK_ROWS = 8192
+# Feature resolution for memoisation: 1 mm of rain, 1 % soil moisture, 1 unit of drain capacity.
+DEFAULT_QUANTUM = (1.0, 1.0, 1.0)
+MAX_MEMO_ENTRIES = 200_000
+
+HEURISTIC_SCORER = "heuristic"
+MODEL_SCORER = "model"
+
+
+class ModelScorer:
+    """Flood probabilities from the trained classifier, batched and memoised.
+
+    The model is loaded on first use (or by ``warm``), so importing this module
+    never pulls in scikit-learn. Feature rows are snapped to ``quantum`` and only
+    rows not seen before reach ``predict_proba``, all in a single call however
+    many zones and scenarios were asked for.
+    """
+
+    name = MODEL_SCORER
+
+    def __init__(self, path: str = "", model: Any = None, quantum: Tuple[float, ...] = DEFAULT_QUANTUM, max_entries: int = MAX_MEMO_ENTRIES) -> None:
+        self.path = Path(path) if path else DEFAULT_MODEL_PATH
+        self.quantum = np.asarray(quantum, dtype=float)
+        self.max_entries = max_entries
+        self._model = model
+        self._positive_column: Optional[int] = None
+        self._load_lock = threading.Lock()
+        self._memo_lock = threading.Lock()
+        self._memo: Dict[bytes, float] = {}
+        self.hits = metrics.counter("flood_model_memo_hits_total", "Feature rows answered from the model memo")
+        self.misses = metrics.counter("flood_model_memo_misses_total", "Feature rows sent to predict_proba")
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._model = load_model(self.path)
+        return self._model
+
+    def warm(self) -> None:
+        self.model
+
+    def features(self, rainfall_mm, soil_moisture, drain_capacity) -> np.ndarray:
+        """Stack broadcastable feature arrays into ``(..., 3)`` in MODEL_FEATURES order."""
+        return np.stack(np.broadcast_arrays(rainfall_mm, soil_moisture, drain_capacity), axis=-1).astype(float)
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """P(flood) for a ``(..., 3)`` feature array, one ``predict_proba`` call for all unseen rows."""
+        features = np.asarray(features, dtype=float)
+        shape = features.shape[:-1]
+        flat = features.reshape(-1, len(MODEL_FEATURES))
+        if len(flat) == 0:
+            return np.empty(shape)
+        codes = np.round(flat / self.quantum).astype(np.int64)
+        unique, inverse = np.unique(codes, axis=0, return_inverse=True)
+        keys = [row.tobytes() for row in unique]
+
+        probability = np.empty(len(unique))
+        with self._memo_lock:
+            cached = [self._memo.get(key) for key in keys]
+        missing = np.fromiter((value is None for value in cached), dtype=bool, count=len(cached))
+        if (~missing).any():
+            probability[~missing] = [value for value in cached if value is not None]
+        self.hits.inc(int((~missing).sum()))
+
+        if missing.any():
+            self.misses.inc(int(missing.sum()))
+            with stage("model_predict"):
+                probability[missing] = self._predict_positive(unique[missing] * self.quantum)
+            with self._memo_lock:
+                if len(self._memo) + int(missing.sum()) > self.max_entries:
+                    self._memo.clear()
+                self._memo.update(zip((key for key, miss in zip(keys, missing) if miss), probability[missing].tolist()))
+        return probability[inverse.reshape(-1)].reshape(shape)
+
+    def _predict_positive(self, rows: np.ndarray) -> np.ndarray:
+        model = self.model
+        if self._positive_column is None:
+            classes = list(getattr(model, "classes_", [0, 1]))
+            self._positive_column = classes.index(1) if 1 in classes else len(classes) - 1
+        return np.asarray(model.predict_proba(_model_input(model, rows)))[:, self._positive_column]
+
+    def clear(self) -> None:
+        with self._memo_lock:
+            self._memo.clear()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Shipped to worker processes without locks, counters or the memo; the model travels if already loaded.
+        return {name: value for name, value in vars(self).items() if name not in ("_load_lock", "_memo_lock", "_memo", "hits", "misses")}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["path"], state["_model"], tuple(state["quantum"]), state["max_entries"])
+        self._positive_column = state["_positive_column"]
+
+
+class CompactForest:
+    """Tree ensemble flattened into NumPy node arrays, saved as a plain ``.npz``.
+
+    Every tree's nodes live in shared ``feature``/``threshold``/``left``/``right``
+    arrays with absolute child indices. Leaves point at themselves with an
+    infinite threshold, so ``predict_proba`` walks all trees for a batch of rows
+    in ``depth`` vectorised steps. Loading needs neither pickle nor scikit-learn.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, depth: int, classes, feature_names) -> None:
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.intp)
+        self.right = np.asarray(right, dtype=np.intp)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.depth = int(depth)
+        self.classes_ = np.asarray(classes)
+        self.feature_names = tuple(str(name) for name in feature_names)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompactForest":
+        """Flatten a fitted RandomForestClassifier (or anything with ``estimators_`` of decision trees)."""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left < 0
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+            counts = tree.value[:, 0, :]
+            values.append(counts / np.maximum(counts.sum(axis=1, keepdims=True), 1e-12))
+            roots.append(offset)
+            offset += tree.node_count
+            depth = max(depth, tree.max_depth)
+        names = getattr(model, "feature_names_in_", MODEL_FEATURES)
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts), np.concatenate(rights),
+            np.concatenate(values), roots, depth, model.classes_, names,
+        )
+
+    def predict_proba(self, rows) -> np.ndarray:
+        # scikit-learn compares float32 inputs against float64 thresholds; match it exactly.
+        rows = np.asarray(rows, dtype=np.float32)
+        out = np.empty((len(rows), self.value.shape[1]))
+        for start in range(0, len(rows), PREDICT_CHUNK_ROWS):
+            chunk = rows[start : start + PREDICT_CHUNK_ROWS]
+            node = np.broadcast_to(self.roots, (len(chunk), self.n_trees))
+            sample = np.arange(len(chunk))[:, None]
+            for _ in range(self.depth):
+                go_left = chunk[sample, self.feature[node]] <= self.threshold[node]
+                node = np.where(go_left, self.left[node], self.right[node])
+            out[start : start + len(chunk)] = self.value[node].mean(axis=1)
+        return out
+
+    def save(self, path) -> None:
+        np.savez(
+            path,
+            version=np.array(COMPACT_FORMAT_VERSION),
+            feature=self.feature.astype(np.int32),
+            threshold=self.threshold,
+            left=self.left.astype(np.int32),
+            right=self.right.astype(np.int32),
+            value=self.value.astype(np.float32),
+            roots=self.roots.astype(np.int32),
+            depth=np.array(self.depth),
+            classes=self.classes_,
+            feature_names=np.array(self.feature_names),
+        )
+
+    @classmethod
+    def load(cls, path) -> "CompactForest":
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["version"])
+            if version != COMPACT_FORMAT_VERSION:
+                raise ValueError(f"unsupported compact model version {version} in {path}")
+            return cls(
+                data["feature"], data["threshold"], data["left"], data["right"], data["value"],
+                data["roots"], int(data["depth"]), data["classes"], data["feature_names"].tolist(),
+            )
+
+
+def _model_input(model, rows: np.ndarray):
+    # Estimators fitted on a DataFrame warn on bare arrays; give them the names they were fitted with.
+    names = getattr(model, "feature_names_in_", None)
+    if names is None:
+        return rows
+    import pandas as pd
+
+    return pd.DataFrame(rows, columns=list(names))
+
+
+def load_model(path: Path) -> Any:
+    """A ``CompactForest`` for ``.npz`` exports, otherwise a joblib pickle."""
+    logger.info("Loading flood model from %s", path)
+    with stage("model_load"):
+        if Path(path).suffix == ".npz":
+            return CompactForest.load(path)
+        import joblib
+
+        return joblib.load(path)
+
+
+def build_scorer(name: str = "", path: str = "") -> Optional[ModelScorer]:
+    """Scorer for the configured backend; None selects RiskEngine's built-in heuristic."""
+    settings = get_settings()
+    name = (name or settings.risk_scorer).lower()
+    if name == HEURISTIC_SCORER:
+        return None
+    if name != MODEL_SCORER:
+        raise ValueError(f"unknown risk scorer {name!r}; expected {HEURISTIC_SCORER!r} or {MODEL_SCORER!r}")
+    scorer = ModelScorer(path or settings.flood_model_path)
+    if scorer.path.suffix != ".npz" and importlib.util.find_spec("joblib") is None:  # pragma: no cover - optional dependency fallback for offline environments
+        logger.warning("joblib is not installed; using the heuristic scorer")
+        return None
+    if not scorer.path.exists():
+        logger.warning("Flood model %s not found; using the heuristic scorer", scorer.path)
+        return None
+    return scorer
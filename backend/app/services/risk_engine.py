@@ -1,43 +1,402 @@
 from __future__ import annotations
 
+import copy
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional
+
 import numpy as np
 import pandas as pd
 
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from backend.app.services.model_service import ModelScorer
+
+RAINFALL_WEIGHT = 0.5
+ELEVATION_WEIGHT = 0.2
+DRAINAGE_WEIGHT = 0.3
+
+RISK_LEVELS = np.array(["LOW", "MEDIUM", "HIGH", "CRITICAL"], dtype=object)
+RISK_BINS = np.array([0.25, 0.5, 0.75])
+
+ZONE_COLUMNS = ["elevation", "drainage_capacity", "population_density", "road_importance_score"]
+# Optional zones-table column fed to the flood classifier; zones without it use DEFAULT_SOIL_MOISTURE_PCT.
+SOIL_MOISTURE_COLUMN = "soil_moisture"
+DEFAULT_SOIL_MOISTURE_PCT = 60.0
+OUTPUT_COLUMNS = [
+    "zone_id",
+    "predicted_rainfall",
+    "flood_probability",
+    "risk_level",
+    "estimated_water_depth",
+    "population_density",
+    "road_importance_score",
+]
+
+
+def risk_codes(probability: np.ndarray) -> np.ndarray:
+    """Index into RISK_LEVELS using right-closed bins, matching ``pd.cut``."""
+    return np.searchsorted(RISK_BINS, probability, side="left")
+
+
+@dataclass
+class ScenarioBatch:
+    """Zone risk for many rainfall multipliers, as (scenarios x zones) arrays."""
+
+    multipliers: np.ndarray
+    zone_ids: np.ndarray
+    predicted_rainfall: np.ndarray
+    flood_probability: np.ndarray
+    risk_code: np.ndarray
+    estimated_water_depth: np.ndarray
+
+    @property
+    def risk_level(self) -> np.ndarray:
+        return RISK_LEVELS[self.risk_code]
+
+
+class RiskEngine:
+    """Stateful zone-risk model that keeps per-zone terms in contiguous arrays.
+
+    Static terms (elevation and drainage inverses) are computed once per zone row;
+    forecast, multiplier and zone-row changes only touch the outputs they affect.
+
+    With a ``scorer`` (see ``model_service.ModelScorer``) flood probabilities come
+    from the trained classifier instead of the min-max normalised heuristic score;
+    risk levels and water depth are derived the same way for both.
+    """
+
+    def __init__(self, scorer: Optional["ModelScorer"] = None) -> None:
+        self.scorer = scorer
+        self.zone_ids = np.empty(0, dtype=object)
+        self._index: Dict[str, int] = {}
+        self.elevation = np.empty(0)
+        self.drainage_capacity = np.empty(0)
+        self.population_density = np.empty(0)
+        self.road_importance_score = np.empty(0)
+        self.static_score = np.empty(0)
+        self.soil_moisture = np.empty(0)
+
+        self.base_rainfall = 0.0
+        self._zone_forecasts: Dict[str, float] = {}
+        self.forecast_rainfall = np.empty(0)
+        self.rainfall_multiplier = 1.0
+        self.observed_rainfall = np.empty(0)
+        self.zone_rainfall = np.empty(0)
+        self._uniform_rainfall = True
+        self._scored_uniform = True
+
+        self.predicted_rainfall = np.empty(0)
+        self.raw_score = np.empty(0)
+        self.flood_probability = np.empty(0)
+        self.risk_code = np.empty(0, dtype=np.intp)
+        self.estimated_water_depth = np.empty(0)
+        self.version = 0
+
+        self._zones_source: Optional[pd.DataFrame] = None
+        self._forecast_source: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_frames(
+        cls, zones_df: pd.DataFrame, forecast_df: pd.DataFrame, rainfall_multiplier: float = 1.0, scorer: Optional["ModelScorer"] = None
+    ) -> "RiskEngine":
+        engine = cls(scorer)
+        engine.load_zones(zones_df)
+        engine.set_forecast(forecast_df)
+        engine.set_multiplier(rainfall_multiplier)
+        return engine
+
+    def set_scorer(self, scorer: Optional["ModelScorer"]) -> None:
+        self.scorer = scorer
+        self._recompute_all()
+
+    def __len__(self) -> int:
+        return len(self.zone_ids)
+
+    def index_of(self, zone_id: str) -> Optional[int]:
+        return self._index.get(zone_id)
+
+    def load_zones(self, zones_df: pd.DataFrame) -> None:
+        previous_observed = dict(zip(self.zone_ids, self.observed_rainfall))
+        self.zone_ids = zones_df["zone_id"].astype(str).to_numpy(dtype=object)
+        self._index = {zone_id: i for i, zone_id in enumerate(self.zone_ids)}
+        values = zones_df[ZONE_COLUMNS].to_numpy(dtype=float)
+        self.elevation = np.array(values[:, 0], order="C")
+        self.drainage_capacity = np.array(values[:, 1], order="C")
+        self.population_density = np.array(values[:, 2], order="C")
+        self.road_importance_score = np.array(values[:, 3], order="C")
+        self.static_score = self._static_terms(values[:, 0], values[:, 1])
+        self.soil_moisture = self._soil_moisture(zones_df)
+        self.observed_rainfall = np.array([previous_observed.get(zone_id, np.nan) for zone_id in self.zone_ids], dtype=float)
+        self.forecast_rainfall = self._forecast_array()
+        self.zone_rainfall = np.fmax(self.forecast_rainfall, self.observed_rainfall)
+        self._uniform_rainfall = bool(np.all(self.zone_rainfall == self.zone_rainfall[:1]))
+        self._zones_source = zones_df
+        self._recompute_all()
+
+    def update_zones(self, rows: pd.DataFrame) -> None:
+        """Apply changed or new zone rows without touching unchanged zones."""
+        ids = rows["zone_id"].astype(str).to_numpy(dtype=object)
+        known = np.array([zone_id in self._index for zone_id in ids], dtype=bool)
+        if not known.all():
+            merged = pd.concat([self._zones_frame(), rows], ignore_index=True).drop_duplicates("zone_id", keep="last")
+            self.load_zones(merged)
+            return
+
+        idx = np.fromiter((self._index[zone_id] for zone_id in ids), dtype=np.intp, count=len(ids))
+        values = rows[ZONE_COLUMNS].to_numpy(dtype=float)
+        self.elevation[idx] = values[:, 0]
+        self.drainage_capacity[idx] = values[:, 1]
+        self.population_density[idx] = values[:, 2]
+        self.road_importance_score[idx] = values[:, 3]
+        self.static_score[idx] = self._static_terms(values[:, 0], values[:, 1])
+        if SOIL_MOISTURE_COLUMN in rows.columns:
+            self.soil_moisture[idx] = self._soil_moisture(rows)
+        self._zones_source = None
+        self._rescore(idx)
+        self._update_depth(idx)
+        self.version += 1
+
+    def remove_zones(self, zone_ids) -> None:
+        keep = ~np.isin(self.zone_ids, list(zone_ids))
+        self.load_zones(self._zones_frame()[keep])
+
+    def sync_zones(self, zones_df: pd.DataFrame) -> None:
+        """Bring the engine in line with a full zones table, diffing row by row."""
+        if zones_df is self._zones_source:
+            return
+        ids = zones_df["zone_id"].astype(str).to_numpy(dtype=object)
+        if len(ids) != len(self.zone_ids) or not np.array_equal(ids, self.zone_ids):
+            self.load_zones(zones_df)
+            return
+
+        current = self._zones_frame()[ZONE_COLUMNS].to_numpy(dtype=float)
+        changed = (zones_df[ZONE_COLUMNS].to_numpy(dtype=float) != current).any(axis=1)
+        if SOIL_MOISTURE_COLUMN in zones_df.columns:
+            changed |= self._soil_moisture(zones_df) != self.soil_moisture
+        if changed.any():
+            self.update_zones(zones_df[changed])
+        self._zones_source = zones_df
+
+    def set_forecast(self, forecast_df: pd.DataFrame) -> None:
+        """Use a forecast's average rainfall; per-zone forecasts (a ``zone_id`` column) apply per zone.
+
+        Zones missing from a per-zone forecast fall back to the average over all rows.
+        """
+        if forecast_df is self._forecast_source:
+            return
+        self._forecast_source = forecast_df
+        if "zone_id" in forecast_df.columns:
+            means = forecast_df.groupby(forecast_df["zone_id"].astype(str))["predicted_rainfall"].mean()
+            self._zone_forecasts = dict(zip(means.index, means.to_numpy(dtype=float)))
+        else:
+            self._zone_forecasts = {}
+        self.base_rainfall = float(forecast_df["predicted_rainfall"].mean())
+        self.forecast_rainfall = self._forecast_array()
+        self._refresh_zone_rainfall()
+
+    def set_base_rainfall(self, rainfall_mm: float) -> None:
+        if rainfall_mm == self.base_rainfall and not self._zone_forecasts:
+            return
+        self.base_rainfall = rainfall_mm
+        self._zone_forecasts = {}
+        self.forecast_rainfall = self._forecast_array()
+        self._refresh_zone_rainfall()
+
+    def set_observed_rainfall(self, zone_ids, rainfall_mm) -> None:
+        """Record observed rain (mm over the forecast period) for the given zones.
+
+        A zone's rainfall is the larger of the forecast average and its observation,
+        so gauges can only raise risk above the forecast. Unknown zones are ignored.
+        """
+        positions = np.fromiter((self._index.get(zone_id, -1) for zone_id in zone_ids), dtype=np.intp)
+        values = np.asarray(rainfall_mm, dtype=float)
+        known = positions >= 0
+        self.observed_rainfall[positions[known]] = values[known]
+        self._refresh_zone_rainfall()
+
+    def _forecast_array(self) -> np.ndarray:
+        if not self._zone_forecasts:
+            return np.full(len(self.zone_ids), self.base_rainfall)
+        return np.array([self._zone_forecasts.get(zone_id, self.base_rainfall) for zone_id in self.zone_ids], dtype=float)
+
+    def _refresh_zone_rainfall(self) -> None:
+        rainfall = np.fmax(self.forecast_rainfall, self.observed_rainfall)
+        if len(rainfall) == len(self.zone_rainfall) and np.array_equal(rainfall, self.zone_rainfall):
+            return
+        self.zone_rainfall = rainfall
+        self._uniform_rainfall = bool(np.all(rainfall == rainfall[:1]))
+        self._on_rainfall_changed()
+
+    def set_multiplier(self, rainfall_multiplier: float) -> None:
+        if rainfall_multiplier == self.rainfall_multiplier:
+            return
+        self.rainfall_multiplier = rainfall_multiplier
+        self._on_rainfall_changed()
+
+    @property
+    def risk_level(self) -> np.ndarray:
+        return RISK_LEVELS[self.risk_code]
+
+    def evaluate_scenarios(self, multipliers) -> ScenarioBatch:
+        """Score every multiplier against the current state in one broadcast."""
+        multipliers = np.asarray(multipliers, dtype=float).reshape(-1)
+        return self._score_batch(multipliers, multipliers[:, None] * self.zone_rainfall[None, :])
+
+    def evaluate_forecasts(self, forecast_rainfall: np.ndarray, rainfall_multiplier: float = 1.0) -> ScenarioBatch:
+        """Score alternative per-zone forecasts (members x zones), keeping gauge observations as a floor."""
+        forecast_rainfall = np.asarray(forecast_rainfall, dtype=float)
+        rainfall = np.fmax(forecast_rainfall, self.observed_rainfall[None, :]) * rainfall_multiplier
+        return self._score_batch(np.full(len(rainfall), float(rainfall_multiplier)), rainfall)
+
+    def detached(self) -> "RiskEngine":
+        """Copy of the current state that later updates cannot touch, without the source frames.
+
+        Small enough to pickle into worker processes for ``evaluate_forecasts``.
+        """
+        engine = copy.copy(self)
+        for name, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                setattr(engine, name, value.copy())
+        engine._index = dict(self._index)
+        engine._zones_source = engine._forecast_source = None
+        return engine
+
+    def _score_batch(self, multipliers: np.ndarray, rainfall: np.ndarray) -> ScenarioBatch:
+        depth = np.clip(rainfall - self.drainage_capacity[None, :], 0.0, None) / 10.0
+        if self.scorer is not None:
+            probability = self.scorer.predict(self._features(rainfall))
+            return ScenarioBatch(multipliers, self.zone_ids, rainfall, probability, risk_codes(probability), depth)
+        raw = RAINFALL_WEIGHT * rainfall + self.static_score[None, :]
+        if raw.shape[1]:
+            min_score = raw.min(axis=1, keepdims=True)
+            span = raw.max(axis=1, keepdims=True) - min_score
+        else:
+            min_score = span = np.zeros((len(multipliers), 1))
+        flat = span < 1e-9
+        probability = np.where(flat, 0.0, (raw - min_score) / np.where(flat, 1.0, span))
+        return ScenarioBatch(
+            multipliers=multipliers,
+            zone_ids=self.zone_ids,
+            predicted_rainfall=rainfall,
+            flood_probability=probability,
+            risk_code=risk_codes(probability),
+            estimated_water_depth=depth,
+        )
+
+    def depth_threshold_multipliers(self, depth_cm: float) -> np.ndarray:
+        """Smallest multiplier above which each zone's water depth exceeds ``depth_cm``.
+
+        Zones with no rainfall never cross the threshold and get ``inf``.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            threshold = (self.drainage_capacity + depth_cm * 10.0) / self.zone_rainfall
+        return np.where(self.zone_rainfall > 0, threshold, np.inf)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "zone_id": self.zone_ids.copy(),
+                "predicted_rainfall": self.predicted_rainfall.copy(),
+                "flood_probability": self.flood_probability.copy(),
+                "risk_level": self.risk_level,
+                "estimated_water_depth": self.estimated_water_depth.copy(),
+                "population_density": self.population_density.copy(),
+                "road_importance_score": self.road_importance_score.copy(),
+            },
+            columns=OUTPUT_COLUMNS,
+        )
+
+    @staticmethod
+    def _static_terms(elevation: np.ndarray, drainage_capacity: np.ndarray) -> np.ndarray:
+        elevation_inverse = 1.0 / np.clip(elevation, 0.5, None)
+        drainage_inverse = 1.0 / np.clip(drainage_capacity, 1, None)
+        return np.ascontiguousarray(ELEVATION_WEIGHT * elevation_inverse + DRAINAGE_WEIGHT * drainage_inverse)
+
+    @staticmethod
+    def _soil_moisture(zones_df: pd.DataFrame) -> np.ndarray:
+        if SOIL_MOISTURE_COLUMN not in zones_df.columns:
+            return np.full(len(zones_df), DEFAULT_SOIL_MOISTURE_PCT)
+        values = pd.to_numeric(zones_df[SOIL_MOISTURE_COLUMN], errors="coerce").to_numpy(dtype=float)
+        return np.where(np.isnan(values), DEFAULT_SOIL_MOISTURE_PCT, values)
+
+    def _features(self, rainfall: np.ndarray, idx: Optional[np.ndarray] = None) -> np.ndarray:
+        """Classifier inputs for ``rainfall`` (zones on the last axis), optionally for a subset of zones."""
+        soil = self.soil_moisture if idx is None else self.soil_moisture[idx]
+        drainage = self.drainage_capacity if idx is None else self.drainage_capacity[idx]
+        return self.scorer.features(rainfall, soil, drainage)
+
+    def _zones_frame(self) -> pd.DataFrame:
+        if self._zones_source is not None:
+            return self._zones_source
+        return pd.DataFrame(
+            {
+                "zone_id": self.zone_ids,
+                "elevation": self.elevation,
+                "drainage_capacity": self.drainage_capacity,
+                "population_density": self.population_density,
+                "road_importance_score": self.road_importance_score,
+                SOIL_MOISTURE_COLUMN: self.soil_moisture,
+            }
+        )
+
+    def _on_rainfall_changed(self) -> None:
+        self.predicted_rainfall = self.zone_rainfall * self.rainfall_multiplier
+        self.raw_score = RAINFALL_WEIGHT * self.predicted_rainfall + self.static_score
+        if self.scorer is not None or not (self._uniform_rainfall and self._scored_uniform) or len(self.flood_probability) != len(self.zone_ids):
+            # A uniform rainfall term shifts every raw score equally and cancels
+            # out of the min-max normalization, so probabilities only move when
+            # rainfall differs between zones.
+            self._normalize()
+        self._update_depth()
+        self.version += 1
+
+    def _recompute_all(self) -> None:
+        self.predicted_rainfall = self.zone_rainfall * self.rainfall_multiplier
+        self.raw_score = RAINFALL_WEIGHT * self.predicted_rainfall + self.static_score
+        self._normalize()
+        self._update_depth()
+        self.version += 1
+
+    def _normalize(self) -> None:
+        self._scored_uniform = self._uniform_rainfall
+        if len(self.raw_score) == 0:
+            self.flood_probability = np.empty(0)
+            self.risk_code = np.empty(0, dtype=np.intp)
+            return
+        if self.scorer is not None:
+            self.flood_probability = self.scorer.predict(self._features(self.predicted_rainfall))
+            self.risk_code = risk_codes(self.flood_probability)
+            return
+        min_score, max_score = float(self.raw_score.min()), float(self.raw_score.max())
+        if max_score - min_score < 1e-9:
+            self.flood_probability = np.zeros(len(self.raw_score))
+        else:
+            self.flood_probability = (self.raw_score - min_score) / (max_score - min_score)
+        self.risk_code = risk_codes(self.flood_probability)
+
+    def _rescore(self, idx: np.ndarray) -> None:
+        if self.scorer is not None:
+            # Classifier probabilities are per zone, so only the changed rows are re-predicted.
+            self.raw_score[idx] = RAINFALL_WEIGHT * self.predicted_rainfall[idx] + self.static_score[idx]
+            self.flood_probability[idx] = self.scorer.predict(self._features(self.predicted_rainfall[idx], idx))
+            self.risk_code[idx] = risk_codes(self.flood_probability[idx])
+            return
+        old_min, old_max = float(self.raw_score.min()), float(self.raw_score.max())
+        self.raw_score[idx] = RAINFALL_WEIGHT * self.predicted_rainfall[idx] + self.static_score[idx]
+        new_min, new_max = float(self.raw_score.min()), float(self.raw_score.max())
+        if new_min != old_min or new_max != old_max or new_max - new_min < 1e-9:
+            self._normalize()
+            return
+        self.flood_probability[idx] = (self.raw_score[idx] - new_min) / (new_max - new_min)
+        self.risk_code[idx] = risk_codes(self.flood_probability[idx])
+
+    def _update_depth(self, idx: Optional[np.ndarray] = None) -> None:
+        if idx is None:
+            self.estimated_water_depth = np.clip(self.predicted_rainfall - self.drainage_capacity, 0.0, None) / 10.0
+            return
+        self.estimated_water_depth[idx] = np.clip(self.predicted_rainfall[idx] - self.drainage_capacity[idx], 0.0, None) / 10.0
+
 
-def compute_zone_risk(zones_df: pd.DataFrame, forecast_df: pd.DataFrame, rainfall_multiplier: float = 1.0) -> pd.DataFrame:
-    avg_rainfall = float(forecast_df["predicted_rainfall"].mean()) * rainfall_multiplier
-
-    df = zones_df.copy()
-    df["predicted_rainfall"] = avg_rainfall
-    df["drainage_capacity_inverse"] = 1.0 / df["drainage_capacity"].clip(lower=1)
-    raw_score = (
-        (df["predicted_rainfall"] * 0.5)
-        + ((1.0 / df["elevation"].clip(lower=0.5)) * 0.2)
-        + (df["drainage_capacity_inverse"] * 0.3)
-    )
-
-    min_score, max_score = float(raw_score.min()), float(raw_score.max())
-    if max_score - min_score < 1e-9:
-        df["flood_probability"] = 0.0
-    else:
-        df["flood_probability"] = (raw_score - min_score) / (max_score - min_score)
-
-    df["risk_level"] = pd.cut(
-        df["flood_probability"],
-        bins=[-np.inf, 0.25, 0.5, 0.75, np.inf],
-        labels=["LOW", "MEDIUM", "HIGH", "CRITICAL"],
-    ).astype(str)
-
-    water_depth_mm = (df["predicted_rainfall"] - df["drainage_capacity"]).clip(lower=0.0)
-    df["estimated_water_depth"] = water_depth_mm / 10.0
-    return df[
-        [
-            "zone_id",
-            "predicted_rainfall",
-            "flood_probability",
-            "risk_level",
-            "estimated_water_depth",
-            "population_density",
-            "road_importance_score",
-        ]
-    ]
+def compute_zone_risk(
+    zones_df: pd.DataFrame, forecast_df: pd.DataFrame, rainfall_multiplier: float = 1.0, scorer: Optional["ModelScorer"] = None
+) -> pd.DataFrame:
+    return RiskEngine.from_frames(zones_df, forecast_df, rainfall_multiplier=rainfall_multiplier, scorer=scorer).to_frame()
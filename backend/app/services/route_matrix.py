@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Sequence
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from backend.app.core.metrics import timed
+from backend.app.services.routing_service import FloodGraph
+
+LOCAL_TRAVEL_KM = 1.0
+MAX_CACHED_VERSIONS = 4
+
+
+class RouteMatrixService:
+    """Road distances between node sets over the usable (unblocked) road graph.
+
+    Each call runs one multi-source Dijkstra for the sources it has not seen at the
+    current graph version; rows are cached per ``FloodGraph.version``.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rows: "OrderedDict[int, Dict[int, np.ndarray]]" = OrderedDict()
+
+    @timed("route_matrix")
+    def distances_km(self, graph: FloodGraph, sources: Sequence[int], targets: Sequence[int]) -> np.ndarray:
+        """(len(sources) x len(targets)) km; ``inf`` where no open road connects them."""
+        sources = np.asarray(sources, dtype=np.intp)
+        targets = np.asarray(targets, dtype=np.intp)
+        if len(sources) == 0 or len(targets) == 0:
+            return np.zeros((len(sources), len(targets)))
+
+        # The graph is undirected, so run Dijkstra from whichever side has fewer nodes.
+        if len(np.unique(targets)) < len(np.unique(sources)):
+            return self.distances_km(graph, targets, sources).T
+
+        rows = self._source_rows(graph, np.unique(sources))
+        unique, inverse = np.unique(sources, return_inverse=True)
+        table = np.stack([rows[node] for node in unique])
+        km = table[inverse][:, targets]
+        km[km == 0] = LOCAL_TRAVEL_KM
+        return km
+
+    def _source_rows(self, graph: FloodGraph, sources: np.ndarray) -> Dict[int, np.ndarray]:
+        with self._lock:
+            rows = self._rows.get(graph.version)
+            if rows is None:
+                rows = self._rows[graph.version] = {}
+                if len(self._rows) > MAX_CACHED_VERSIONS:
+                    self._rows.popitem(last=False)
+            else:
+                self._rows.move_to_end(graph.version)
+            missing = [int(node) for node in sources if int(node) not in rows]
+
+        if missing:
+            computed = dijkstra(graph.matrix(weight="base"), directed=False, indices=missing)
+            with self._lock:
+                rows.update(zip(missing, computed))
+        return {int(node): rows[int(node)] for node in sources}
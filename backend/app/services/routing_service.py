@@ -1,62 +1,668 @@
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+import hashlib
+import heapq
+import math
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
 
-import networkx as nx
+import numpy as np
 import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+
+from backend.app.core.config import get_settings
+from backend.app.core.metrics import timed
+from backend.app.services.landmarks import EARTH_RADIUS_KM, LandmarkTable, haversine_km, undirected_csr
+
+BLOCKED_DEPTH_CM = 20.0
+MAX_CACHED_STATES = 8
+MAX_CACHED_ROUTES = 1024
+# Sources per multi-source Dijkstra call in batch routing; bounds the (sources x nodes) tables.
+MAX_TREE_SOURCES = 32
+# Weight increase for roads on an already-found route when searching for alternatives.
+ALTERNATIVE_PENALTY = 0.5
+# Searches per requested alternative before giving up on finding more distinct routes.
+ALTERNATIVE_ATTEMPTS = 3
+
+DEFAULT_EDGES: List[Tuple[str, str, float]] = [
+    ("T_Nagar", "Guindy", 7.0),
+    ("T_Nagar", "Saidapet", 4.5),
+    ("Saidapet", "Guindy", 3.0),
+    ("Guindy", "Velachery", 6.0),
+    ("Saidapet", "Velachery", 8.0),
+    ("Velachery", "Adyar", 5.5),
+    ("Guindy", "Adyar", 5.0),
+]
+
+DEFAULT_NODE_COORDINATES: Dict[str, Tuple[float, float]] = {
+    "T_Nagar": (13.0418, 80.2341),
+    "Guindy": (13.0067, 80.2206),
+    "Velachery": (12.9815, 80.2180),
+    "Saidapet": (13.0213, 80.2231),
+    "Adyar": (13.0012, 80.2565),
+}
+
+
+@dataclass
+class RoadNetwork:
+    """Static road topology stored as edge arrays plus an undirected CSR adjacency."""
+
+    nodes: np.ndarray
+    node_zone: np.ndarray
+    edge_source: np.ndarray
+    edge_target: np.ndarray
+    base_distance: np.ndarray
+    latitude: Optional[np.ndarray] = None
+    longitude: Optional[np.ndarray] = None
+    indptr: np.ndarray = field(init=False)
+    indices: np.ndarray = field(init=False)
+    edge_ids: np.ndarray = field(init=False)
+    heads: np.ndarray = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.node_index: Dict[str, int] = {node: i for i, node in enumerate(self.nodes)}
+        if self.latitude is None or self.longitude is None:
+            self.latitude = np.full(self.num_nodes, np.nan)
+            self.longitude = np.full(self.num_nodes, np.nan)
+        heads = np.concatenate([self.edge_source, self.edge_target])
+        tails = np.concatenate([self.edge_target, self.edge_source])
+        edge_ids = np.concatenate([np.arange(self.num_edges), np.arange(self.num_edges)])
+        order = np.argsort(heads, kind="stable")
+        self.heads = heads[order]
+        self.indices = tails[order]
+        self.edge_ids = edge_ids[order]
+        self.indptr = np.zeros(self.num_nodes + 1, dtype=np.intp)
+        np.cumsum(np.bincount(heads, minlength=self.num_nodes), out=self.indptr[1:])
+
+    @classmethod
+    def from_edges(
+        cls,
+        edges: Sequence[Tuple[str, str, float]],
+        node_zone: Optional[Dict[str, str]] = None,
+        coordinates: Optional[Dict[str, Tuple[float, float]]] = None,
+    ) -> "RoadNetwork":
+        names = list(dict.fromkeys(name for source, target, _ in edges for name in (source, target)))
+        index = {name: i for i, name in enumerate(names)}
+        zone_of = node_zone or {}
+        coords = np.array([(coordinates or {}).get(name, (np.nan, np.nan)) for name in names], dtype=float).reshape(-1, 2)
+        return cls(
+            nodes=np.array(names, dtype=object),
+            node_zone=np.array([zone_of.get(name, name) for name in names], dtype=object),
+            edge_source=np.fromiter((index[source] for source, _, _ in edges), dtype=np.intp, count=len(edges)),
+            edge_target=np.fromiter((index[target] for _, target, _ in edges), dtype=np.intp, count=len(edges)),
+            base_distance=np.fromiter((distance for _, _, distance in edges), dtype=float, count=len(edges)),
+            latitude=coords[:, 0],
+            longitude=coords[:, 1],
+        )
+
+    @classmethod
+    def from_csv(cls, path: str, nodes_path: str = "") -> "RoadNetwork":
+        """Load ``source,target,distance_km`` edges and optional ``node_id,latitude,longitude[,zone_id]`` nodes."""
+        df = pd.read_csv(path, dtype={"source": str, "target": str})
+        edges = list(zip(df["source"], df["target"], df["distance_km"].astype(float)))
+        node_zone, coordinates = None, None
+        if nodes_path and Path(nodes_path).exists():
+            nodes = pd.read_csv(nodes_path, dtype={"node_id": str})
+            coordinates = dict(zip(nodes["node_id"], zip(nodes["latitude"].astype(float), nodes["longitude"].astype(float))))
+            if "zone_id" in nodes.columns:
+                node_zone = dict(zip(nodes["node_id"], nodes["zone_id"].astype(str)))
+        return cls.from_edges(edges, node_zone=node_zone, coordinates=coordinates)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.base_distance)
+
+    def zone_node(self, zone_id: str) -> Optional[int]:
+        """Representative road node for a zone: the node of that name, else the first node in the zone."""
+        if zone_id in self.node_index:
+            return self.node_index[zone_id]
+        matches = np.flatnonzero(self.node_zone == zone_id)
+        return int(matches[0]) if len(matches) else None
+
+    def edge_names(self, edge_ids) -> List[List[str]]:
+        return [[self.nodes[self.edge_source[e]], self.nodes[self.edge_target[e]]] for e in edge_ids]
+
+
+@dataclass
+class FloodGraph:
+    """Immutable flood-weighted view of a RoadNetwork for one risk state."""
+
+    network: RoadNetwork
+    version: int
+    weight: np.ndarray
+    blocked: np.ndarray
+    active: np.ndarray
+    blocked_edges: List[List[str]]
+    routes: "OrderedDict[Tuple[str, str], Dict]" = field(default_factory=OrderedDict)
+    _nodes: Optional[set] = field(default=None, repr=False)
+    _adjacency: Optional[Tuple[list, list, list]] = field(default=None, repr=False)
+    _components: Optional[np.ndarray] = field(default=None, repr=False)
+    _matrices: Dict[str, csr_matrix] = field(default_factory=dict, repr=False)
+
+    @property
+    def nodes(self) -> set:
+        """Nodes that still have at least one usable road, like a graph built from usable edges."""
+        if self._nodes is None:
+            net = self.network
+            used = np.zeros(net.num_nodes, dtype=bool)
+            used[net.edge_source[self.active]] = True
+            used[net.edge_target[self.active]] = True
+            self._nodes = set(net.nodes[used])
+        return self._nodes
+
+    def adjacency(self) -> Tuple[list, list, list]:
+        """CSR (indptr, indices, weights) over usable edges only, as Python lists for search loops."""
+        if self._adjacency is None:
+            net = self.network
+            usable = self.active[net.edge_ids]
+            indptr = np.zeros(net.num_nodes + 1, dtype=np.intp)
+            np.cumsum(np.bincount(net.heads[usable], minlength=net.num_nodes), out=indptr[1:])
+            self._adjacency = (
+                indptr.tolist(),
+                net.indices[usable].tolist(),
+                self.weight[net.edge_ids[usable]].tolist(),
+            )
+        return self._adjacency
+
+    def matrix(self, weight: str = "flood") -> csr_matrix:
+        """Symmetric sparse matrix of usable edges, weighted by flood cost or by base distance (km)."""
+        matrix = self._matrices.get(weight)
+        if matrix is None:
+            net = self.network
+            values = self.weight if weight == "flood" else net.base_distance
+            matrix = undirected_csr(net.num_nodes, net.edge_source[self.active], net.edge_target[self.active], values[self.active])
+            self._matrices[weight] = matrix
+        return matrix
+
+    def connected(self, source: int, target: int) -> bool:
+        if self._components is None:
+            _, self._components = connected_components(self.matrix(), directed=False)
+        return bool(self._components[source] == self._components[target])
+
+
+@dataclass
+class BlockingWindows:
+    """Per-edge time intervals (hours from ``origin``) during which the road is under water.
+
+    Stored CSR-style: edge ``e``'s windows are ``start[ptr[e]:ptr[e + 1]]`` and
+    ``end[...]``, sorted and disjoint. A window still open at the end of the
+    depth profile never closes (``end`` is ``inf``); edges without zone data on
+    both endpoints are closed throughout, as in ``RoutingEngine.reweight``.
+    """
+
+    ptr: List[int]
+    start: List[float]
+    end: List[float]
+    origin: Optional[pd.Timestamp] = None
+
+    @classmethod
+    def from_blocked(
+        cls, num_edges: int, edge_index: np.ndarray, blocked: np.ndarray, step_hours: float, origin: Optional[pd.Timestamp] = None
+    ) -> "BlockingWindows":
+        """Windows from blocked flags ``blocked`` (steps x len(edge_index)); step k covers hours [k, k + 1) * step_hours."""
+        steps = len(blocked)
+        padded = np.zeros((len(edge_index), steps + 2), dtype=np.int8)
+        padded[:, 1:-1] = blocked.T
+        change = np.diff(padded, axis=1)
+        # Rows are edges, so nonzero() yields each edge's rises and falls in time order, pairwise aligned.
+        edge, rise = np.nonzero(change == 1)
+        _, fall = np.nonzero(change == -1)
+        start = rise * step_hours
+        end = np.where(fall == steps, np.inf, fall * step_hours)
+
+        unknown = np.setdiff1d(np.arange(num_edges), edge_index, assume_unique=True)
+        edges = np.concatenate([edge_index[edge], unknown])
+        start = np.concatenate([start, np.full(len(unknown), -np.inf)])
+        end = np.concatenate([end, np.full(len(unknown), np.inf)])
+        order = np.lexsort((start, edges))
+        ptr = np.zeros(num_edges + 1, dtype=np.intp)
+        np.cumsum(np.bincount(edges, minlength=num_edges), out=ptr[1:])
+        return cls(ptr.tolist(), start[order].tolist(), end[order].tolist(), origin)
+
+    @property
+    def num_windows(self) -> int:
+        return len(self.start)
+
+    def is_blocked(self, edge: int, hours: float) -> bool:
+        lo, hi = self.ptr[edge], self.ptr[edge + 1]
+        i = bisect_right(self.end, hours, lo, hi)
+        return i < hi and self.start[i] <= hours
+
+    def entry_time(self, edge: int, hours: float, duration: float) -> float:
+        """Earliest time at or after ``hours`` to enter ``edge`` and leave it before it floods again."""
+        lo, hi = self.ptr[edge], self.ptr[edge + 1]
+        for i in range(bisect_right(self.end, hours, lo, hi), hi):
+            if hours + duration <= self.start[i]:
+                break
+            hours = self.end[i]
+        return hours
+
+
+class TargetBounds:
+    """Admissible cost-to-target estimate, max(haversine, ALT bound), worked out per node.
+
+    A* usually pushes a small part of the network, so a node's bound is computed the
+    first time the search asks for it and kept for later searches to the same target.
+    """
+
+    def __init__(self, columns: list, latitude: list, longitude: list, coordinate_scale: float, target: int, scale: float = 1.0) -> None:
+        self._columns = columns
+        self._latitude = latitude
+        self._longitude = longitude
+        self._coordinate_scale = coordinate_scale
+        self._target = columns[target] if columns else []
+        self._target_lat = latitude[target]
+        self._target_lon = longitude[target]
+        self._scale = scale
+        self._values: Dict[int, float] = {}
+
+    def __getitem__(self, node: int) -> float:
+        value = self._values.get(node)
+        if value is None:
+            value = self._bound(node) * self._scale
+            self._values[node] = value
+        return value
+
+    def _bound(self, node: int) -> float:
+        bound = 0.0
+        if self._target:
+            for to_target, to_node in zip(self._target, self._columns[node]):
+                difference = abs(to_target - to_node)
+                # Unreachable landmarks give inf or nan, which bound nothing.
+                if bound < difference < math.inf:
+                    bound = difference
+        if self._coordinate_scale > 0:
+            lat1, lat2 = self._latitude[node], self._target_lat
+            a = math.sin((lat2 - lat1) / 2.0) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((self._target_lon - self._longitude[node]) / 2.0) ** 2
+            straight = 2.0 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(max(a, 0.0), 1.0)))
+            if straight == straight:
+                bound = max(bound, straight * self._coordinate_scale)
+        return bound
 
 
 class RoutingEngine:
-    def __init__(self) -> None:
+    def __init__(self, network: Optional[RoadNetwork] = None) -> None:
+        if network is None:
+            path = get_settings().road_network_path
+            if path and Path(path).exists():
+                network = RoadNetwork.from_csv(path, get_settings().road_nodes_path)
+            else:
+                network = RoadNetwork.from_edges(DEFAULT_EDGES, coordinates=DEFAULT_NODE_COORDINATES)
+        self.network = network
+        settings = get_settings()
+        self.landmarks = LandmarkTable.load_or_build(network, settings.alt_landmarks, settings.landmarks_path)
+        self._coordinate_scale = self._admissible_coordinate_scale(network)
         self.base_edges: List[Tuple[str, str, float]] = [
-            ("T_Nagar", "Guindy", 7.0),
-            ("T_Nagar", "Saidapet", 4.5),
-            ("Saidapet", "Guindy", 3.0),
-            ("Guindy", "Velachery", 6.0),
-            ("Saidapet", "Velachery", 8.0),
-            ("Velachery", "Adyar", 5.5),
-            ("Guindy", "Adyar", 5.0),
+            (self.network.nodes[s], self.network.nodes[t], float(d))
+            for s, t, d in zip(self.network.edge_source, self.network.edge_target, self.network.base_distance)
         ]
+        self.version = 0
+        self._lock = threading.Lock()
+        self._route_lock = threading.Lock()
+        self._states: "OrderedDict[bytes, FloodGraph]" = OrderedDict()
+        self._zone_ids: Optional[np.ndarray] = None
+        self._node_zone_pos = np.full(self.network.num_nodes, -1, dtype=np.intp)
+        num_edges = self.network.num_edges
+        self._edge_probability = np.empty(num_edges)
+        self._edge_depth = np.empty(num_edges)
+        self._weight = np.empty(num_edges)
+        self._adjacency_lists: Optional[Tuple[list, list, list]] = None
+        self._bound_lists: Optional[Tuple[list, list, list]] = None
 
-    def build_graph(self, zone_risk_df: pd.DataFrame) -> tuple[nx.Graph, List[List[str]]]:
-        risk_map = zone_risk_df.set_index("zone_id").to_dict("index")
-        graph = nx.Graph()
-        blocked_edges: List[List[str]] = []
+    @timed("build_graph")
+    def build_graph(self, zone_risk_df: pd.DataFrame) -> tuple[FloodGraph, List[List[str]]]:
+        graph = self.reweight(
+            zone_risk_df["zone_id"].to_numpy(dtype=object),
+            zone_risk_df["flood_probability"].to_numpy(dtype=float),
+            zone_risk_df["estimated_water_depth"].to_numpy(dtype=float),
+        )
+        return graph, graph.blocked_edges
 
-        for source, target, base_distance in self.base_edges:
-            src = risk_map.get(source)
-            dst = risk_map.get(target)
-            if not src or not dst:
-                continue
+    def reweight(self, zone_ids: np.ndarray, flood_probability: np.ndarray, water_depth: np.ndarray) -> FloodGraph:
+        """Recompute edge weights from per-zone risk arrays, reusing an identical earlier state."""
+        net = self.network
+        with self._lock:
+            node_pos = self._zone_positions(zone_ids)
+            src_pos, dst_pos = node_pos[net.edge_source], node_pos[net.edge_target]
+            known = (src_pos >= 0) & (dst_pos >= 0)
+            # Position -1 (zone missing from the risk table) lands on the padding value.
+            probability = np.append(flood_probability, 0.0)
+            depth = np.append(water_depth, 0.0)
+            np.maximum(probability[src_pos], probability[dst_pos], out=self._edge_probability)
+            np.maximum(depth[src_pos], depth[dst_pos], out=self._edge_depth)
+            np.multiply(self._edge_probability, 100.0, out=self._weight)
+            self._weight += self._edge_depth * 50.0
+            self._weight += net.base_distance
+            blocked = known & (self._edge_depth > BLOCKED_DEPTH_CM)
+            active = known & ~blocked
+            return self._state_graph(self._weight, blocked, active)
+
+    def adopt(self, weight: np.ndarray, blocked: np.ndarray, active: np.ndarray) -> FloodGraph:
+        """FloodGraph for edge arrays computed elsewhere (e.g. a published snapshot), without reweighting."""
+        with self._lock:
+            return self._state_graph(weight, blocked, active)
+
+    def _state_graph(self, weight: np.ndarray, blocked: np.ndarray, active: np.ndarray) -> FloodGraph:
+        key = hashlib.blake2b(weight.tobytes() + active.tobytes() + blocked.tobytes(), digest_size=16).digest()
+        graph = self._states.get(key)
+        if graph is not None:
+            self._states.move_to_end(key)
+            return graph
+
+        self.version += 1
+        graph = FloodGraph(
+            network=self.network,
+            version=self.version,
+            weight=weight.copy() if weight is self._weight else weight,
+            blocked=blocked,
+            active=active,
+            blocked_edges=self.network.edge_names(np.flatnonzero(blocked)),
+        )
+        self._states[key] = graph
+        if len(self._states) > MAX_CACHED_STATES:
+            self._states.popitem(last=False)
+        return graph
+
+    def _zone_positions(self, zone_ids: np.ndarray) -> np.ndarray:
+        if self._zone_ids is None or len(self._zone_ids) != len(zone_ids) or not np.array_equal(self._zone_ids, zone_ids):
+            index = {zone_id: i for i, zone_id in enumerate(zone_ids)}
+            self._node_zone_pos = np.fromiter(
+                (index.get(zone, -1) for zone in self.network.node_zone), dtype=np.intp, count=self.network.num_nodes
+            )
+            self._zone_ids = np.array(zone_ids, dtype=object)
+        return self._node_zone_pos
+
+    def edge_zone_index(self, zone_ids) -> Tuple[List[List[str]], np.ndarray, np.ndarray]:
+        """Edges whose endpoints are both known zones, with their zone positions."""
+        known, src_pos, dst_pos = self.edge_zone_positions(zone_ids)
+        return self.network.edge_names(known), src_pos, dst_pos
 
-            flood_probability = max(src["flood_probability"], dst["flood_probability"])
-            water_depth_cm = max(src["estimated_water_depth"], dst["estimated_water_depth"])
-            weight = base_distance + (flood_probability * 100) + (water_depth_cm * 50)
+    def edge_zone_positions(self, zone_ids) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Indices of edges whose endpoints are both known zones, with their zone positions."""
+        with self._lock:
+            node_pos = self._zone_positions(np.asarray(zone_ids, dtype=object)).copy()
+        src_pos = node_pos[self.network.edge_source]
+        dst_pos = node_pos[self.network.edge_target]
+        known = np.flatnonzero((src_pos >= 0) & (dst_pos >= 0))
+        return known, src_pos[known], dst_pos[known]
 
-            if water_depth_cm > 20:
-                blocked_edges.append([source, target])
+    def with_blocked(self, graph: FloodGraph, blocked: np.ndarray) -> FloodGraph:
+        """Uncached view of ``graph`` keeping its weights but closing exactly the ``blocked`` edges.
+
+        Used to route many what-if blockage patterns without evicting the cached risk states.
+        """
+        usable = graph.active | graph.blocked
+        blocked = usable & blocked
+        return FloodGraph(
+            network=self.network,
+            version=graph.version,
+            weight=graph.weight,
+            blocked=blocked,
+            active=usable & ~blocked,
+            blocked_edges=self.network.edge_names(np.flatnonzero(blocked)),
+        )
+
+    def blocking_windows(self, zone_ids, depth_cm: np.ndarray, step_hours: float, origin: Optional[pd.Timestamp] = None) -> BlockingWindows:
+        """Per-edge flood windows from a per-zone depth series (steps x zones), e.g. ``InundationSeries.depth_cm``."""
+        edge_index, src_pos, dst_pos = self.edge_zone_positions(zone_ids)
+        flooded = np.asarray(depth_cm, dtype=float) > BLOCKED_DEPTH_CM
+        blocked = flooded[:, src_pos] | flooded[:, dst_pos]
+        return BlockingWindows.from_blocked(self.network.num_edges, edge_index, blocked, step_hours, origin)
+
+    @timed("timed_route_search")
+    def get_timed_route(self, windows: BlockingWindows, source: str, destination: str, depart_hours: float = 0.0, speed_kmph: float = 35.0) -> Dict:
+        """Earliest-arrival route when roads flood and reopen along the way.
+
+        Time-dependent A*: an edge is entered only if it can be crossed before its
+        next flood window, otherwise the vehicle waits at the node until the window
+        closes. Waiting makes arrival times FIFO, so label-setting search stays exact.
+        Edge travel time is ``base_distance / speed_kmph``; the heuristic is the static
+        distance bound divided by the speed.
+        """
+        index = self.network.node_index
+        if source not in index or destination not in index or speed_kmph <= 0:
+            return {"algorithm": "none", "route": [], "legs": [], "depart_hours": depart_hours, "arrive_hours": -1}
+        start, target = index[source], index[destination]
+        indptr, indices, edge_ids = self._network_lists()
+        travel = (self.network.base_distance / speed_kmph).tolist()
+        heuristic = self._heuristic(target, scale=1.0 / speed_kmph)
+        entry_time = windows.entry_time
+        best = {start: depart_hours}
+        parent = {start: (-1, -1, depart_hours)}
+        closed = set()
+        heap = [(depart_hours + heuristic[start], depart_hours, start)]
+        while heap:
+            _, hours, node = heapq.heappop(heap)
+            if node == target:
+                return self._timed_result(parent, best, node, depart_hours)
+            if node in closed:
                 continue
+            closed.add(node)
+            for k in range(indptr[node], indptr[node + 1]):
+                edge = edge_ids[k]
+                enter = entry_time(edge, hours, travel[edge])
+                arrive = enter + travel[edge]
+                neighbour = indices[k]
+                if arrive < best.get(neighbour, float("inf")):
+                    best[neighbour] = arrive
+                    parent[neighbour] = (node, edge, enter)
+                    heapq.heappush(heap, (arrive + heuristic[neighbour], arrive, neighbour))
+        return {"algorithm": "none", "route": [], "legs": [], "depart_hours": depart_hours, "arrive_hours": -1}
 
-            graph.add_edge(source, target, weight=weight, base_distance=base_distance)
+    def _timed_result(self, parent: Dict, best: Dict, node: int, depart_hours: float) -> Dict:
+        nodes = self.network.nodes
+        arrive_hours = best[node]
+        legs = []
+        while parent[node][0] != -1:
+            previous, _, enter = parent[node]
+            # Time at ``previous`` before entering the road, waiting for it to reopen.
+            legs.append({"source": nodes[previous], "target": nodes[node], "enter_hours": enter, "exit_hours": best[node], "wait_hours": enter - best[previous]})
+            node = previous
+        legs.reverse()
+        return {
+            "algorithm": "td-astar",
+            "route": [nodes[node]] + [leg["target"] for leg in legs],
+            "legs": legs,
+            "depart_hours": depart_hours,
+            "arrive_hours": arrive_hours,
+        }
 
-        return graph, blocked_edges
+    def _network_lists(self) -> Tuple[list, list, list]:
+        """The full undirected CSR adjacency (indptr, neighbours, edge ids) as Python lists."""
+        if self._adjacency_lists is None:
+            net = self.network
+            self._adjacency_lists = (net.indptr.tolist(), net.indices.tolist(), net.edge_ids.tolist())
+        return self._adjacency_lists
 
     @staticmethod
-    def _heuristic(_: str, __: str) -> float:
-        return 0.0
+    def _admissible_coordinate_scale(network: RoadNetwork) -> float:
+        """Largest factor k with k * haversine(edge) <= base_distance(edge) for every edge.
+
+        Scaling the straight-line distance by k keeps it a consistent lower bound even
+        where a road length in the network is shorter than its endpoints' separation.
+        """
+        straight = haversine_km(
+            network.latitude[network.edge_source],
+            network.longitude[network.edge_source],
+            network.latitude[network.edge_target],
+            network.longitude[network.edge_target],
+        )
+        valid = np.isfinite(straight) & (straight > 0)
+        if not valid.any():
+            return 0.0
+        return float(min(1.0, np.min(network.base_distance[valid] / straight[valid])))
+
+    def _heuristic(self, target: int, scale: float = 1.0) -> TargetBounds:
+        """Lazy admissible cost-to-target estimate, multiplied by ``scale``."""
+        if self._bound_lists is None:
+            net = self.network
+            # Per-node landmark distances and coordinates in radians, as Python lists.
+            self._bound_lists = (
+                self.landmarks.distances.T.tolist() if len(self.landmarks.landmarks) else [],
+                np.radians(net.latitude).tolist(),
+                np.radians(net.longitude).tolist(),
+            )
+        columns, latitude, longitude = self._bound_lists
+        return TargetBounds(columns, latitude, longitude, self._coordinate_scale, target, scale)
+
+    @timed("route_search")
+    def get_safe_route(self, graph: FloodGraph, source: str, destination: str) -> Dict:
+        with self._route_lock:
+            cached = graph.routes.get((source, destination))
+        if cached is not None:
+            return dict(cached)
+
+        result = self._search(graph, source, destination)
+        with self._route_lock:
+            graph.routes[(source, destination)] = result
+            if len(graph.routes) > MAX_CACHED_ROUTES:
+                graph.routes.popitem(last=False)
+        return dict(result)
 
-    def get_safe_route(self, graph: nx.Graph, source: str, destination: str) -> Dict:
+    @timed("route_batch")
+    def get_routes(self, graph: FloodGraph, pairs: Sequence[Tuple[str, str]], alternatives: int = 0) -> List[Dict]:
+        """Routes for many (source, destination) pairs over one risk state, in request order.
+
+        A source with several destinations gets one shortest-path tree from a
+        multi-source Dijkstra over the flood-weighted matrix; lone pairs use the
+        cached A*. Every pair's result lands in the graph's route cache. With
+        ``alternatives`` each result also lists up to that many other routes.
+        """
+        results: List[Optional[Dict]] = [None] * len(pairs)
+        by_source: Dict[str, List[int]] = {}
+        for i, (source, _) in enumerate(pairs):
+            by_source.setdefault(source, []).append(i)
+        tree_sources = [
+            source for source, queries in by_source.items() if source in graph.nodes and len({pairs[i][1] for i in queries}) > 1
+        ]
+        index = self.network.node_index
+        for start in range(0, len(tree_sources), MAX_TREE_SOURCES):
+            chunk = tree_sources[start : start + MAX_TREE_SOURCES]
+            distance, predecessor = dijkstra(graph.matrix(), directed=False, indices=[index[source] for source in chunk], return_predecessors=True)
+            for row, source in enumerate(chunk):
+                for i in by_source[source]:
+                    results[i] = self._tree_route(graph, distance[row], predecessor[row], source, pairs[i][1])
+        for i, (source, destination) in enumerate(pairs):
+            if results[i] is None:
+                results[i] = self.get_safe_route(graph, source, destination)
+            if alternatives:
+                results[i]["alternatives"] = self.alternative_routes(graph, source, destination, results[i], alternatives)
+        return results
+
+    def _tree_route(self, graph: FloodGraph, distance: np.ndarray, predecessor: np.ndarray, source: str, destination: str) -> Dict:
+        with self._route_lock:
+            cached = graph.routes.get((source, destination))
+        if cached is not None:
+            return dict(cached)
+        target = self.network.node_index.get(destination)
+        if destination not in graph.nodes or not np.isfinite(distance[target]):
+            result = {"algorithm": "none", "route": [], "total_cost": -1}
+        else:
+            path = [target]
+            while predecessor[path[-1]] >= 0:
+                path.append(int(predecessor[path[-1]]))
+            result = {"algorithm": "dijkstra", "route": [self.network.nodes[i] for i in path[::-1]], "total_cost": round(float(distance[target]), 2)}
+        with self._route_lock:
+            graph.routes[(source, destination)] = result
+            if len(graph.routes) > MAX_CACHED_ROUTES:
+                graph.routes.popitem(last=False)
+        return dict(result)
+
+    def alternative_routes(self, graph: FloodGraph, source: str, destination: str, best: Dict, k: int) -> List[Dict]:
+        """Up to ``k`` other routes by the penalty method, cheapest first.
+
+        After each route is found, the weights of its roads are raised by
+        ALTERNATIVE_PENALTY and A* runs again; repeats are skipped. Penalties only
+        raise weights, so one heuristic table serves every search. Costs are
+        reported at the true (unpenalised) flood weights.
+        """
+        if not best["route"] or k <= 0:
+            return []
+        index = self.network.node_index
+        source_node, target = index[source], index[destination]
+        indptr, indices, weights = graph.adjacency()
+        penalised = list(weights)
+        heuristic = self._heuristic(target)
+        path = [index[node] for node in best["route"]]
+        seen = {tuple(path)}
+        found = []
+        for _ in range(ALTERNATIVE_ATTEMPTS * k):
+            self._penalise(path, indptr, indices, penalised)
+            path, _, _ = self._astar(graph, source_node, target, heuristic, penalised)
+            if path is None:
+                break
+            if tuple(path) in seen:
+                continue
+            seen.add(tuple(path))
+            cost = sum(self._leg_weight(u, v, indptr, indices, weights) for u, v in zip(path, path[1:]))
+            found.append({"route": [self.network.nodes[i] for i in path], "total_cost": round(cost, 2)})
+            if len(found) == k:
+                break
+        return sorted(found, key=lambda route: route["total_cost"])
+
+    @staticmethod
+    def _penalise(path: List[int], indptr: list, indices: list, weights: list) -> None:
+        for u, v in zip(path, path[1:]):
+            for a, b in ((u, v), (v, u)):
+                for k in range(indptr[a], indptr[a + 1]):
+                    if indices[k] == b:
+                        weights[k] *= 1.0 + ALTERNATIVE_PENALTY
+
+    @staticmethod
+    def _leg_weight(u: int, v: int, indptr: list, indices: list, weights: list) -> float:
+        return min(weights[k] for k in range(indptr[u], indptr[u + 1]) if indices[k] == v)
+
+    def _search(self, graph: FloodGraph, source: str, destination: str) -> Dict:
         if source not in graph.nodes or destination not in graph.nodes:
             return {"algorithm": "none", "route": [], "total_cost": -1}
 
-        try:
-            route = nx.astar_path(graph, source=source, target=destination, heuristic=self._heuristic, weight="weight")
-            total_cost = nx.path_weight(graph, route, weight="weight")
-            return {"algorithm": "astar", "route": route, "total_cost": round(total_cost, 2)}
-        except nx.NetworkXNoPath:
-            try:
-                route = nx.dijkstra_path(graph, source=source, target=destination, weight="weight")
-                total_cost = nx.path_weight(graph, route, weight="weight")
-                return {"algorithm": "dijkstra", "route": route, "total_cost": round(total_cost, 2)}
-            except nx.NetworkXNoPath:
-                return {"algorithm": "none", "route": [], "total_cost": -1}
+        index = self.network.node_index
+        if not graph.connected(index[source], index[destination]):
+            return {"algorithm": "none", "route": [], "total_cost": -1}
+        path, cost, _ = self._astar(graph, index[source], index[destination])
+        if path is None:
+            return {"algorithm": "none", "route": [], "total_cost": -1}
+        return {"algorithm": "astar", "route": [self.network.nodes[i] for i in path], "total_cost": round(cost, 2)}
+
+    def _astar(
+        self, graph: FloodGraph, source: int, target: int, heuristic: Optional[list] = None, weights: Optional[list] = None
+    ) -> Tuple[Optional[List[int]], float, int]:
+        """A* over the usable CSR adjacency; returns (path, cost, expanded node count).
+
+        ``weights`` replaces the adjacency weights (same order), e.g. penalised ones.
+        """
+        indptr, indices, graph_weights = graph.adjacency()
+        weights = graph_weights if weights is None else weights
+        if heuristic is None:
+            heuristic = self._heuristic(target)
+        best = {source: 0.0}
+        parent = {source: -1}
+        closed = set()
+        heap = [(heuristic[source], 0.0, source)]
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == target:
+                path = [node]
+                while parent[path[-1]] != -1:
+                    path.append(parent[path[-1]])
+                return path[::-1], cost, len(closed)
+            if node in closed:
+                continue
+            closed.add(node)
+            for k in range(indptr[node], indptr[node + 1]):
+                neighbour = indices[k]
+                candidate = cost + weights[k]
+                if candidate < best.get(neighbour, float("inf")):
+                    best[neighbour] = candidate
+                    parent[neighbour] = node
+                    heapq.heappush(heap, (candidate + heuristic[neighbour], candidate, neighbour))
+        return None, float("inf"), len(closed)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import numpy as np
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional dependency fallback for offline environments
+    pa = None
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COLUMNAR_JSON_MEDIA_TYPE = "application/vnd.flood.columnar+json"
+COLUMNAR_MEDIA_TYPES = (ARROW_STREAM_MEDIA_TYPE, COLUMNAR_JSON_MEDIA_TYPE)
+ROW_MEDIA_TYPES = ("application/json", "*/*", "application/*")
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """Columnar media type preferred by an Accept header, or None for the row-oriented default."""
+    if not accept:
+        return None
+    best, best_q = None, 0.0
+    for part in accept.split(","):
+        media_type, *params = (token.strip() for token in part.split(";"))
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media_type in COLUMNAR_MEDIA_TYPES + ROW_MEDIA_TYPES and q > best_q:
+            best, best_q = media_type, q
+    return best if best in COLUMNAR_MEDIA_TYPES else None
+
+
+def columnar_response(media_type: str, table: pd.DataFrame, meta: Optional[Dict[str, Any]] = None) -> Response:
+    """Serve ``table`` column by column, straight from its arrays.
+
+    Arrow responses carry ``meta`` as JSON in the schema metadata; columnar JSON
+    responses put it next to the columns.
+    """
+    meta = meta or {}
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        return Response(content=_arrow_stream(table, meta), media_type=ARROW_STREAM_MEDIA_TYPE)
+
+    body = {
+        "meta": meta,
+        "num_rows": len(table),
+        "columns": {name: _json_column(table[name]) for name in table.columns},
+    }
+    return Response(content=json.dumps(body, default=json_default), media_type=COLUMNAR_JSON_MEDIA_TYPE)
+
+
+def _arrow_stream(table: pd.DataFrame, meta: Dict[str, Any]) -> bytes:
+    if pa is None:
+        raise HTTPException(status_code=406, detail="Arrow responses need pyarrow installed on the server")
+    arrow_table = pa.Table.from_pandas(table, preserve_index=False)
+    arrow_table = arrow_table.replace_schema_metadata({"meta": json.dumps(meta, default=json_default)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+        writer.write_table(arrow_table)
+    return sink.getvalue().to_pybytes()
+
+
+def _json_column(column: pd.Series) -> list:
+    import pandas as pd
+
+    if pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+        return column.to_numpy().tolist()
+    return column.astype(str).tolist()
+
+
+def json_default(value: Any) -> Any:
+    """``json.dumps`` fallback for numpy values, pydantic models and anything else via ``str``."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "dict"):
+        return value.dict()
+    return str(value)
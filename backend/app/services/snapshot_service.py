@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.app.services.serialization import json_default
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms fall back to a single publisher per process
+    fcntl = None
+
+MAGIC = b"FLDSNAP1"
+ALIGNMENT = 64
+_PREFIX = struct.Struct("<8sQ")
+
+
+@dataclass
+class Snapshot:
+    version: int
+    created_at: float
+    arrays: Dict[str, np.ndarray]
+    meta: Dict[str, Any]
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class SnapshotStore:
+    """Versioned risk-state snapshot in a single memory-mapped file.
+
+    Layout: magic, header length, a JSON header (version, array dtypes, shapes and
+    offsets, plus small metadata), then each array at a 64-byte aligned offset.
+    Writers build the file next to the target and ``os.replace`` it, so readers
+    always map one complete version; the arrays they get are read-only views over
+    the shared page cache, not copies.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._identity: Optional[tuple] = None
+        self._snapshot: Optional[Snapshot] = None
+        self._lock_handle = None
+
+    def write(self, arrays: Dict[str, np.ndarray], meta: Optional[Dict[str, Any]] = None, version: Optional[int] = None) -> int:
+        current = self.read()
+        version = version if version is not None else (current.version + 1 if current else 1)
+        arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            offset = _aligned(offset)
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset += array.nbytes
+        header = json.dumps(
+            {"version": version, "created_at": time.time(), "arrays": layout, "meta": meta or {}},
+            default=json_default,
+        ).encode()
+        data_start = _aligned(_PREFIX.size + len(header))
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(_PREFIX.pack(MAGIC, len(header)))
+                handle.write(header)
+                for name, array in arrays.items():
+                    handle.seek(data_start + layout[name]["offset"])
+                    handle.write(array.tobytes())
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return version
+
+    def read(self) -> Optional[Snapshot]:
+        """Latest snapshot, remapping only when the file has been replaced."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if identity != self._identity:
+                self._snapshot = self._map()
+                self._identity = identity
+            return self._snapshot
+
+    def _map(self) -> Optional[Snapshot]:
+        with open(self.path, "rb") as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_len = _PREFIX.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a risk-state snapshot")
+        header = json.loads(bytes(mapped[_PREFIX.size : _PREFIX.size + header_len]))
+        data_start = _aligned(_PREFIX.size + header_len)
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+            if count == 0:
+                # Empty arrays may sit past the last written byte.
+                array = np.frombuffer(b"", dtype=dtype)
+            else:
+                array = np.frombuffer(mapped, dtype=dtype, count=count, offset=data_start + spec["offset"])
+            arrays[name] = array.reshape(spec["shape"])
+        return Snapshot(version=header["version"], created_at=header["created_at"], arrays=arrays, meta=header["meta"])
+
+    def spool_readings(self, rows: Iterable[Tuple[str, float, float]]) -> None:
+        """Append gauge readings for the publisher to pick up on its next cycle."""
+        payload = "".join(json.dumps(list(row)) + "\n" for row in rows).encode()
+        if not payload:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{self.path}.gauges", "ab") as handle:
+            _flock(handle, exclusive=True)
+            handle.write(payload)
+            handle.flush()
+
+    def drain_readings(self) -> List[Tuple[str, float, float]]:
+        try:
+            handle = open(f"{self.path}.gauges", "r+b")
+        except FileNotFoundError:
+            return []
+        with handle:
+            _flock(handle, exclusive=True)
+            lines = handle.read().splitlines()
+            handle.seek(0)
+            handle.truncate()
+        return [tuple(json.loads(line)) for line in lines if line.strip()]
+
+    def try_become_publisher(self) -> bool:
+        """Take the advisory publisher lock; exactly one process per snapshot path holds it."""
+        if self._lock_handle is not None:
+            return True
+        if fcntl is None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(f"{self.path}.lock", "a+")
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._lock_handle = handle
+        return True
+
+
+def _flock(handle, exclusive: bool) -> None:
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+def pack_frame(prefix: str, df: pd.DataFrame) -> Tuple[Dict[str, np.ndarray], List[str]]:
+    """Snapshot arrays for a frame's columns; non-numeric columns become fixed-width strings."""
+    arrays = {}
+    for name in df.columns:
+        column = df[name]
+        if pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+            arrays[f"{prefix}.{name}"] = column.to_numpy()
+        else:
+            arrays[f"{prefix}.{name}"] = column.astype(str).to_numpy(dtype=str)
+    return arrays, [str(name) for name in df.columns]
+
+
+def unpack_frame(snapshot: Snapshot, prefix: str) -> pd.DataFrame:
+    """Frame over a snapshot's arrays; numeric columns stay views of the mapping."""
+    columns = snapshot.meta["frames"][prefix]
+    return pd.DataFrame({name: snapshot.arrays[f"{prefix}.{name}"] for name in columns}, columns=columns, copy=False)
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from backend.app.core.metrics import timed
+from backend.app.services.landmarks import EARTH_RADIUS_KM
+from backend.app.services.routing_service import RoadNetwork
+
+logger = logging.getLogger(__name__)
+
+# Grid cells per zone, roughly; more cells means more points resolved by lookup alone.
+CELLS_PER_ZONE = 16
+MIN_GRID_CELLS = 16
+MAX_GRID_CELLS = 1024
+OUTSIDE = -1
+BOUNDARY = -2
+
+
+class ZonePolygons:
+    """Zone polygons with a uniform grid index for vectorised point-in-polygon.
+
+    Rings are kept as flat edge arrays (lon/lat degrees). At build time every grid
+    cell that no polygon edge touches is classified once as inside one zone or
+    outside all of them, so points in those cells are answered by a table lookup.
+    Points in boundary cells are ray-cast, but only against the candidate zones'
+    edges that cross the point's grid row. Holes and multi-part zones fall out of
+    the even-odd rule over all of a zone's rings.
+    """
+
+    def __init__(self, zone_ids: Sequence[str], rings: Sequence[Sequence[np.ndarray]]) -> None:
+        self.zone_ids = np.asarray(zone_ids, dtype=object)
+        starts, ends, owners = [], [], []
+        for zone, zone_rings in enumerate(rings):
+            for ring in zone_rings:
+                ring = np.asarray(ring, dtype=float)[:, :2]
+                if len(ring) < 3:
+                    continue
+                starts.append(ring)
+                ends.append(np.roll(ring, -1, axis=0))
+                owners.append(np.full(len(ring), zone, dtype=np.intp))
+        start = np.concatenate(starts) if starts else np.empty((0, 2))
+        end = np.concatenate(ends) if ends else np.empty((0, 2))
+        # Closed rings repeat their first vertex; the zero-length edge that leaves is harmless but useless.
+        keep = np.any(start != end, axis=1)
+        self.x1, self.y1 = start[keep, 0], start[keep, 1]
+        self.x2, self.y2 = end[keep, 0], end[keep, 1]
+        self.edge_zone = np.concatenate(owners)[keep] if owners else np.empty(0, dtype=np.intp)
+        self._build_grid()
+
+    @classmethod
+    def from_geojson(cls, path: str, id_property: str = "zone_id") -> "ZonePolygons":
+        """Polygon and MultiPolygon features of a GeoJSON FeatureCollection, keyed by ``id_property``."""
+        with open(path, encoding="utf-8") as handle:
+            collection = json.load(handle)
+        zone_ids, rings = [], []
+        for feature in collection.get("features", []):
+            geometry = feature.get("geometry") or {}
+            zone_id = (feature.get("properties") or {}).get(id_property)
+            if zone_id is None:
+                continue
+            if geometry.get("type") == "Polygon":
+                parts = [geometry["coordinates"]]
+            elif geometry.get("type") == "MultiPolygon":
+                parts = geometry["coordinates"]
+            else:
+                continue
+            zone_ids.append(str(zone_id))
+            rings.append([np.asarray(ring, dtype=float) for part in parts for ring in part])
+        return cls(zone_ids, rings)
+
+    def __len__(self) -> int:
+        return len(self.zone_ids)
+
+    def _build_grid(self) -> None:
+        if len(self.x1) == 0:
+            self.origin, self.cell, self.shape = np.zeros(2), np.ones(2), (1, 1)
+            self.cell_state = np.full((1, 1), OUTSIDE, dtype=np.intp)
+            self._zone_ptr = np.zeros(2, dtype=np.intp)
+            self._cell_zones = self._band_keys = self._band_edges = np.empty(0, dtype=np.intp)
+            return
+        xs, ys = np.concatenate([self.x1, self.x2]), np.concatenate([self.y1, self.y2])
+        low = np.array([xs.min(), ys.min()])
+        span = np.maximum(np.array([xs.max(), ys.max()]) - low, 1e-9)
+        per_axis = int(np.clip(np.ceil(np.sqrt(CELLS_PER_ZONE * len(self))), MIN_GRID_CELLS, MAX_GRID_CELLS))
+        self.origin, self.cell, self.shape = low, span / per_axis, (per_axis, per_axis)
+        n_zones = len(self)
+
+        # Candidate zones per cell: every zone whose bounding box touches it.
+        bounds = np.full((n_zones, 4), np.nan)
+        for column, values, reducer in ((0, np.minimum(self.x1, self.x2), np.fmin), (1, np.minimum(self.y1, self.y2), np.fmin), (2, np.maximum(self.x1, self.x2), np.fmax), (3, np.maximum(self.y1, self.y2), np.fmax)):
+            reducer.at(bounds[:, column], self.edge_zone, values)
+        present = ~np.isnan(bounds[:, 0])
+        zone_rows = np.flatnonzero(present)
+        col0, row0 = self._cells(bounds[zone_rows, 0], bounds[zone_rows, 1])
+        col1, row1 = self._cells(bounds[zone_rows, 2], bounds[zone_rows, 3])
+        cells, zones = _expand_boxes(col0, row0, col1, row1, per_axis, zone_rows)
+        order = np.lexsort((zones, cells))
+        self._cell_zones = zones[order]
+        self._zone_ptr = np.zeros(per_axis * per_axis + 1, dtype=np.intp)
+        np.cumsum(np.bincount(cells, minlength=per_axis * per_axis), out=self._zone_ptr[1:])
+
+        # Edges per (grid row, zone): a ray cast from a point only meets edges spanning its row.
+        _, edge_row0 = self._cells(self.x1, np.minimum(self.y1, self.y2))
+        _, edge_row1 = self._cells(self.x1, np.maximum(self.y1, self.y2))
+        counts = edge_row1 - edge_row0 + 1
+        edges = np.repeat(np.arange(len(self.x1)), counts)
+        rows = np.repeat(edge_row0, counts) + _ranges(counts)
+        keys = rows * n_zones + self.edge_zone[edges]
+        order = np.argsort(keys, kind="stable")
+        self._band_keys, self._band_edges = keys[order], edges[order]
+
+        # Cells touched by an edge's bounding box need the exact test; the rest take their centre's answer.
+        ex0, ey0 = self._cells(np.minimum(self.x1, self.x2), np.minimum(self.y1, self.y2))
+        ex1, ey1 = self._cells(np.maximum(self.x1, self.x2), np.maximum(self.y1, self.y2))
+        touched, _ = _expand_boxes(ex0, ey0, ex1, ey1, per_axis, np.zeros(len(ex0), dtype=np.intp))
+        boundary = np.zeros(per_axis * per_axis, dtype=bool)
+        boundary[touched] = True
+        free = np.flatnonzero(~boundary)
+        centre_x = self.origin[0] + (free % per_axis + 0.5) * self.cell[0]
+        centre_y = self.origin[1] + (free // per_axis + 0.5) * self.cell[1]
+        state = np.full(per_axis * per_axis, BOUNDARY, dtype=np.intp)
+        state[free] = self._ray_cast(centre_x, centre_y, free)
+        self.cell_state = state.reshape(self.shape)
+
+    def _cells(self, x: np.ndarray, y: np.ndarray):
+        col = np.clip(((np.asarray(x) - self.origin[0]) / self.cell[0]).astype(np.intp), 0, self.shape[1] - 1)
+        row = np.clip(((np.asarray(y) - self.origin[1]) / self.cell[1]).astype(np.intp), 0, self.shape[0] - 1)
+        return col, row
+
+    def locate(self, longitude: np.ndarray, latitude: np.ndarray) -> np.ndarray:
+        """Index of the zone containing each point, OUTSIDE (-1) where none does."""
+        x = np.asarray(longitude, dtype=float)
+        y = np.asarray(latitude, dtype=float)
+        result = np.full(len(x), OUTSIDE, dtype=np.intp)
+        if len(self.x1) == 0 or len(x) == 0:
+            return result
+        high = self.origin + self.cell * np.array(self.shape[::-1])
+        inside = (x >= self.origin[0]) & (x <= high[0]) & (y >= self.origin[1]) & (y <= high[1])
+        points = np.flatnonzero(inside)
+        col, row = self._cells(x[points], y[points])
+        cell = row * self.shape[1] + col
+        result[points] = self.cell_state.reshape(-1)[cell]
+        exact = result[points] == BOUNDARY
+        result[points[exact]] = self._ray_cast(x[points[exact]], y[points[exact]], cell[exact])
+        return result
+
+    def _ray_cast(self, x: np.ndarray, y: np.ndarray, cell: np.ndarray) -> np.ndarray:
+        """Even-odd test of each point against the candidate zones of its cell; first containing zone wins."""
+        result = np.full(len(x), OUTSIDE, dtype=np.intp)
+        counts = self._zone_ptr[cell + 1] - self._zone_ptr[cell]
+        pair_point = np.repeat(np.arange(len(x)), counts)
+        if len(pair_point) == 0:
+            return result
+        pair_zone = self._cell_zones[np.repeat(self._zone_ptr[cell], counts) + _ranges(counts)]
+        _, row = self._cells(x[pair_point], y[pair_point])
+        keys = row * len(self) + pair_zone
+        lo = np.searchsorted(self._band_keys, keys, side="left")
+        hi = np.searchsorted(self._band_keys, keys, side="right")
+        edge_counts = hi - lo
+        test_pair = np.repeat(np.arange(len(pair_point)), edge_counts)
+        edge = self._band_edges[np.repeat(lo, edge_counts) + _ranges(edge_counts)]
+        px, py = x[pair_point[test_pair]], y[pair_point[test_pair]]
+        x1, y1, x2, y2 = self.x1[edge], self.y1[edge], self.x2[edge], self.y2[edge]
+        straddles = (y1 > py) != (y2 > py)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing_x = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+        crosses = straddles & (px < crossing_x)
+        odd = np.bincount(test_pair, weights=crosses, minlength=len(pair_point)) % 2 == 1
+        # Pairs are ordered by zone within each point, so the first odd pair is the lowest zone index.
+        hits = np.flatnonzero(odd)
+        first = np.unique(pair_point[hits], return_index=True)
+        result[first[0]] = pair_zone[hits[first[1]]]
+        return result
+
+
+@dataclass
+class SnapResult:
+    """Per point: containing zone (or the nearest road node's zone), nearest road node, and the distance to it."""
+
+    zone_id: np.ndarray
+    node: np.ndarray
+    node_index: np.ndarray
+    distance_km: np.ndarray
+
+
+class SpatialIndex:
+    """Snaps GPS positions to zones and to the nearest road node in one vectorised call.
+
+    Road nodes with coordinates go into a k-d tree over unit-sphere vectors, so
+    nearest-neighbour distances are great-circle distances. Zones come from the
+    polygon file when one is configured; points outside every polygon, or all
+    points without one, take the zone of their nearest road node.
+    """
+
+    def __init__(self, network: RoadNetwork, polygons: Optional[ZonePolygons] = None) -> None:
+        # Deferred so importing the service does not load scipy.spatial before anything is snapped.
+        from scipy.spatial import cKDTree
+
+        self.network = network
+        self.polygons = polygons
+        located = np.flatnonzero(np.isfinite(network.latitude) & np.isfinite(network.longitude))
+        self._tree_nodes = located
+        self._tree = cKDTree(_unit_vectors(network.latitude[located], network.longitude[located])) if len(located) else None
+
+    @classmethod
+    def load(cls, network: RoadNetwork, polygons_path: str = "") -> "SpatialIndex":
+        polygons = None
+        if polygons_path and Path(polygons_path).exists():
+            polygons = ZonePolygons.from_geojson(polygons_path)
+            logger.info("Loaded %d zone polygons from %s", len(polygons), polygons_path)
+        elif polygons_path:
+            logger.warning("Zone polygon file %s not found; snapping zones by nearest road node", polygons_path)
+        return cls(network, polygons)
+
+    @timed("spatial_snap")
+    def snap(self, latitude: Sequence[float], longitude: Sequence[float]) -> SnapResult:
+        latitude = np.asarray(latitude, dtype=float).reshape(-1)
+        longitude = np.asarray(longitude, dtype=float).reshape(-1)
+        if self._tree is None:
+            raise ValueError("no road nodes have coordinates to snap to")
+        chord, position = self._tree.query(_unit_vectors(latitude, longitude))
+        node_index = self._tree_nodes[position]
+        distance = 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+        zone_id = self.network.node_zone[node_index].astype(object)
+        if self.polygons is not None:
+            zone = self.polygons.locate(longitude, latitude)
+            contained = zone >= 0
+            zone_id[contained] = self.polygons.zone_ids[zone[contained]]
+        return SnapResult(zone_id=zone_id, node=self.network.nodes[node_index], node_index=node_index, distance_km=distance)
+
+
+def _unit_vectors(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    lat, lon = np.radians(latitude), np.radians(longitude)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def _ranges(counts: np.ndarray) -> np.ndarray:
+    """Concatenated ``arange(c)`` for each count, without a Python loop."""
+    counts = np.asarray(counts, dtype=np.intp)
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.intp)
+    starts = np.cumsum(counts) - counts
+    return np.arange(total, dtype=np.intp) - np.repeat(starts, counts)
+
+
+def _expand_boxes(col0, row0, col1, row1, per_axis: int, owner: np.ndarray):
+    """(cell, owner) pairs for every grid cell inside each inclusive box of cells."""
+    width = col1 - col0 + 1
+    height = row1 - row0 + 1
+    counts = width * height
+    offset = _ranges(counts)
+    box = np.repeat(np.arange(len(counts)), counts)
+    cols = col0[box] + offset % width[box]
+    rows = row0[box] + offset // width[box]
+    return rows * per_axis + cols, np.asarray(owner)[box]
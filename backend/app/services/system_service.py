@@ -1,45 +1,279 @@
 from __future__ import annotations
 
-from backend.app.models.schemas import EmergencyUnit
-from backend.app.services.bigquery_service import BigQueryRepository
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from backend.app.core.config import get_settings
+from backend.app.core.metrics import stage, timed
+from backend.app.models.schemas import ClearanceResult, EmergencyUnit, GaugeReading
+from backend.app.services.bigquery_service import AsyncBigQueryRepository, BigQueryRepository
 from backend.app.services.clearance_service import RoadClearanceService
 from backend.app.services.deployment_service import EmergencyDeploymentService
-from backend.app.services.risk_engine import compute_zone_risk
-from backend.app.services.routing_service import RoutingEngine
+from backend.app.services.ensemble_service import (
+    MAX_ENSEMBLE_MEMBERS,
+    EnsembleKernel,
+    EnsemblePool,
+    EnsembleResult,
+    RainfallDistribution,
+    route_patterns,
+    run_ensemble,
+)
+from backend.app.services.ingestion_service import ROLLING_WINDOWS_HOURS, GaugeIngestor
+from backend.app.services.inundation_service import STEP_HOURS, InundationModel, rainfall_steps
+from backend.app.services.model_service import build_scorer
+from backend.app.services.risk_engine import RISK_LEVELS, RiskEngine
+from backend.app.services.routing_service import BLOCKED_DEPTH_CM, RoutingEngine
+from backend.app.services.serialization import json_default
+from backend.app.services.snapshot_service import SnapshotStore, pack_frame, unpack_frame
+from backend.app.services.spatial_service import SnapResult, SpatialIndex
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SCENARIOS = 5001
+
+
+def _state_digest(arrays, meta) -> bytes:
+    digest = hashlib.blake2b(json.dumps(meta, default=json_default, sort_keys=True).encode(), digest_size=16)
+    for name, array in arrays.items():
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.digest()
+
+
+def _epoch_seconds(timestamp: datetime) -> float:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
 
 
 class FloodDefenseService:
     def __init__(self) -> None:
         self.repo = BigQueryRepository()
+        self.async_repo = AsyncBigQueryRepository(self.repo)
         self.routing = RoutingEngine()
         self.deployment = EmergencyDeploymentService()
         self.clearance = RoadClearanceService()
+        self.risk = RiskEngine(build_scorer())
+        self._risk_lock = threading.Lock()
+        settings = get_settings()
+        self.gauges = GaugeIngestor(settings.gauge_bucket_seconds, settings.gauge_horizon_hours)
+        self._gauge_state = None
+        self.snapshots = SnapshotStore(settings.snapshot_path) if settings.snapshot_path else None
+        self.snapshot_interval = settings.snapshot_interval_seconds
+        self.is_publisher = False
+        self._published_digest = None
+        self._snapshot_frames = None
+        self._snapshot_stop = threading.Event()
+        self._snapshot_thread = None
+        self.warm_start = SnapshotStore(settings.warm_start_path) if settings.warm_start_path else None
+        self.warm_start_interval = settings.warm_start_interval_seconds
+        self._seed = None
+        self._warm_digest = None
+        self._ready = threading.Event()
+        self._warm_start_stop = threading.Event()
+        self._warm_start_thread = None
+        self.ensemble_pool = EnsemblePool(settings.ensemble_workers or None)
+        self._inundation = None
+        self._windows = None
+        self._spatial = None
+
+    def warm_model(self) -> None:
+        """Load the flood classifier ahead of the first request when the model scorer is configured."""
+        if self.risk.scorer is None:
+            return
+        try:
+            self.risk.scorer.warm()
+        except Exception:
+            logger.exception("Flood model failed to load; falling back to the heuristic scorer")
+            with self._risk_lock:
+                self.risk.set_scorer(None)
+
+    def warm_spatial(self) -> None:
+        """Build the GPS snapping index ahead of the first request that sends coordinates."""
+        try:
+            self.spatial
+        except Exception:
+            logger.exception("Spatial index failed to build; it will be retried on the next request with coordinates")
+
+    @property
+    def spatial(self) -> SpatialIndex:
+        index = self._spatial
+        if index is None or index.network is not self.routing.network:
+            index = SpatialIndex.load(self.routing.network, get_settings().zone_polygons_path)
+            self._spatial = index
+        return index
+
+    def snap(self, latitude, longitude) -> SnapResult:
+        return self.spatial.snap(latitude, longitude)
+
+    def resolve_places(self, names, locations) -> list[str]:
+        """Road node names for places given by name or by GPS position; a name wins when both are given.
+
+        All positions are snapped to their nearest road node in one batch.
+        """
+        resolved = list(names)
+        pending = [i for i, name in enumerate(resolved) if not name]
+        if any(locations[i] is None for i in pending):
+            raise ValueError("each place needs a road node name or a location")
+        if pending:
+            snapped = self.snap([locations[i].latitude for i in pending], [locations[i].longitude for i in pending])
+            for i, node in zip(pending, snapped.node):
+                resolved[i] = str(node)
+        return resolved
+
+    def _locate_units(self, units: list[EmergencyUnit]):
+        """Units with a GPS position start from their nearest road node, and take its zone when none is given."""
+        if any(unit.location is None and not unit.current_zone for unit in units):
+            raise ValueError("each unit needs a current_zone or a location")
+        located = [i for i, unit in enumerate(units) if unit.location is not None]
+        if not located:
+            return units, None
+        snapped = self.snap([units[i].location.latitude for i in located], [units[i].location.longitude for i in located])
+        nodes = np.full(len(units), -1, dtype=np.intp)
+        nodes[located] = snapped.node_index
+        units = list(units)
+        for i, zone_id in zip(located, snapped.zone_id):
+            if not units[i].current_zone:
+                units[i] = units[i].model_copy(update={"current_zone": str(zone_id)})
+        return units, nodes
 
     def forecast(self):
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            return self._snapshot_view(snapshot)[0]
         return self.repo.forecast_rainfall()
 
-    def zone_risk(self, rainfall_multiplier: float = 1.0):
-        forecast_df = self.forecast()
-        zones_df = self.repo.fetch_zones()
-        return compute_zone_risk(zones_df, forecast_df, rainfall_multiplier=rainfall_multiplier)
+    def cache_stats(self):
+        return self.repo.cache_stats()
 
-    def route(self, source: str, destination: str, rainfall_multiplier: float = 1.0):
-        zone_df = self.zone_risk(rainfall_multiplier=rainfall_multiplier)
-        graph, blocked_edges = self.routing.build_graph(zone_df)
+    async def fetch_forecast(self):
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            return self._snapshot_view(snapshot)[0]
+        return await self.async_repo.forecast_rainfall()
+
+    async def fetch_inputs(self):
+        """Forecast and zones fetched concurrently without blocking the event loop."""
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            return self._snapshot_view(snapshot)[:2]
+        with stage("fetch_inputs"):
+            return await self.async_repo.fetch_inputs()
+
+    def _inputs(self, inputs):
+        if inputs is not None:
+            return inputs
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            return self._snapshot_view(snapshot)[:2]
+        return self.forecast(), self.repo.fetch_zones()
+
+    def zone_risk(self, rainfall_multiplier: float = 1.0, inputs=None):
+        forecast_df, zones_df = self._inputs(inputs)
+        baseline = self._snapshot_baseline(rainfall_multiplier, forecast_df, zones_df)
+        if baseline is not None:
+            return baseline
+        with stage("compute_zone_risk"), self._risk_lock:
+            self._sync_risk(zones_df, forecast_df)
+            self.risk.set_multiplier(rainfall_multiplier)
+            return self.risk.to_frame()
+
+    def _sync_risk(self, zones_df, forecast_df) -> None:
+        self.risk.sync_zones(zones_df)
+        self.risk.set_forecast(forecast_df)
+        self._push_gauge_aggregates()
+
+    def _push_gauge_aggregates(self) -> None:
+        """Feed rolling 24h gauge totals into the risk engine when they may have changed."""
+        snapshot = self._snapshot()
+        source = ("snapshot", snapshot.version, snapshot.created_at) if snapshot is not None else self.gauges.state_key()
+        state = (source, id(self.risk.zone_ids))
+        if state == self._gauge_state:
+            return
+        zone_ids, totals = self.gauge_aggregates()
+        if zone_ids:
+            self.risk.set_observed_rainfall(zone_ids, totals[24])
+        self._gauge_state = state
+
+    def ingest_gauges(self, readings: list[GaugeReading]) -> tuple[int, int]:
+        rows = [(reading.zone_id, _epoch_seconds(reading.timestamp), reading.rainfall_mm) for reading in readings]
+        accepted = self.gauges.ingest(*zip(*rows), known_zones=self._known_zones()) if rows else 0
+        if self.snapshots is not None and not self.is_publisher:
+            # Only the publisher's ingestor feeds the shared state; it drains this spool every cycle.
+            self.snapshots.spool_readings(rows)
+        with self._risk_lock:
+            if len(self.risk):
+                self._push_gauge_aggregates()
+        return accepted, len(readings) - accepted
+
+    def _known_zones(self):
+        """Zone ids the risk engine scores, or None before any zones are loaded."""
+        zone_ids = self.risk.zone_ids
+        return set(zone_ids) if len(zone_ids) else None
+
+    def gauge_aggregates(self):
+        snapshot = self._snapshot()
+        if snapshot is None:
+            return self.gauges.aggregates()
+        zone_ids = snapshot.arrays["gauges.zone_id"].tolist()
+        return zone_ids, {hours: snapshot.arrays[f"gauges.{hours}h"] for hours in ROLLING_WINDOWS_HOURS}
+
+    def _build_graph(self, zone_df):
+        snapshot = self._snapshot()
+        if snapshot is not None and zone_df is self._snapshot_view(snapshot)[2] and snapshot.meta["topology"] == self.routing.landmarks.fingerprint:
+            graph = self.routing.adopt(
+                snapshot.arrays["graph.weight"], snapshot.arrays["graph.blocked"], snapshot.arrays["graph.active"]
+            )
+            return graph, graph.blocked_edges
+        return self.routing.build_graph(zone_df)
+
+    def baseline_state(self, inputs=None):
+        """Zone risk, blocked roads and clearance ranking at the forecast rainfall."""
+        zone_df = self.zone_risk(inputs=inputs)
+        graph, blocked_edges = self._build_graph(zone_df)
+        return zone_df, blocked_edges, self._clearance(blocked_edges, zone_df)
+
+    def route(self, source: str, destination: str, rainfall_multiplier: float = 1.0, inputs=None):
+        zone_df = self.zone_risk(rainfall_multiplier=rainfall_multiplier, inputs=inputs)
+        graph, blocked_edges = self._build_graph(zone_df)
         route = self.routing.get_safe_route(graph, source, destination)
         route["blocked_edges"] = blocked_edges
         return route, zone_df, blocked_edges
 
-    def deploy(self, units: list[EmergencyUnit], rainfall_multiplier: float = 1.0):
-        zone_df = self.zone_risk(rainfall_multiplier=rainfall_multiplier)
-        return self.deployment.assign_units(units, zone_df), zone_df
+    def route_batch(self, pairs, alternatives: int = 0, rainfall_multiplier: float = 1.0, inputs=None):
+        """Many routes, optionally with alternatives, from one zone-risk computation and one graph."""
+        zone_df = self.zone_risk(rainfall_multiplier=rainfall_multiplier, inputs=inputs)
+        graph, blocked_edges = self._build_graph(zone_df)
+        return self.routing.get_routes(graph, pairs, alternatives), blocked_edges
+
+    def deploy(self, units: list[EmergencyUnit], rainfall_multiplier: float = 1.0, inputs=None):
+        units, unit_nodes = self._locate_units(units)
+        zone_df = self.zone_risk(rainfall_multiplier=rainfall_multiplier, inputs=inputs)
+        graph, _ = self._build_graph(zone_df)
+        return self.deployment.assign_units(units, zone_df, graph, unit_nodes, commit=True), zone_df
 
-    def simulate(self, rainfall_increase_pct: float, source: str | None, destination: str | None, units: list[EmergencyUnit]):
+    @timed("simulate")
+    def simulate(
+        self,
+        rainfall_increase_pct: float,
+        source: str | None,
+        destination: str | None,
+        units: list[EmergencyUnit],
+        inputs=None,
+    ):
         multiplier = 1.0 + (rainfall_increase_pct / 100.0)
-        zone_df = self.zone_risk(rainfall_multiplier=multiplier)
-        graph, blocked_edges = self.routing.build_graph(zone_df)
-        dispatch = self.deployment.assign_units(units, zone_df)
-        clearance = self.clearance.prioritize(blocked_edges, zone_df)
+        units, unit_nodes = self._locate_units(units)
+        zone_df = self.zone_risk(rainfall_multiplier=multiplier, inputs=inputs)
+        graph, blocked_edges = self._build_graph(zone_df)
+        dispatch = self.deployment.assign_units(units, zone_df, graph, unit_nodes)
+        clearance = self._clearance(blocked_edges, zone_df)
 
         route = None
         if source and destination:
@@ -48,3 +282,321 @@ class FloodDefenseService:
             route = route_dict
 
         return multiplier, zone_df, blocked_edges, dispatch, route, clearance
+
+    def inundation(self, rainfall_increase_pct: float, time_steps: str = "hourly", inputs=None):
+        """Depth per zone after each hourly or daily step of the forecast, with runoff between zones."""
+        step_hours = STEP_HOURS[time_steps]
+        forecast_df, zones_df = self._inputs(inputs)
+        model = self._inundation_model(zones_df)
+        rain, timestamps = rainfall_steps(forecast_df, model.zone_ids, step_hours, 1.0 + rainfall_increase_pct / 100.0)
+        return model.run(rain, step_hours, timestamps)
+
+    def _inundation_model(self, zones_df):
+        # Transfer matrices depend only on the zones table and road topology, so they are reused across requests.
+        fingerprint = self.routing.landmarks.fingerprint
+        cached = self._inundation
+        if cached is not None and cached[0] is zones_df and cached[1] == fingerprint:
+            return cached[2]
+        _, src, dst = self.routing.edge_zone_index(zones_df["zone_id"].astype(str).to_numpy(dtype=object))
+        model = InundationModel.from_zones(zones_df, src, dst)
+        self._inundation = (zones_df, fingerprint, model)
+        return model
+
+    def timed_route(
+        self,
+        source: str,
+        destination: str,
+        depart_at: datetime | None = None,
+        rainfall_increase_pct: float = 0.0,
+        time_steps: str = "hourly",
+        speed_kmph: float = 35.0,
+        inputs=None,
+    ):
+        """Earliest-arrival route against roads flooding and reopening over the forecast horizon."""
+        step_hours = STEP_HOURS[time_steps]
+        forecast_df, zones_df = self._inputs(inputs)
+        # Windows are reused while the inputs, scenario and road topology stay the same.
+        key = (rainfall_increase_pct, time_steps, self.routing.landmarks.fingerprint)
+        cached = self._windows
+        if cached is not None and cached[0] == key and cached[1] is forecast_df and cached[2] is zones_df:
+            windows = cached[3]
+        else:
+            series = self.inundation(rainfall_increase_pct, time_steps, inputs=(forecast_df, zones_df))
+            # Series timestamps mark the end of each step, so the profile starts one step before the first.
+            origin = pd.Timestamp(series.timestamps[0]) - pd.Timedelta(hours=step_hours) if len(series.timestamps) else pd.Timestamp.now(tz="UTC")
+            windows = self.routing.blocking_windows(series.zone_ids, series.depth_cm, step_hours, origin)
+            self._windows = (key, forecast_df, zones_df, windows)
+
+        depart = pd.Timestamp(depart_at) if depart_at is not None else pd.Timestamp.now(tz="UTC")
+        if depart.tzinfo is None:
+            depart = depart.tz_localize("UTC")
+        depart_hours = (depart - windows.origin) / pd.Timedelta(hours=1)
+        return self.routing.get_timed_route(windows, source, destination, depart_hours, speed_kmph), windows.origin
+
+    @timed("simulate_batch")
+    def simulate_batch(
+        self,
+        rainfall_increase_pcts: list[float] | None = None,
+        start_pct: float = 0.0,
+        stop_pct: float = 500.0,
+        step_pct: float = 10.0,
+        inputs=None,
+    ):
+        if rainfall_increase_pcts:
+            pcts = np.asarray(rainfall_increase_pcts, dtype=float)
+        else:
+            if step_pct <= 0 or stop_pct < start_pct:
+                raise ValueError("step_pct must be positive and stop_pct >= start_pct")
+            pcts = np.arange(start_pct, stop_pct + step_pct / 2, step_pct)
+        if len(pcts) > MAX_BATCH_SCENARIOS:
+            raise ValueError(f"at most {MAX_BATCH_SCENARIOS} scenarios per batch")
+
+        forecast_df, zones_df = self._inputs(inputs)
+        with self._risk_lock:
+            self._sync_risk(zones_df, forecast_df)
+            batch = self.risk.evaluate_scenarios(1.0 + pcts / 100.0)
+            zone_thresholds = self.risk.depth_threshold_multipliers(BLOCKED_DEPTH_CM)
+
+        edges, src_idx, dst_idx = self.routing.edge_zone_index(batch.zone_ids)
+        depth = batch.estimated_water_depth
+        blocked = np.maximum(depth[:, src_idx], depth[:, dst_idx]) > BLOCKED_DEPTH_CM
+        threshold_pct = (np.minimum(zone_thresholds[src_idx], zone_thresholds[dst_idx]) - 1.0) * 100.0
+        return pcts, batch, edges, blocked, threshold_pct
+
+    @timed("simulate_ensemble")
+    def simulate_ensemble(
+        self,
+        members: int,
+        seed: int = 0,
+        rainfall_increase_pct: float = 0.0,
+        risk_level: str = "HIGH",
+        depth_threshold_cm: float = BLOCKED_DEPTH_CM,
+        source: str | None = None,
+        destination: str | None = None,
+        inputs=None,
+    ) -> EnsembleResult:
+        """Monte Carlo over rainfall drawn from the forecast's prediction intervals."""
+        if not 1 <= members <= MAX_ENSEMBLE_MEMBERS:
+            raise ValueError(f"members must be between 1 and {MAX_ENSEMBLE_MEMBERS}")
+        if risk_level not in RISK_LEVELS:
+            raise ValueError(f"unknown risk level {risk_level!r}")
+        multiplier = 1.0 + rainfall_increase_pct / 100.0
+        settings = get_settings()
+        forecast_df, zones_df = self._inputs(inputs)
+        with self._risk_lock:
+            self._sync_risk(zones_df, forecast_df)
+            engine = self.risk.detached()
+
+        edge_index, src_idx, dst_idx = self.routing.edge_zone_positions(engine.zone_ids)
+        kernel = EnsembleKernel(
+            engine=engine,
+            rainfall=RainfallDistribution.from_forecast(forecast_df, engine.zone_ids, settings.forecast_confidence),
+            rainfall_multiplier=multiplier,
+            edge_src=src_idx,
+            edge_dst=dst_idx,
+            risk_code=int(np.flatnonzero(RISK_LEVELS == risk_level)[0]),
+            depth_threshold_cm=depth_threshold_cm,
+        )
+        tally = run_ensemble(kernel, members, seed, pool=self.ensemble_pool)
+        result = EnsembleResult(
+            members=members,
+            seed=seed,
+            rainfall_multiplier=multiplier,
+            zone_ids=engine.zone_ids,
+            risk_exceedance=tally.risk_exceeded / members,
+            depth_exceedance=tally.depth_exceeded / members,
+            mean_flood_probability=tally.probability_sum / members,
+            mean_water_depth=tally.depth_sum / members,
+            edges=self.routing.network.edge_names(edge_index),
+            edge_blockage=tally.edge_blocked / members,
+        )
+        if source and destination:
+            graph, _ = self._build_graph(self.zone_risk(rainfall_multiplier=multiplier, inputs=inputs))
+            result.routes, result.unreachable_probability, result.routed_probability = route_patterns(
+                self.routing, graph, tally, engine.zone_ids, edge_index, src_idx, dst_idx, source, destination
+            )
+        return result
+
+    def _clearance(self, blocked_edges, zone_df):
+        snapshot = self._snapshot()
+        if snapshot is not None and zone_df is self._snapshot_view(snapshot)[2]:
+            return [ClearanceResult(**item) for item in snapshot.meta["clearance"]]
+        return self.clearance.prioritize(blocked_edges, zone_df)
+
+    def _snapshot(self):
+        """Risk state this worker serves instead of computing its own.
+
+        That is the publisher's latest snapshot for reader workers, else the warm-start
+        state loaded at boot until the first refresh replaces it.
+        """
+        if self.snapshots is not None and not self.is_publisher:
+            snapshot = self.snapshots.read()
+            if snapshot is not None:
+                return snapshot
+        return self._seed
+
+    def _snapshot_view(self, snapshot):
+        """(forecast, zones, baseline risk) frames over a snapshot, built once per snapshot.
+
+        Reusing the same frame objects per snapshot lets the risk engine's identity
+        checks skip resyncing between requests.
+        """
+        cached = self._snapshot_frames
+        # Keyed on the snapshot itself: a warm-start file and the shared snapshot number versions independently.
+        if cached is None or cached[0] is not snapshot:
+            frames = tuple(unpack_frame(snapshot, prefix) for prefix in ("forecast", "zones", "risk"))
+            cached = self._snapshot_frames = (snapshot, *frames)
+        return cached[1:]
+
+    def _snapshot_baseline(self, rainfall_multiplier, forecast_df, zones_df):
+        snapshot = self._snapshot()
+        if snapshot is None or rainfall_multiplier != 1.0:
+            return None
+        forecast_view, zones_view, risk_view = self._snapshot_view(snapshot)
+        if forecast_df is forecast_view and zones_df is zones_view:
+            return risk_view
+        return None
+
+    @timed("publish_snapshot")
+    def publish_snapshot(self):
+        """Compute the baseline risk state once and publish it for every worker; returns the version."""
+        if not self.snapshots.try_become_publisher():
+            raise RuntimeError(f"another worker publishes {self.snapshots.path}")
+        self.is_publisher = True
+        readings = self.snapshots.drain_readings()
+        if readings:
+            self.gauges.ingest(*zip(*readings), known_zones=self._known_zones())
+        arrays, meta = self._pack_state()
+        self._seed = None
+        self._ready.set()
+
+        digest = _state_digest(arrays, meta)
+        current = self.snapshots.read()
+        if current is not None and digest == self._published_digest:
+            return current.version
+        version = self.snapshots.write(arrays, meta)
+        self._published_digest = digest
+        self._persist_warm_start(arrays, meta, digest)
+        return version
+
+    def _pack_state(self):
+        """Snapshot arrays and metadata for the live baseline risk state, computed from the repository."""
+        forecast_df, zones_df = self.repo.forecast_rainfall(), self.repo.fetch_zones()
+        zone_df = self.zone_risk(inputs=(forecast_df, zones_df))
+        graph, blocked_edges = self.routing.build_graph(zone_df)
+        clearance = self.clearance.prioritize(blocked_edges, zone_df)
+        gauge_ids, totals = self.gauges.aggregates()
+
+        arrays, frames = {}, {}
+        for prefix, df in (("forecast", forecast_df), ("zones", zones_df), ("risk", zone_df)):
+            packed, frames[prefix] = pack_frame(prefix, df)
+            arrays.update(packed)
+        arrays["graph.weight"] = graph.weight
+        arrays["graph.blocked"] = graph.blocked
+        arrays["graph.active"] = graph.active
+        arrays["gauges.zone_id"] = np.array(gauge_ids, dtype=str)
+        for hours in ROLLING_WINDOWS_HOURS:
+            arrays[f"gauges.{hours}h"] = totals[hours]
+        meta = {"frames": frames, "topology": self.routing.landmarks.fingerprint, "clearance": clearance}
+        return arrays, meta
+
+    def start_snapshots(self) -> None:
+        """Elect one publisher per snapshot path; the others map its file read-only."""
+        if self.snapshots is None or self._snapshot_thread is not None:
+            return
+        self._snapshot_stop.clear()
+        self._snapshot_thread = threading.Thread(target=self._snapshot_loop, name="risk-snapshot", daemon=True)
+        self._snapshot_thread.start()
+
+    def stop_snapshots(self) -> None:
+        if self._snapshot_thread is None:
+            return
+        self._snapshot_stop.set()
+        self._snapshot_thread.join()
+        self._snapshot_thread = None
+
+    def _snapshot_loop(self) -> None:
+        while True:
+            # Readers keep retrying so one takes over if the publisher exits.
+            if self.snapshots.try_become_publisher():
+                try:
+                    self.publish_snapshot()
+                except Exception:
+                    logger.exception("Publishing risk snapshot failed")
+            if self._snapshot_stop.wait(self.snapshot_interval):
+                return
+
+    @property
+    def readiness(self) -> str:
+        """Where served state comes from: ``snapshot``, ``warm_start``, ``live``, or ``starting`` before any exists."""
+        if self.snapshots is not None and not self.is_publisher and self.snapshots.read() is not None:
+            return "snapshot"
+        if self._seed is not None:
+            return "warm_start"
+        return "live" if self._ready.is_set() else "starting"
+
+    def load_warm_start(self) -> bool:
+        """Serve the risk state persisted by an earlier refresh until this worker computes its own."""
+        if self.warm_start is None:
+            return False
+        try:
+            seed = self.warm_start.read()
+            missing = {"forecast", "zones", "risk"} - set(seed.meta["frames"]) if seed is not None else set()
+        except (OSError, ValueError, KeyError):
+            logger.exception("Warm-start state at %s is unreadable; starting cold", self.warm_start.path)
+            return False
+        if seed is None or missing:
+            return False
+        self._seed = seed
+        self._ready.set()
+        logger.info("Serving warm-start state from %s, %.0fs old", self.warm_start.path, time.time() - seed.created_at)
+        return True
+
+    @timed("refresh_warm_start")
+    def refresh_warm_start(self):
+        """Replace the loaded warm-start state with a live one and persist it; returns the written version."""
+        arrays, meta = self._pack_state()
+        self._seed = None
+        self._ready.set()
+        return self._persist_warm_start(arrays, meta, _state_digest(arrays, meta))
+
+    def _persist_warm_start(self, arrays, meta, digest):
+        if self.warm_start is None or digest == self._warm_digest:
+            return None
+        try:
+            version = self.warm_start.write(arrays, meta)
+        except OSError:
+            logger.exception("Writing warm-start state to %s failed", self.warm_start.path)
+            return None
+        self._warm_digest = digest
+        return version
+
+    def start_warm_start(self) -> None:
+        """Compute the live state in the background and keep the warm-start file current.
+
+        With a shared snapshot the publisher does both as part of publishing instead.
+        """
+        if self.snapshots is not None or self._warm_start_thread is not None:
+            return
+        self._warm_start_stop.clear()
+        self._warm_start_thread = threading.Thread(target=self._warm_start_loop, name="warm-start", daemon=True)
+        self._warm_start_thread.start()
+
+    def stop_warm_start(self) -> None:
+        if self._warm_start_thread is None:
+            return
+        self._warm_start_stop.set()
+        self._warm_start_thread.join()
+        self._warm_start_thread = None
+
+    def _warm_start_loop(self) -> None:
+        while True:
+            try:
+                self.refresh_warm_start()
+            except Exception:
+                logger.exception("Refreshing warm-start state failed")
+            # Without a file to keep current, one successful refresh is all startup needs.
+            if self.warm_start is None and self._ready.is_set():
+                return
+            if self._warm_start_stop.wait(self.warm_start_interval):
+                return
@@ -1,23 +1,214 @@
-from fastapi import FastAPI
+import time
+
+# Taken before the remaining imports so flood_startup_seconds{phase="import"} covers them.
+IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import logging
+import math
+import threading
+import uuid
+from contextlib import asynccontextmanager, nullcontext
+from typing import Optional
+
+import numpy as np
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from backend.app.core.config import get_settings
+from backend.app.core.metrics import SamplingProfiler, format_labels, install_request_profiling, metrics, profiles
 
 from backend.app.models.schemas import (
+    BatchRoute,
+    BatchSimulationRequest,
+    BatchSimulationResponse,
+    CacheStatsResponse,
     DeployRequest,
     DeployResponse,
+    EnsembleRequest,
+    EnsembleResponse,
+    EnsembleRoute,
     ForecastPoint,
     ForecastResponse,
+    GaugeBatch,
+    GaugeIngestResponse,
     HealthResponse,
+    RainfallAggregatesResponse,
+    ReadinessResponse,
+    RoadBlockage,
+    RoadBlockThreshold,
+    RouteBatchRequest,
+    RouteBatchResponse,
     RouteRequest,
     RouteResponse,
+    ScenarioResult,
     SimulationRequest,
     SimulationResponse,
+    SnappedPoint,
+    SnapRequest,
+    SnapResponse,
+    TimedLeg,
+    TimedRouteRequest,
+    TimedRouteResponse,
+    ZoneExceedance,
     ZonesResponse,
 )
-from backend.app.services.bigquery_service import forecast_sql_template, to_forecast_rows
-from backend.app.services.system_service import FloodDefenseService
+from backend.app.services.events_service import RiskEventBroadcaster, RiskState
+from backend.app.services.ingestion_service import ROLLING_WINDOWS_HOURS
+from backend.app.services.serialization import columnar_response, negotiate
+
+FORECAST_SOURCE = "BigQuery AI.FORECAST (TimesFM)"
+PROFILE_HEADER = "x-profile"
+CACHE_METRICS = {
+    "hits": "flood_query_cache_hits_total",
+    "stale_hits": "flood_query_cache_stale_hits_total",
+    "misses": "flood_query_cache_misses_total",
+    "coalesced": "flood_query_cache_coalesced_total",
+    "errors": "flood_query_cache_errors_total",
+}
+
+PROBE_PATHS = ("/healthz", "/readyz")
+
+logger = logging.getLogger(__name__)
+
+# Seconds from the start of importing this module to each startup milestone.
+startup_seconds: dict[str, float] = {}
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """The flood defense service, built on first use.
+
+    Its modules pull in pandas, scipy and the BigQuery client, so importing the app stays
+    cheap and the process can answer liveness probes while they load. A warm-start file,
+    when configured, is loaded before the service is handed out.
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                from backend.app.services.system_service import FloodDefenseService
+
+                service = FloodDefenseService()
+                service.load_warm_start()
+                _service = service
+                startup_seconds["service"] = time.perf_counter() - IMPORT_STARTED
+    return _service
+
+
+async def load_service():
+    """``get_service`` without blocking the event loop while the service is still being built."""
+    if _service is not None:
+        return _service
+    return await asyncio.to_thread(get_service)
+
+
+async def compute_risk_state() -> RiskState:
+    service = await load_service()
+    inputs = await service.fetch_inputs()
+    zone_df, blocked_edges, clearance = await asyncio.to_thread(service.baseline_state, inputs)
+    return RiskState.from_results(zone_df, blocked_edges, clearance)
+
+
+broadcaster = RiskEventBroadcaster(
+    compute_risk_state,
+    poll_seconds=get_settings().events_poll_seconds,
+    queue_size=get_settings().events_queue_size,
+)
+
+
+def readiness_state() -> str:
+    state = _service.readiness if _service is not None else "starting"
+    if state != "starting":
+        startup_seconds.setdefault("ready", time.perf_counter() - IMPORT_STARTED)
+    return state
+
+
+async def boot() -> None:
+    """Build the service, then refresh its state, warm the model and spatial index and start the ensemble pool."""
+    try:
+        service = await load_service()
+    except Exception:
+        logger.exception("Building the service failed; requests will retry it")
+        return
+    readiness_state()
+    service.start_snapshots()
+    service.start_warm_start()
+    broadcaster.start()
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        loop.run_in_executor(None, service.warm_model),
+        loop.run_in_executor(None, service.warm_spatial),
+        loop.run_in_executor(None, service.ensemble_pool.executor),
+    )
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    if get_settings().profiling_enabled:
+        install_request_profiling(asyncio.get_running_loop())
+    # Nothing heavy runs before the server starts accepting connections; /readyz reports when state is servable.
+    booting = asyncio.create_task(boot())
+    yield
+    await asyncio.gather(booting, return_exceptions=True)
+    await broadcaster.stop()
+    if _service is not None:
+        _service.stop_warm_start()
+        _service.stop_snapshots()
+        _service.ensemble_pool.shutdown()
+
+
+app = FastAPI(title="Chennai Urban Flood Defense API", version="1.0.0", lifespan=lifespan)
+
+
+def cache_metric_lines():
+    if _service is None:
+        return
+    stats = _service.cache_stats()
+    for field, name in CACHE_METRICS.items():
+        yield f"# TYPE {name} counter"
+        for cache, values in sorted(stats.items()):
+            yield f"{name}{format_labels((('cache', cache),))} {values[field]}"
+
+
+def startup_metric_lines():
+    yield "# HELP flood_startup_seconds Seconds from importing the app to each startup milestone"
+    yield "# TYPE flood_startup_seconds gauge"
+    for phase, seconds in sorted(startup_seconds.items()):
+        yield f"flood_startup_seconds{format_labels((('phase', phase),))} {seconds:.6g}"
+
+
+metrics.add_collector(cache_metric_lines)
+metrics.add_collector(startup_metric_lines)
+
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    """Per-route latency histogram; ``X-Profile: 1`` samples the request's stacks when profiling is enabled."""
+    settings = get_settings()
+    profile = settings.profiling_enabled and request.headers.get(PROFILE_HEADER) == "1"
+    profiler = SamplingProfiler(interval_seconds=settings.profile_interval_ms / 1000.0) if profile else None
+    started = time.perf_counter()
+    with profiler or nullcontext():
+        response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    if "first_response" not in startup_seconds and path not in PROBE_PATHS:
+        startup_seconds["first_response"] = time.perf_counter() - IMPORT_STARTED
+    metrics.histogram(
+        "flood_request_seconds", "HTTP request latency", method=request.method, route=path, status=str(response.status_code)
+    ).observe(elapsed)
+    if profiler is not None:
+        profile_id = uuid.uuid4().hex[:12]
+        profiles.add({"id": profile_id, "path": request.url.path, "seconds": round(elapsed, 6), "collapsed": profiler.collapsed()})
+        logger.info("Profiled %s %s in %.3fs as %s", request.method, request.url.path, elapsed, profile_id)
+        response.headers["X-Profile-Id"] = profile_id
+    return response
 
-app = FastAPI(title="Chennai Urban Flood Defense API", version="1.0.0")
-service = FloodDefenseService()
 
 app.add_middleware(
     CORSMiddleware,
@@ -29,49 +220,213 @@ app.add_middleware(
 
 
 @app.get("/", response_model=HealthResponse)
+@app.get("/healthz", response_model=HealthResponse)
 def healthcheck() -> HealthResponse:
+    """Liveness: the process is up, whether or not any risk state is loaded yet."""
     return HealthResponse(status="ok", service="chennai-flood-defense")
 
 
+@app.get("/readyz", response_model=ReadinessResponse, responses={503: {"model": ReadinessResponse}})
+def readiness(response: Response) -> ReadinessResponse:
+    """Readiness: 503 until a warm-start, shared or freshly computed risk state can be served."""
+    state = readiness_state()
+    if state == "starting":
+        response.status_code = 503
+        return ReadinessResponse(status="starting", state=state)
+    return ReadinessResponse(status="ready", state=state)
+
+
 @app.get("/forecast", response_model=ForecastResponse)
-def get_forecast() -> ForecastResponse:
-    df = service.forecast()
+async def get_forecast(accept: Optional[str] = Header(default=None)) -> ForecastResponse:
+    from backend.app.services.bigquery_service import to_forecast_rows
+
+    service = await load_service()
+    df = await service.fetch_forecast()
+    media_type = negotiate(accept)
+    source = df.attrs.get("source", FORECAST_SOURCE)
+    if media_type:
+        return columnar_response(media_type, df, {"source": source})
     rows = [ForecastPoint(**item) for item in to_forecast_rows(df)]
-    return ForecastResponse(forecast=rows, source="BigQuery AI.FORECAST (TimesFM)")
+    return ForecastResponse(forecast=rows, source=source)
 
 
 @app.get("/forecast/sql")
 def get_forecast_sql() -> dict:
+    from backend.app.services.bigquery_service import forecast_sql_template
+
     return {"sql": forecast_sql_template()}
 
 
+@app.get("/cache/stats", response_model=CacheStatsResponse)
+def get_cache_stats() -> CacheStatsResponse:
+    return CacheStatsResponse(caches=get_service().cache_stats())
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/metrics/profiles")
+def get_profiles() -> dict:
+    return {"enabled": get_settings().profiling_enabled, "profiles": profiles.entries()}
+
+
 @app.get("/zones", response_model=ZonesResponse)
-def get_zones() -> ZonesResponse:
-    zone_df = service.zone_risk()
+async def get_zones(accept: Optional[str] = Header(default=None)) -> ZonesResponse:
+    service = await load_service()
+    zone_df = await asyncio.to_thread(service.zone_risk, inputs=await service.fetch_inputs())
+    media_type = negotiate(accept)
+    if media_type:
+        return columnar_response(media_type, zone_df)
     return ZonesResponse(zones=zone_df.to_dict(orient="records"))
 
 
+async def resolve_places(service, names, locations) -> list[str]:
+    """Road node names for request places, snapping GPS positions; 422 when a place has neither."""
+    if all(names) and not any(locations):
+        return list(names)
+    try:
+        # The first snap may build the spatial index; keep it off the event loop.
+        return await asyncio.to_thread(service.resolve_places, names, locations)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+@app.post("/snap", response_model=SnapResponse)
+async def snap_points(request: SnapRequest) -> SnapResponse:
+    service = await load_service()
+    latitude = [point.latitude for point in request.points]
+    longitude = [point.longitude for point in request.points]
+    snapped = await asyncio.to_thread(service.snap, latitude, longitude)
+    return SnapResponse(
+        points=[
+            SnappedPoint(zone_id=str(zone_id), node=str(node), distance_km=round(float(km), 4))
+            for zone_id, node, km in zip(snapped.zone_id, snapped.node, snapped.distance_km)
+        ]
+    )
+
+
 @app.post("/route", response_model=RouteResponse)
-def get_route(request: RouteRequest) -> RouteResponse:
-    route_dict, _, _ = service.route(request.source, request.destination)
+async def get_route(request: RouteRequest) -> RouteResponse:
+    service = await load_service()
+    source, destination = await resolve_places(
+        service, [request.source, request.destination], [request.source_location, request.destination_location]
+    )
+    inputs = await service.fetch_inputs()
+    route_dict, _, _ = await asyncio.to_thread(service.route, source, destination, inputs=inputs)
     return RouteResponse(**route_dict)
 
 
+@app.post("/route/batch", response_model=RouteBatchResponse)
+async def get_route_batch(request: RouteBatchRequest) -> RouteBatchResponse:
+    service = await load_service()
+    # Every GPS endpoint in the batch is snapped in one call.
+    places = await resolve_places(
+        service,
+        [pair.source for pair in request.pairs] + [pair.destination for pair in request.pairs],
+        [pair.source_location for pair in request.pairs] + [pair.destination_location for pair in request.pairs],
+    )
+    pairs = list(zip(places[: len(request.pairs)], places[len(request.pairs) :]))
+    inputs = await service.fetch_inputs()
+    routes, blocked_edges = await asyncio.to_thread(service.route_batch, pairs, request.alternatives, inputs=inputs)
+    return RouteBatchResponse(
+        routes=[BatchRoute(source=source, destination=destination, **route) for (source, destination), route in zip(pairs, routes)],
+        blocked_edges=blocked_edges,
+    )
+
+
+@app.post("/route/timed", response_model=TimedRouteResponse)
+async def get_timed_route(request: TimedRouteRequest) -> TimedRouteResponse:
+    import pandas as pd
+
+    service = await load_service()
+    source, destination = await resolve_places(
+        service, [request.source, request.destination], [request.source_location, request.destination_location]
+    )
+    inputs = await service.fetch_inputs()
+    result, origin = await asyncio.to_thread(
+        service.timed_route,
+        source,
+        destination,
+        depart_at=request.depart_at,
+        rainfall_increase_pct=request.rainfall_increase_pct,
+        time_steps=request.time_steps,
+        speed_kmph=request.speed_kmph,
+        inputs=inputs,
+    )
+
+    def at(hours: float) -> str:
+        return (origin + pd.Timedelta(hours=hours)).round("s").isoformat()
+
+    legs = [
+        TimedLeg(
+            source=leg["source"],
+            target=leg["target"],
+            enter_at=at(leg["enter_hours"]),
+            exit_at=at(leg["exit_hours"]),
+            wait_minutes=round(leg["wait_hours"] * 60.0, 2),
+        )
+        for leg in result["legs"]
+    ]
+    found = bool(result["route"])
+    return TimedRouteResponse(
+        algorithm=result["algorithm"],
+        route=result["route"],
+        depart_at=at(result["depart_hours"]),
+        arrive_at=at(result["arrive_hours"]) if found else None,
+        travel_minutes=round((result["arrive_hours"] - result["depart_hours"]) * 60.0, 2) if found else None,
+        wait_minutes=round(sum(leg.wait_minutes for leg in legs), 2),
+        legs=legs,
+    )
+
+
 @app.post("/deploy", response_model=DeployResponse)
-def deploy_units(request: DeployRequest) -> DeployResponse:
-    assignments, _ = service.deploy(request.units)
+async def deploy_units(request: DeployRequest) -> DeployResponse:
+    service = await load_service()
+    inputs = await service.fetch_inputs()
+    try:
+        assignments, _ = await asyncio.to_thread(service.deploy, request.units, inputs=inputs)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
     return DeployResponse(assignments=assignments)
 
 
 @app.post("/simulate", response_model=SimulationResponse)
-def simulate(request: SimulationRequest) -> SimulationResponse:
+async def simulate(request: SimulationRequest, accept: Optional[str] = Header(default=None)) -> SimulationResponse:
+    service = await load_service()
     units = request.units or []
-    multiplier, zone_df, blocked_roads, dispatch, route, clearance = service.simulate(
-        rainfall_increase_pct=request.rainfall_increase_pct,
-        source=request.source,
-        destination=request.destination,
-        units=units,
-    )
+    source, destination = request.source, request.destination
+    if request.source_location or request.destination_location:
+        source, destination = await resolve_places(service, [source, destination], [request.source_location, request.destination_location])
+    inputs = await service.fetch_inputs()
+    try:
+        multiplier, zone_df, blocked_roads, dispatch, route, clearance = await asyncio.to_thread(
+            service.simulate,
+            rainfall_increase_pct=request.rainfall_increase_pct,
+            source=source,
+            destination=destination,
+            units=units,
+            inputs=inputs,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    inundation = None
+    if request.time_steps:
+        series = await asyncio.to_thread(service.inundation, request.rainfall_increase_pct, request.time_steps, inputs=inputs)
+        inundation = inundation_payload(series, request.time_steps)
+    media_type = negotiate(accept)
+    if media_type:
+        meta = {
+            "rainfall_multiplier": multiplier,
+            "blocked_roads": blocked_roads,
+            "dispatch": dispatch,
+            "route": route,
+            "clearance_top5": clearance,
+            "inundation": inundation,
+        }
+        return columnar_response(media_type, zone_df, meta)
+
     route_resp = RouteResponse(**route) if route else None
     return SimulationResponse(
         rainfall_multiplier=multiplier,
@@ -80,4 +435,145 @@ def simulate(request: SimulationRequest) -> SimulationResponse:
         dispatch=dispatch,
         route=route_resp,
         clearance_top5=clearance,
+        inundation=inundation,
+    )
+
+
+def inundation_payload(series, time_steps: str) -> dict:
+    from backend.app.services.inundation_service import STEP_HOURS
+
+    stamps = [stamp.isoformat() for stamp in series.timestamps]
+    return {
+        "step_hours": STEP_HOURS[time_steps],
+        "timestamps": stamps,
+        "zone_ids": [str(zone_id) for zone_id in series.zone_ids],
+        "depth_cm": np.round(series.depth_cm, 3).tolist(),
+        "peak_depth_cm": np.round(series.peak_depth_cm, 3).tolist(),
+        "peak_at": [stamps[step] if stamps else "" for step in series.peak_step],
+    }
+
+
+@app.post("/simulate/batch", response_model=BatchSimulationResponse)
+async def simulate_batch(request: BatchSimulationRequest) -> BatchSimulationResponse:
+    service = await load_service()
+    inputs = await service.fetch_inputs()
+    try:
+        # Large sweeps are CPU-bound; keep them off the event loop.
+        pcts, batch, edges, blocked, threshold_pct = await asyncio.to_thread(
+            service.simulate_batch,
+            rainfall_increase_pcts=request.rainfall_increase_pcts,
+            start_pct=request.start_pct,
+            stop_pct=request.stop_pct,
+            step_pct=request.step_pct,
+            inputs=inputs,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    probability = batch.flood_probability.tolist()
+    levels = batch.risk_level.tolist()
+    depth = batch.estimated_water_depth.tolist()
+    scenarios = [
+        ScenarioResult(
+            rainfall_increase_pct=float(pct),
+            rainfall_multiplier=float(multiplier),
+            flood_probability=probability[i],
+            risk_levels=levels[i],
+            estimated_water_depth=depth[i],
+            blocked_roads=[edges[j] for j in blocked[i].nonzero()[0]],
+        )
+        for i, (pct, multiplier) in enumerate(zip(pcts, batch.multipliers))
+    ]
+    thresholds = [
+        RoadBlockThreshold(
+            source=source,
+            target=target,
+            blocked_above_pct=round(max(float(pct), 0.0), 2) if math.isfinite(pct) else None,
+        )
+        for (source, target), pct in zip(edges, threshold_pct)
+    ]
+    return BatchSimulationResponse(zone_ids=batch.zone_ids.tolist(), scenarios=scenarios, road_thresholds=thresholds)
+
+
+@app.post("/simulate/ensemble", response_model=EnsembleResponse)
+async def simulate_ensemble(request: EnsembleRequest) -> EnsembleResponse:
+    service = await load_service()
+    source, destination = request.source, request.destination
+    if request.source_location or request.destination_location:
+        source, destination = await resolve_places(service, [source, destination], [request.source_location, request.destination_location])
+    inputs = await service.fetch_inputs()
+    try:
+        # Members are spread over a process pool; the thread just waits on it.
+        result = await asyncio.to_thread(
+            service.simulate_ensemble,
+            members=request.members,
+            seed=request.seed,
+            rainfall_increase_pct=request.rainfall_increase_pct,
+            risk_level=request.risk_level,
+            depth_threshold_cm=request.depth_threshold_cm,
+            source=source,
+            destination=destination,
+            inputs=inputs,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    zones = [
+        ZoneExceedance(
+            zone_id=str(zone_id),
+            risk_exceedance_probability=float(risk),
+            depth_exceedance_probability=float(depth),
+            mean_flood_probability=round(float(probability), 4),
+            mean_water_depth=round(float(mean_depth), 3),
+        )
+        for zone_id, risk, depth, probability, mean_depth in zip(
+            result.zone_ids, result.risk_exceedance, result.depth_exceedance, result.mean_flood_probability, result.mean_water_depth
+        )
+    ]
+    # Roads never blocked in any member are left out; at city scale they are the vast majority.
+    order = np.argsort(-result.edge_blockage, kind="stable")
+    blocked = [
+        RoadBlockage(source=result.edges[i][0], target=result.edges[i][1], probability=float(result.edge_blockage[i]))
+        for i in order[: np.count_nonzero(result.edge_blockage)]
+    ]
+    return EnsembleResponse(
+        members=result.members,
+        seed=result.seed,
+        rainfall_multiplier=result.rainfall_multiplier,
+        zones=zones,
+        blocked_roads=blocked,
+        routes=[EnsembleRoute(**route) for route in result.routes] if result.routes is not None else None,
+        unreachable_probability=result.unreachable_probability,
+        routed_probability=result.routed_probability,
+    )
+
+
+@app.get("/events")
+async def stream_events(request: Request) -> StreamingResponse:
+    """Server-sent events: a ``snapshot`` on connect, then a ``diff`` whenever the risk state changes."""
+    return StreamingResponse(
+        broadcaster.stream(request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
+
+
+@app.post("/ingest/gauges", response_model=GaugeIngestResponse)
+def ingest_gauges(batch: GaugeBatch) -> GaugeIngestResponse:
+    accepted, dropped = get_service().ingest_gauges(batch.readings)
+    if accepted:
+        broadcaster.notify()
+    return GaugeIngestResponse(accepted=accepted, dropped=dropped)
+
+
+@app.get("/ingest/aggregates", response_model=RainfallAggregatesResponse)
+def get_rainfall_aggregates() -> RainfallAggregatesResponse:
+    zone_ids, totals = get_service().gauge_aggregates()
+    columns = [totals[hours].tolist() for hours in ROLLING_WINDOWS_HOURS]
+    return RainfallAggregatesResponse(
+        windows_hours=list(ROLLING_WINDOWS_HOURS),
+        zones={zone_id: [column[i] for column in columns] for i, zone_id in enumerate(zone_ids)},
+    )
+
+
+startup_seconds["import"] = time.perf_counter() - IMPORT_STARTED
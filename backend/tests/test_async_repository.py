@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import pandas as pd
+
+from backend.app.services import bigquery_service
+from backend.app.services.bigquery_service import AsyncBigQueryRepository, BigQueryRepository
+
+
+class FakeResult:
+    def __init__(self, df):
+        self.df = df
+
+    def to_dataframe(self):
+        return self.df
+
+
+class FakeJob:
+    def __init__(self, client, df, latency):
+        self.client = client
+        self.df = df
+        self.ready_at = time.monotonic() + latency
+        self.cancelled = threading.Event()
+        self.job_id = f'job-{len(client.jobs)}'
+
+    def done(self):
+        finished = time.monotonic() >= self.ready_at
+        if finished and not self.cancelled.is_set():
+            self.client.release(self)
+        return finished
+
+    def result(self, timeout=None):
+        return FakeResult(self.df)
+
+    def cancel(self):
+        self.cancelled.set()
+        self.client.release(self)
+        return True
+
+
+class FakeBigQueryClient:
+    """Local stand-in for bigquery.Client whose jobs finish after a fixed latency."""
+
+    def __init__(self, latency=0.2):
+        self.latency = latency
+        self.watermark = pd.Timestamp('2025-11-01 06:00', tz='UTC')
+        self.jobs = []
+        self.dry_runs = []
+        self.active = set()
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def query(self, sql, job_config=None):
+        if job_config is not None and job_config.dry_run:
+            self.dry_runs.append(sql)
+            return SimpleNamespace(total_bytes_processed=len(sql))
+        if 'AI.FORECAST' in sql:
+            df = BigQueryRepository._mock_forecast().assign(history_watermark=self.watermark)
+        elif 'history_watermark' in sql:
+            df = pd.DataFrame({'history_watermark': [self.watermark]})
+        else:
+            df = BigQueryRepository._mock_zones()
+        job = FakeJob(self, df, self.latency)
+        job.sql = sql
+        with self._lock:
+            self.jobs.append(job)
+            self.active.add(job)
+            self.max_active = max(self.max_active, len(self.active))
+        return job
+
+    def release(self, job):
+        with self._lock:
+            self.active.discard(job)
+
+
+class AsyncRepositoryTests(unittest.TestCase):
+    def make_repo(self, latency=0.2, **kwargs):
+        self.client = FakeBigQueryClient(latency)
+        return AsyncBigQueryRepository(BigQueryRepository(client=self.client), **kwargs)
+
+    def test_forecast_and_zones_are_fetched_concurrently(self):
+        repo = self.make_repo(0.3)
+        started = time.perf_counter()
+        forecast_df, zones_df = asyncio.run(repo.fetch_inputs())
+        self.assertLess(time.perf_counter() - started, 0.55)
+        self.assertIn('predicted_rainfall', forecast_df.columns)
+        self.assertIn('zone_id', zones_df.columns)
+        self.assertEqual(self.client.max_active, 2)
+
+    def test_limiter_bounds_concurrent_jobs(self):
+        repo = self.make_repo(0.15, max_concurrency=1)
+        asyncio.run(repo.fetch_inputs())
+        self.assertEqual(self.client.max_active, 1)
+
+    def test_concurrent_callers_share_one_job_and_result_is_cached(self):
+        repo = self.make_repo(0.1)
+
+        async def scenario():
+            await asyncio.gather(*(repo.forecast_rainfall() for _ in range(5)))
+            await repo.forecast_rainfall()
+
+        asyncio.run(scenario())
+        self.assertEqual(len(self.client.jobs), 1)
+        self.assertEqual(repo.repo.cache.stats()['forecast']['hits'], 1)
+
+    def test_timeout_cancels_the_job(self):
+        repo = self.make_repo(5.0, timeout_seconds=0.1)
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(repo.forecast_rainfall())
+        self.assertTrue(self.client.jobs[0].cancelled.wait(1.0))
+
+
+class IncrementalForecastTests(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeBigQueryClient(0.01)
+        self.repo = AsyncBigQueryRepository(BigQueryRepository(client=self.client))
+
+    def forecast_jobs(self):
+        return sum('AI.FORECAST' in job.sql for job in self.client.jobs)
+
+    def test_query_sends_a_bounded_per_zone_window(self):
+        sql = self.repo.repo.forecast_sql()
+        self.assertIn('TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 90 DAY)', sql)
+        self.assertIn("id_cols => ['zone_id']", sql)
+        self.assertNotIn('ORDER BY timestamp', sql)
+
+    def test_refresh_without_new_rainfall_reuses_forecast(self):
+        first = asyncio.run(self.repo.forecast_rainfall())
+        self.repo.repo.cache.invalidate()
+        second = asyncio.run(self.repo.forecast_rainfall())
+        self.assertIs(second, first)
+        self.assertEqual(self.forecast_jobs(), 1)
+
+        self.client.watermark += pd.Timedelta(hours=1)
+        self.repo.repo.cache.invalidate()
+        asyncio.run(self.repo.forecast_rainfall())
+        self.assertEqual(self.forecast_jobs(), 2)
+        self.assertEqual(self.repo.repo.forecast_watermark, self.client.watermark)
+
+    def test_sync_refresh_reuses_forecast(self):
+        repo = self.repo.repo
+        repo.forecast_rainfall()
+        repo.cache.invalidate()
+        repo.forecast_rainfall()
+        self.assertEqual(self.forecast_jobs(), 1)
+        self.assertEqual(len(self.client.jobs), 2)
+
+    def test_each_query_text_is_dry_run_once(self):
+        bigquery = SimpleNamespace(QueryJobConfig=lambda **options: SimpleNamespace(**options))
+        with mock.patch.object(bigquery_service, '_bigquery_modules', return_value=(bigquery, None)):
+            for _ in range(3):
+                self.repo.repo.cache.invalidate()
+                asyncio.run(self.repo.fetch_inputs())
+        self.assertEqual(len(self.client.jobs), 6)
+        self.assertEqual(sorted(self.client.dry_runs), sorted({job.sql for job in self.client.jobs}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+
+from benchmarks import generators
+from benchmarks.run_benchmarks import compare, run_size, run_startup
+
+
+class GeneratorTests(unittest.TestCase):
+    def test_seeded_and_sized(self):
+        zones = generators.zone_frame(50, seed=3)
+        self.assertEqual(len(zones), 50)
+        self.assertTrue(zones.equals(generators.zone_frame(50, seed=3)))
+        self.assertFalse(zones.equals(generators.zone_frame(50, seed=4)))
+        fleet = generators.unit_fleet(7, zones['zone_id'], seed=3)
+        self.assertEqual(len(fleet), 7)
+        self.assertTrue(set(unit.current_zone for unit in fleet) <= set(zones['zone_id']))
+
+    def test_grid_network_shape(self):
+        network = generators.grid_network(12)
+        self.assertEqual(network.num_nodes, 12)
+        self.assertEqual(network.num_edges, 17)
+        self.assertEqual(list(network.nodes), list(generators.zone_ids(12)))
+        self.assertTrue(np.all(network.base_distance > 0))
+
+    def test_scale_free_network_has_hubs(self):
+        network = generators.scale_free_network(2000, seed=1)
+        degree = np.bincount(np.concatenate([network.edge_source, network.edge_target]), minlength=2000)
+        self.assertTrue(np.all(degree >= 1))
+        self.assertGreater(degree.max(), 10 * np.median(degree))
+        np.testing.assert_array_equal(network.edge_target, generators.scale_free_network(2000, seed=1).edge_target)
+
+
+class HarnessTests(unittest.TestCase):
+    def test_small_run_covers_every_stage(self):
+        results = run_size(10, 'grid', seed=0, budget_seconds=0.0, routes=2)
+        names = {result.name for result in results}
+        self.assertEqual(
+            names,
+            {
+                'routing_engine_init',
+                'compute_zone_risk',
+                'build_graph',
+                'get_safe_route',
+                'assign_units',
+                'prioritize',
+                'snap_positions',
+                'simulate',
+            },
+        )
+        self.assertTrue(all(result.median_ms >= 0 and result.repeats >= 1 for result in results))
+
+    def test_startup_cases(self):
+        results = run_startup(repeats=1)
+        self.assertEqual(
+            {(result.name, result.topology) for result in results},
+            {(name, topology) for name in ('app_import', 'first_response') for topology in ('cold', 'warm_start')},
+        )
+        timings = {(result.name, result.topology): result.median_ms for result in results}
+        for topology in ('cold', 'warm_start'):
+            self.assertGreater(timings['first_response', topology], timings['app_import', topology])
+
+    def test_compare_flags_regressions(self):
+        baseline = [{'name': 'simulate', 'topology': 'grid', 'size': 10, 'median_ms': 10.0}]
+        self.assertEqual(compare([{**baseline[0], 'median_ms': 12.0}], baseline, 0.25), [])
+        self.assertEqual(len(compare([{**baseline[0], 'median_ms': 13.0}], baseline, 0.25)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import threading
+import time
+import unittest
+
+from backend.app.services.bigquery_service import QueryCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class QueryCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = QueryCache(ttls={'forecast': 10.0}, stale_seconds=5.0, clock=self.clock)
+        self.calls = 0
+
+    def loader(self):
+        self.calls += 1
+        return self.calls
+
+    def test_fresh_entry_is_served_from_cache(self):
+        self.assertEqual(self.cache.get('forecast', self.loader), 1)
+        self.assertEqual(self.cache.get('forecast', self.loader), 1)
+        stats = self.cache.stats()['forecast']
+        self.assertEqual((stats['misses'], stats['hits'], stats['version']), (1, 1, 1))
+
+    def test_stale_entry_is_served_while_refreshing(self):
+        self.cache.get('forecast', self.loader)
+        self.clock.now = 12.0
+        self.assertEqual(self.cache.get('forecast', self.loader), 1)
+        deadline = time.time() + 2
+        while self.cache.version('forecast') < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.cache.get('forecast', self.loader), 2)
+        self.assertEqual(self.cache.stats()['forecast']['refreshes'], 1)
+
+    def test_expired_entry_reloads_synchronously(self):
+        self.cache.get('forecast', self.loader)
+        self.clock.now = 20.0
+        self.assertEqual(self.cache.get('forecast', self.loader), 2)
+
+    def test_concurrent_misses_share_one_load(self):
+        gate = threading.Event()
+
+        def slow_loader():
+            gate.wait(2)
+            return self.loader()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get('forecast', slow_loader))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        gate.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [1] * 8)
+        self.assertEqual(self.calls, 1)
+        stats = self.cache.stats()['forecast']
+        self.assertEqual(stats['misses'] + stats['coalesced'], 8)
+
+    def test_loader_errors_are_not_cached(self):
+        def failing():
+            raise RuntimeError('bigquery unavailable')
+
+        with self.assertRaises(RuntimeError):
+            self.cache.get('forecast', failing)
+        self.assertEqual(self.cache.get('forecast', self.loader), 1)
+        self.assertEqual(self.cache.stats()['forecast']['errors'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backend.app.services.clearance_service import (
+    DEFAULT_HOSPITAL_PROXIMITY_KM,
+    DEFAULT_PUMP_CAPACITY_M3_PER_HOUR,
+    DEFAULT_ROAD_AREA_M2,
+    RoadClearanceService,
+    load_road_assets,
+)
+
+
+def zone_frame(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            'zone_id': [f'Z{i}' for i in range(count)],
+            'estimated_water_depth': rng.uniform(0, 120, count),
+            'population_density': rng.uniform(5_000, 30_000, count),
+            'road_importance_score': rng.uniform(0.3, 1.0, count),
+        }
+    )
+
+
+def reference(blocked_edges, zone_df, assets, k):
+    zone_map = zone_df.set_index('zone_id').to_dict('index')
+    asset_map = assets.set_index('zone_id').to_dict('index')
+    rows = []
+    for source, target in blocked_edges:
+        a, b = zone_map.get(source), zone_map.get(target)
+        if not a or not b:
+            continue
+        asset = asset_map.get(f'{source}-{target}') or asset_map.get(f'{target}-{source}')
+        area = asset['road_area_m2'] if asset else DEFAULT_ROAD_AREA_M2
+        pump = asset['pump_capacity_m3_per_hour'] if asset else DEFAULT_PUMP_CAPACITY_M3_PER_HOUR
+        hospital = asset['hospital_proximity_km'] if asset else DEFAULT_HOSPITAL_PROXIMITY_KM
+        depth = max(a['estimated_water_depth'], b['estimated_water_depth'])
+        priority = max(a['population_density'], b['population_density']) * max(
+            a['road_importance_score'], b['road_importance_score']
+        ) / hospital
+        rows.append((f'{source}-{target}', depth, area * depth / 100 / pump, priority))
+    return sorted(rows, key=lambda row: row[3], reverse=True)[:k]
+
+
+class RoadClearanceTests(unittest.TestCase):
+    def setUp(self):
+        self.zones = zone_frame(200)
+        rng = np.random.default_rng(1)
+        pairs = rng.integers(0, 200, size=(3000, 2))
+        self.edges = [[f'Z{a}', f'Z{b}'] for a, b in pairs if a != b] + [['Z1', 'Unknown']]
+        listed = self.edges[::3]
+        self.assets = pd.DataFrame(
+            {
+                'road_id': [f'R-{i:05d}' for i in range(len(listed))],
+                'zone_id': [f'{b}-{a}' if i % 2 else f'{a}-{b}' for i, (a, b) in enumerate(listed)],
+                'road_area_m2': rng.uniform(1_000, 9_000, len(listed)),
+                'pump_capacity_m3_per_hour': rng.uniform(200, 600, len(listed)),
+                'hospital_proximity_km': rng.uniform(0.2, 6.0, len(listed)),
+            }
+        )
+
+    def test_matches_row_by_row_scoring(self):
+        service = RoadClearanceService(self.assets, top_k=10)
+        result = service.prioritize(self.edges, self.zones)
+        expected = reference(self.edges, self.zones, self.assets.drop_duplicates('zone_id'), 10)
+        self.assertEqual([item.zone_id for item in result], [row[0] for row in expected])
+        for item, (_, depth, hours, priority) in zip(result, expected):
+            self.assertAlmostEqual(item.water_depth_cm, round(depth, 2))
+            self.assertAlmostEqual(item.clearance_time_hours, round(hours, 2))
+            self.assertAlmostEqual(item.priority_score, round(priority, 2))
+
+    def test_road_ids_come_from_asset_table(self):
+        assets = pd.DataFrame(
+            [['R-9', 'Z2-Z1', 4000.0, 400.0, 1.0]],
+            columns=['road_id', 'zone_id', 'road_area_m2', 'pump_capacity_m3_per_hour', 'hospital_proximity_km'],
+        )
+        result = RoadClearanceService(assets).prioritize([['Z1', 'Z2'], ['Z3', 'Z4']], self.zones, k=2)
+        by_zone = {item.zone_id: item for item in result}
+        self.assertEqual(by_zone['Z1-Z2'].road_id, 'R-9')
+        self.assertEqual(by_zone['Z3-Z4'].road_id, 'Z3-Z4')
+
+    def test_k_and_empty_inputs(self):
+        service = RoadClearanceService(self.assets)
+        self.assertEqual(len(service.prioritize(self.edges, self.zones)), 5)
+        self.assertEqual(len(service.prioritize(self.edges[:3], self.zones, k=50)), 3)
+        self.assertEqual(service.prioritize([], self.zones), [])
+        self.assertEqual(service.prioritize(self.edges, self.zones, k=0), [])
+
+    def test_bundled_assets_cover_default_network(self):
+        assets = load_road_assets()
+        self.assertEqual(len(assets), 7)
+        self.assertIn('T_Nagar-Guindy', set(assets['zone_id']))
+
+    def test_cyclone_scale(self):
+        zones = zone_frame(20_000, seed=2)
+        pairs = np.random.default_rng(3).integers(0, 20_000, size=(50_000, 2))
+        edges = [[f'Z{a}', f'Z{b}'] for a, b in pairs]
+        service = RoadClearanceService(self.assets)
+        start = time.perf_counter()
+        result = service.prioritize(edges, zones)
+        self.assertLess(time.perf_counter() - start, 2.0)
+        scores = [item.priority_score for item in result]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
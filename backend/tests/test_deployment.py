@@ -0,0 +1,159 @@
+import unittest
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from backend.app.models.schemas import EmergencyUnit
+from backend.app.services.deployment_service import EmergencyDeploymentService, solve_dispatch, zone_demand
+from backend.app.services.route_matrix import RouteMatrixService
+from backend.app.services.routing_service import RoadNetwork, RoutingEngine
+from backend.tests.test_routing import grid_network
+
+
+class RouteMatrixTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = RoutingEngine(grid_network(6))
+        nodes = self.engine.network.nodes
+        self.graph = self.engine.reweight(nodes, np.zeros(len(nodes)), np.zeros(len(nodes)))
+
+    def test_distances_match_networkx(self):
+        reference = nx.Graph()
+        reference.add_weighted_edges_from(self.engine.base_edges)
+        matrix = RouteMatrixService()
+        km = matrix.distances_km(self.graph, [0, 7, 20], [3, 35])
+        for i, source in enumerate([0, 7, 20]):
+            for j, target in enumerate([3, 35]):
+                expected = nx.dijkstra_path_length(reference, self.engine.network.nodes[source], self.engine.network.nodes[target])
+                self.assertAlmostEqual(km[i, j], expected)
+
+    def test_rows_are_cached_per_graph_version(self):
+        matrix = RouteMatrixService()
+        matrix.distances_km(self.graph, [0, 1], [5, 6, 7])
+        self.assertEqual(set(matrix._rows[self.graph.version]), {0, 1})
+        matrix.distances_km(self.graph, [0], [5])
+        self.assertEqual(len(matrix._rows), 1)
+
+
+class DeploymentTests(unittest.TestCase):
+    def test_nearest_unit_is_sent_to_each_severe_zone(self):
+        engine = RoutingEngine(grid_network(6))
+        nodes = engine.network.nodes
+        zone_df = pd.DataFrame(
+            {
+                'zone_id': nodes,
+                'flood_probability': [0.9 if zone in ('0_0', '5_5') else 0.1 for zone in nodes],
+                'risk_level': ['CRITICAL' if zone in ('0_0', '5_5') else 'LOW' for zone in nodes],
+                'estimated_water_depth': 0.0,
+            }
+        )
+        graph, _ = engine.build_graph(zone_df)
+        units = [EmergencyUnit(unit_id='near_far_corner', current_zone='5_4'), EmergencyUnit(unit_id='near_origin', current_zone='0_1')]
+        assignments = EmergencyDeploymentService().assign_units(units, zone_df, graph)
+        self.assertEqual({a.unit_id: a.zone_id for a in assignments}, {'near_far_corner': '5_5', 'near_origin': '0_0'})
+
+    def test_units_cross_the_last_flooded_road_into_a_deep_zone(self):
+        engine = RoutingEngine(grid_network(6))
+        nodes = engine.network.nodes
+        zone_df = pd.DataFrame(
+            {
+                'zone_id': nodes,
+                'flood_probability': [0.95 if zone == '2_2' else 0.1 for zone in nodes],
+                'risk_level': ['CRITICAL' if zone == '2_2' else 'LOW' for zone in nodes],
+                # Deeper than BLOCKED_DEPTH_CM: every road into 2_2 is closed.
+                'estimated_water_depth': [45.0 if zone == '2_2' else 0.0 for zone in nodes],
+            }
+        )
+        graph, blocked = engine.build_graph(zone_df)
+        self.assertEqual(len(blocked), 4)
+        units = [EmergencyUnit(unit_id=f'U{i}', current_zone=zone) for i, zone in enumerate(['2_1', '5_5', '0_0'])]
+        assignments = EmergencyDeploymentService().assign_units(units, zone_df, graph)
+        placed = {a.unit_id: a for a in assignments}
+        self.assertEqual(set(placed), {'U0', 'U2'})
+        self.assertTrue(all(a.zone_id == '2_2' for a in assignments))
+        # U0 sits next to 2_2: one local hop to its own node plus the flooded road.
+        self.assertLess(placed['U0'].eta_minutes, placed['U2'].eta_minutes)
+
+    def test_dense_critical_zone_gets_several_units(self):
+        engine = RoutingEngine(grid_network(6))
+        nodes = engine.network.nodes
+        zone_df = pd.DataFrame(
+            {
+                'zone_id': nodes,
+                'flood_probability': [0.9 if zone == '0_0' else 0.7 if zone == '5_5' else 0.1 for zone in nodes],
+                'risk_level': ['CRITICAL' if zone == '0_0' else 'HIGH' if zone == '5_5' else 'LOW' for zone in nodes],
+                'estimated_water_depth': 0.0,
+                'population_density': [30000.0 if zone == '0_0' else 10000.0 for zone in nodes],
+            }
+        )
+        graph, _ = engine.build_graph(zone_df)
+        units = [EmergencyUnit(unit_id=f'U{i}', current_zone=zone) for i, zone in enumerate(['0_1', '1_0', '1_1', '2_2', '4_5'])]
+        service = EmergencyDeploymentService()
+        assignments = service.assign_units(units, zone_df, graph, commit=True)
+        placed = {a.unit_id: a.zone_id for a in assignments}
+        # 0_0 is CRITICAL at 1.5x the reference density: three units; 5_5 is HIGH: one.
+        self.assertEqual(sorted(placed.values()), ['0_0', '0_0', '0_0', '5_5'])
+        self.assertEqual(placed['U4'], '5_5')
+        self.assertEqual(service.committed, placed)
+
+    def test_committed_units_are_not_moved_for_marginal_gains(self):
+        # p0 - p1 - p2 - p3, 1 km apart; the severe zones sit at both ends.
+        engine = RoutingEngine(RoadNetwork.from_edges([('p0', 'p1', 1.0), ('p1', 'p2', 1.0), ('p2', 'p3', 1.0)]))
+        zone_df = pd.DataFrame(
+            {
+                'zone_id': ['p0', 'p1', 'p2', 'p3'],
+                'flood_probability': [0.9, 0.1, 0.1, 0.9],
+                'risk_level': ['HIGH', 'LOW', 'LOW', 'HIGH'],
+                'estimated_water_depth': 0.0,
+            }
+        )
+        graph, _ = engine.build_graph(zone_df)
+        units = [EmergencyUnit(unit_id='U1', current_zone='p1'), EmergencyUnit(unit_id='U2', current_zone='p2')]
+        service = EmergencyDeploymentService()
+        fresh = {a.unit_id: a.zone_id for a in service.assign_units(units, zone_df, graph)}
+        self.assertEqual(fresh, {'U1': 'p0', 'U2': 'p3'})
+
+        # Swapping the committed units would save 2 km (about 3.4 minutes), less than two switch penalties.
+        service.committed = {'U1': 'p3', 'U2': 'p0'}
+        kept = {a.unit_id: a.zone_id for a in service.assign_units(units, zone_df, graph)}
+        self.assertEqual(kept, service.committed)
+
+
+class DispatchFlowTests(unittest.TestCase):
+    def test_demand_by_level_and_density(self):
+        severe = pd.DataFrame({'risk_level': ['HIGH', 'CRITICAL', 'CRITICAL', 'HIGH'], 'population_density': [10000.0, 20000.0, 50000.0, 1e7]})
+        np.testing.assert_array_equal(zone_demand(severe), [1, 2, 5, 6])
+
+    def test_matches_networkx_min_cost_max_flow(self):
+        rng = np.random.default_rng(4)
+        for _ in range(25):
+            n_zones, n_units = int(rng.integers(1, 6)), int(rng.integers(1, 9))
+            demand = rng.integers(1, 4, n_zones)
+            values = [sorted(rng.integers(0, 30, d).tolist(), reverse=True) for d in demand]
+            pairs = np.unique(rng.integers(0, n_zones * n_units, rng.integers(1, n_zones * n_units + 1)))
+            arc_zone, arc_unit = pairs // n_units, pairs % n_units
+            cost = rng.integers(0, 40, len(pairs)).astype(float)
+
+            reference = nx.DiGraph()
+            for z, d in enumerate(demand):
+                for j in range(d):
+                    reference.add_edge('s', ('slot', z, j), capacity=1, weight=-values[z][j])
+                    reference.add_edge(('slot', z, j), ('zone', z), capacity=1, weight=0)
+            for z, u, c in zip(arc_zone, arc_unit, cost):
+                reference.add_edge(('zone', z), ('unit', u), capacity=1, weight=int(c))
+            for u in range(n_units):
+                reference.add_edge(('unit', u), 't', capacity=1, weight=0)
+            flow = nx.max_flow_min_cost(reference, 's', 't')
+
+            arcs = solve_dispatch(demand, values, arc_zone, arc_unit, cost, n_units)
+            placed = arcs[arcs >= 0]
+            np.testing.assert_array_equal(arc_unit[arcs[arcs >= 0]], np.flatnonzero(arcs >= 0))
+            filled = np.bincount(arc_zone[placed], minlength=n_zones)
+            self.assertTrue(np.all(filled <= demand))
+            self.assertEqual(len(placed), sum(flow['s'].values()))
+            total = cost[placed].sum() - sum(sum(values[z][: filled[z]]) for z in range(n_zones))
+            self.assertAlmostEqual(total, nx.cost_of_flow(reference, flow))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import pickle
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from backend.app.services import ensemble_service
+from backend.app.services.ensemble_service import EnsembleKernel, EnsemblePool, EnsembleTally, RainfallDistribution, route_patterns, run_ensemble
+from backend.app.services.model_service import ModelScorer
+from backend.app.services.risk_engine import RiskEngine
+from backend.app.services.routing_service import RoadNetwork, RoutingEngine
+from backend.app.services.system_service import FloodDefenseService
+
+
+def bounded_forecast():
+    return pd.DataFrame(
+        {
+            'zone_id': ['A', 'A', 'B', 'B'],
+            'forecast_timestamp': ['2025-11-01', '2025-11-02'] * 2,
+            'predicted_rainfall': [40.0, 60.0, 10.0, 10.0],
+            'lower_bound': [20.0, 30.0, 10.0, 10.0],
+            'upper_bound': [80.0, 100.0, 10.0, 10.0],
+        }
+    )
+
+
+class RainfallDistributionTests(unittest.TestCase):
+    def test_split_normal_from_bounds(self):
+        distribution = RainfallDistribution.from_forecast(bounded_forecast(), ['A', 'B', 'C'], confidence=0.8)
+        self.assertEqual(distribution.mean.shape, (2, 3))
+        np.testing.assert_array_equal(distribution.zone_series, [0, 1, 2])
+        # Zone C has no rows of its own and follows the all-row mean.
+        np.testing.assert_allclose(distribution.mean[:, 2], [25.0, 35.0])
+        self.assertGreater(distribution.sigma_high[0, 0], distribution.sigma_low[0, 0])
+
+        rain = distribution.sample(np.random.default_rng(0), 20_000)
+        self.assertEqual(rain.shape, (20_000, 3))
+        self.assertTrue(np.all(rain >= 0))
+        np.testing.assert_allclose(rain[:, 1], 10.0)
+        self.assertGreater(rain[:, 0].std(), 5.0)
+        # Upper bounds sit further from the forecast than lower ones, so draws skew wet of the 50 mm forecast.
+        self.assertTrue(50.0 < rain[:, 0].mean() < 60.0)
+
+    def test_forecast_without_bounds_gets_default_spread(self):
+        forecast = pd.DataFrame({'forecast_timestamp': ['2025-11-01'], 'predicted_rainfall': [100.0]})
+        distribution = RainfallDistribution.from_forecast(forecast, ['A'])
+        self.assertGreater(distribution.sigma_low[0, 0], 0.0)
+
+
+ZONES = pd.DataFrame(
+    {
+        'zone_id': ['A', 'B'],
+        'elevation': [3.0, 8.0],
+        'drainage_capacity': [20.0, 45.0],
+        'population_density': [1.0, 1.0],
+        'road_importance_score': [1.0, 1.0],
+    }
+)
+
+
+class EnsembleKernelTests(unittest.TestCase):
+    def kernel(self):
+        engine = RiskEngine.from_frames(ZONES, bounded_forecast())
+        distribution = RainfallDistribution.from_forecast(bounded_forecast(), engine.zone_ids)
+        return EnsembleKernel(engine.detached(), distribution, 4.0, np.array([0]), np.array([1]), risk_code=2)
+
+    def test_seeded_results_do_not_depend_on_workers(self):
+        kernel = self.kernel()
+        inline = run_ensemble(kernel, 600, seed=7, workers=1)
+        pooled = run_ensemble(kernel, 600, seed=7, workers=2)
+        self.assertEqual(inline.members, 600)
+        np.testing.assert_array_equal(inline.depth_exceeded, pooled.depth_exceeded)
+        np.testing.assert_array_equal(inline.edge_blocked, pooled.edge_blocked)
+        self.assertEqual(inline.patterns, pooled.patterns)
+        self.assertEqual(sum(inline.patterns.values()), 600)
+
+    def test_pool_is_reused_across_ensembles(self):
+        kernel = self.kernel()
+        pool = EnsemblePool(2)
+        try:
+            first = run_ensemble(kernel, 600, seed=7, pool=pool)
+            executor = pool.executor()
+            second = run_ensemble(kernel, 600, seed=7, pool=pool)
+            self.assertIs(pool.executor(), executor)
+        finally:
+            pool.shutdown()
+        self.assertEqual(first.patterns, second.patterns)
+        np.testing.assert_array_equal(first.edge_blocked, run_ensemble(kernel, 600, seed=7, workers=1).edge_blocked)
+
+    def test_blockage_follows_flooded_endpoints(self):
+        tally = run_ensemble(self.kernel(), 1000, seed=1, workers=1)
+        # At 4x, zone A (about 200 mm against 20 mm drainage) sits at the 20 cm line; zone B never floods.
+        self.assertTrue(0 < tally.depth_exceeded[0] < 1000)
+        self.assertEqual(tally.depth_exceeded[1], 0)
+        self.assertEqual(tally.edge_blocked[0], tally.depth_exceeded[0])
+
+    def test_detached_engine_pickles_with_model_scorer(self):
+        engine = RiskEngine.from_frames(ZONES, bounded_forecast(), scorer=ModelScorer())
+        restored = pickle.loads(pickle.dumps(engine.detached()))
+        rain = np.array([[50.0, 10.0], [250.0, 90.0]])
+        np.testing.assert_allclose(
+            restored.evaluate_forecasts(rain).flood_probability, engine.evaluate_forecasts(rain).flood_probability
+        )
+
+
+class RoutePatternTests(unittest.TestCase):
+    def test_road_nodes_are_matched_to_their_zones(self):
+        network = RoadNetwork.from_edges(
+            [('a1', 'b1', 1.0), ('b1', 'c1', 1.0), ('a1', 'c1', 5.0)], node_zone={'a1': 'A', 'b1': 'B', 'c1': 'C'}
+        )
+        routing = RoutingEngine(network)
+        zone_ids = np.array(['A', 'B', 'C'], dtype=object)
+        graph = routing.reweight(zone_ids, np.zeros(3), np.zeros(3))
+        edge_index, src, dst = routing.edge_zone_positions(zone_ids)
+        flood_b = np.packbits([False, True, False]).tobytes()
+        empty = np.zeros(3)
+        tally = EnsembleTally(10, empty, empty, empty, empty, np.zeros(3), {bytes(1): 5, flood_b: 5})
+        routes, unreachable, routed = route_patterns(routing, graph, tally, zone_ids, edge_index, src, dst, 'a1', 'c1')
+        self.assertEqual([(route['route'], route['probability']) for route in routes], [(['a1', 'b1', 'c1'], 0.5), (['a1', 'c1'], 0.5)])
+        self.assertEqual((unreachable, routed), (0.0, 1.0))
+
+
+class EnsembleServiceTests(unittest.TestCase):
+    def test_mock_inputs_give_probabilities_and_routes(self):
+        service = FloodDefenseService()
+        with mock.patch.object(ensemble_service, 'MIN_POOL_MEMBERS', 10**9):
+            result = service.simulate_ensemble(500, seed=3, rainfall_increase_pct=250, source='T_Nagar', destination='Adyar')
+            again = service.simulate_ensemble(500, seed=3, rainfall_increase_pct=250)
+        self.assertEqual(len(result.zone_ids), 5)
+        self.assertTrue(np.all((result.depth_exceedance >= 0) & (result.depth_exceedance <= 1)))
+        self.assertTrue(np.any((result.edge_blockage > 0) & (result.edge_blockage < 1)))
+        np.testing.assert_array_equal(result.edge_blockage, again.edge_blockage)
+        total = sum(route['probability'] for route in result.routes) + result.unreachable_probability
+        self.assertAlmostEqual(total, result.routed_probability)
+
+    def test_rejects_oversized_ensembles(self):
+        with self.assertRaises(ValueError):
+            FloodDefenseService().simulate_ensemble(ensemble_service.MAX_ENSEMBLE_MEMBERS + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
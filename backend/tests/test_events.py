@@ -0,0 +1,106 @@
+import asyncio
+import json
+import unittest
+
+from backend.app.services.events_service import RiskEventBroadcaster, RiskState
+from backend.app.services.system_service import FloodDefenseService
+
+
+def parse(chunk):
+    fields = dict(line.split(': ', 1) for line in chunk.decode().strip().split('\n'))
+    return fields['event'], int(fields['id']), json.loads(fields['data'])
+
+
+def state(levels, blocked=(), clearance=()):
+    return RiskState(
+        zones={zone: (level, 0.5) for zone, level in levels.items()},
+        blocked=set(blocked),
+        clearance=[{'road_id': road} for road in clearance],
+    )
+
+
+class RiskStateDiffTests(unittest.TestCase):
+    def test_diff_reports_only_changes(self):
+        before = state({'A': 'LOW', 'B': 'HIGH'}, blocked=[('A', 'B')], clearance=['R-1', 'R-2'])
+        after = state({'A': 'MEDIUM', 'B': 'HIGH'}, blocked=[('B', 'C')], clearance=['R-2', 'R-1'])
+        changes = after.diff(before)
+        self.assertEqual([z['zone_id'] for z in changes['zones']], ['A'])
+        self.assertEqual(changes['blocked'], [['B', 'C']])
+        self.assertEqual(changes['reopened'], [['A', 'B']])
+        self.assertEqual([c['road_id'] for c in changes['clearance']], ['R-2', 'R-1'])
+        self.assertEqual(after.diff(after), {})
+
+    def test_state_from_service_results(self):
+        zone_df, blocked, clearance = FloodDefenseService().baseline_state()
+        risk_state = RiskState.from_results(zone_df, blocked, clearance)
+        self.assertEqual(set(risk_state.zones), set(zone_df['zone_id']))
+        self.assertEqual(len(risk_state.clearance), len(clearance))
+
+
+class BroadcasterTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.states = [state({'A': 'LOW'})]
+
+        async def compute():
+            return self.states[-1]
+
+        self.broadcaster = RiskEventBroadcaster(compute, poll_seconds=60, queue_size=4)
+
+    async def test_one_computation_per_change_for_all_subscribers(self):
+        queues = [self.broadcaster.subscribe() for _ in range(1000)]
+        await self.broadcaster.refresh()
+        self.states.append(state({'A': 'CRITICAL'}, blocked=[('A', 'B')]))
+        await self.broadcaster.refresh()
+        self.assertFalse(await self.broadcaster.refresh())
+
+        self.assertEqual(self.broadcaster.computations, 3)
+        first, second = queues[0].get_nowait(), queues[0].get_nowait()
+        self.assertTrue(queues[0].empty())
+        self.assertIs(queues[-1].get_nowait(), first)
+        self.assertEqual(parse(first)[0], 'snapshot')
+        event, event_id, data = parse(second)
+        self.assertEqual((event, event_id), ('diff', 2))
+        self.assertEqual(data['zones'][0]['risk_level'], 'CRITICAL')
+        self.assertEqual(data['blocked'], [['A', 'B']])
+
+    async def test_late_subscriber_gets_current_snapshot(self):
+        await self.broadcaster.refresh()
+        self.states.append(state({'A': 'HIGH'}))
+        await self.broadcaster.refresh()
+        event, event_id, data = parse(self.broadcaster.subscribe().get_nowait())
+        self.assertEqual((event, event_id), ('snapshot', 2))
+        self.assertEqual(data['zones'][0]['risk_level'], 'HIGH')
+
+    async def test_stalled_subscriber_resyncs_from_snapshot(self):
+        queue = self.broadcaster.subscribe()
+        for level in ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL', 'LOW', 'HIGH']:
+            self.states.append(state({'A': level}))
+            await self.broadcaster.refresh()
+        chunks = [queue.get_nowait() for _ in range(queue.qsize())]
+        event, _, data = parse(chunks[0])
+        self.assertEqual(event, 'snapshot')
+        self.assertLessEqual(len(chunks), 4)
+        self.assertEqual(parse(chunks[-1])[2].get('zones', data['zones'])[0]['risk_level'], 'HIGH')
+
+    async def test_background_task_pushes_changes(self):
+        self.broadcaster.poll_seconds = 0.01
+        self.broadcaster.start()
+        try:
+            stream = self.broadcaster.stream(self.never_disconnected)
+            event, _, _ = parse(await asyncio.wait_for(stream.__anext__(), 1))
+            self.assertEqual(event, 'snapshot')
+            self.states.append(state({'A': 'HIGH'}))
+            event, _, data = parse(await asyncio.wait_for(stream.__anext__(), 1))
+            self.assertEqual((event, data['zones'][0]['risk_level']), ('diff', 'HIGH'))
+            await stream.aclose()
+            self.assertEqual(self.broadcaster.subscribers, 0)
+        finally:
+            await self.broadcaster.stop()
+
+    @staticmethod
+    async def never_disconnected():
+        return False
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backend.app.services.bigquery_service import AsyncBigQueryRepository, BigQueryRepository
+from backend.app.services.forecast_service import LOCAL_FORECAST_SOURCE, HoltWinters, LocalForecaster
+from backend.tests.test_async_repository import FakeBigQueryClient
+
+
+def monsoon_history(days=3 * 365, zones=('A', 'B'), seed=0):
+    rng = np.random.default_rng(seed)
+    stamps = pd.date_range('2022-01-01', periods=days, freq='D', tz='UTC')
+    season = 5.0 + 30.0 * np.clip(np.sin(2 * np.pi * (np.arange(days) - 250) / 365), 0, None)
+    frames = [
+        pd.DataFrame({'timestamp': stamps, 'zone_id': zone, 'rainfall_mm': season * (1 + i) + rng.gamma(1.0, 1.0, days)})
+        for i, zone in enumerate(zones)
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+class HoltWintersTests(unittest.TestCase):
+    def test_seasonal_series_fitted_together(self):
+        history = monsoon_history()
+        values = history.pivot(index='timestamp', columns='zone_id', values='rainfall_mm').to_numpy()
+        model = HoltWinters().fit(values)
+        mean, lower, upper = model.forecast(7)
+        self.assertEqual(mean.shape, (2, 7))
+        # Zone B's monsoon is twice as heavy as zone A's.
+        self.assertGreater(mean[1].mean(), mean[0].mean())
+        self.assertTrue(np.all(lower <= mean) and np.all(mean <= upper))
+        self.assertTrue(np.all(np.diff(upper - lower, axis=1) >= -1e-9))
+
+    def test_update_matches_sequential_steps(self):
+        values = monsoon_history(days=400).pivot(index='timestamp', columns='zone_id', values='rainfall_mm').to_numpy()
+        batch = HoltWinters(season_length=7).fit(values[:380])
+        stepwise = HoltWinters(season_length=7).fit(values[:380])
+        batch.update(values[380:])
+        for row in values[380:]:
+            stepwise.update(row)
+        np.testing.assert_allclose(batch.forecast(5)[0], stepwise.forecast(5)[0])
+        self.assertEqual(batch.count[0], stepwise.count[0])
+
+
+class LocalForecasterTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'rainfall_history.csv')
+        self.history = monsoon_history()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_appended_days_are_applied_incrementally(self):
+        self.history[self.history['timestamp'] < '2024-12-21'].to_csv(self.path, index=False)
+        forecaster = LocalForecaster(self.path, horizon=5)
+        first = forecaster.forecast()
+        model = forecaster.model
+        self.assertEqual(len(first), 10)
+        self.assertEqual(set(first['zone_id']), {'A', 'B'})
+
+        self.history.to_csv(self.path, index=False)
+        second = forecaster.forecast()
+        self.assertIs(forecaster.model, model)
+        self.assertEqual(forecaster.last_day, pd.Timestamp('2024-12-30', tz='UTC'))
+        self.assertEqual(second['forecast_timestamp'].iloc[0], '2024-12-31 00:00:00+00:00')
+
+    def test_partial_zone_update_keeps_the_other_zones(self):
+        history = monsoon_history(days=400)
+        history.to_csv(self.path, index=False)
+        forecaster = LocalForecaster(self.path, horizon=3, season_length=7)
+        forecaster.forecast()
+        model = forecaster.model
+
+        next_day = pd.DataFrame({'timestamp': [pd.Timestamp('2023-02-05', tz='UTC')], 'zone_id': ['A'], 'rainfall_mm': [12.0]})
+        forecaster.update(next_day)
+        self.assertIs(forecaster.model, model)
+        self.assertEqual(forecaster.series, ['A', 'B'])
+        self.assertEqual(len(forecaster._fitted_days), 401)
+        self.assertTrue(np.isnan(forecaster._fitted_days['B'].iloc[-1]))
+
+        # A zone first seen in an update is merged with the fitted ones rather than replacing them.
+        forecaster.update(next_day.assign(zone_id='C', rainfall_mm=3.0))
+        self.assertIsNot(forecaster.model, model)
+        self.assertEqual(forecaster.series, ['A', 'B', 'C'])
+        self.assertEqual(len(forecaster._fitted_days), 401)
+        self.assertEqual(forecaster._fitted_days.loc[pd.Timestamp('2023-02-05', tz='UTC'), 'A'], 12.0)
+        self.assertEqual(forecaster.model.n_series, 3)
+
+    def test_offline_repository_uses_local_history(self):
+        self.history.to_csv(self.path, index=False)
+        repo = BigQueryRepository(client=None)
+        repo.local_forecast = LocalForecaster(self.path)
+        forecast = repo.forecast_rainfall()
+        self.assertEqual(len(forecast), 14)
+        self.assertEqual(set(forecast['zone_id']), {'A', 'B'})
+        self.assertEqual(forecast.attrs['source'], LOCAL_FORECAST_SOURCE)
+        self.assertTrue({'lower_bound', 'upper_bound'} <= set(forecast.columns))
+
+    def test_offline_async_forecast_fits_off_the_event_loop(self):
+        self.history.to_csv(self.path, index=False)
+        repo = BigQueryRepository(client=None)
+        repo.local_forecast = LocalForecaster(self.path)
+        async_repo = AsyncBigQueryRepository(repo)
+        calls = []
+        fit = repo.local_forecast_frame
+
+        def slow_fit():
+            calls.append(1)
+            time.sleep(0.3)
+            return fit()
+
+        repo.local_forecast_frame = slow_fit
+
+        async def scenario():
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker = asyncio.ensure_future(tick())
+            forecasts = await asyncio.gather(*(async_repo.forecast_rainfall() for _ in range(3)))
+            ticker.cancel()
+            return forecasts, ticks
+
+        forecasts, ticks = asyncio.run(scenario())
+        self.assertGreater(ticks, 10)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(forecast.attrs['source'] == LOCAL_FORECAST_SOURCE for forecast in forecasts))
+
+    def test_local_forecast_answers_while_remote_job_runs(self):
+        self.history.to_csv(self.path, index=False)
+        client = FakeBigQueryClient(latency=0.3)
+        repo = BigQueryRepository(client=client)
+        repo.local_forecast = LocalForecaster(self.path)
+        async_repo = AsyncBigQueryRepository(repo)
+
+        async def scenario():
+            warm = await async_repo.forecast_rainfall()
+            await asyncio.sleep(0.6)
+            return warm, await async_repo.forecast_rainfall()
+
+        warm, remote = asyncio.run(scenario())
+        self.assertEqual(warm.attrs['source'], LOCAL_FORECAST_SOURCE)
+        self.assertNotIn('source', remote.attrs)
+        self.assertEqual(len(client.jobs), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import time
+import unittest
+from datetime import datetime, timezone
+
+from backend.app.models.schemas import GaugeReading
+from backend.app.services.ingestion_service import GaugeIngestor
+from backend.app.services.system_service import FloodDefenseService
+
+HOUR = 3600.0
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class GaugeIngestorTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(1_000 * HOUR)
+        self.ingestor = GaugeIngestor(bucket_seconds=300, horizon_hours=24, clock=self.clock)
+
+    def totals(self, zone):
+        zone_ids, totals = self.ingestor.aggregates()
+        i = zone_ids.index(zone)
+        return totals[1][i], totals[6][i], totals[24][i]
+
+    def test_rolling_windows(self):
+        now = self.clock.now
+        self.ingestor.ingest(['Adyar'] * 3, [now - 0.5 * HOUR, now - 3 * HOUR, now - 12 * HOUR], [5.0, 10.0, 20.0])
+        self.assertEqual(self.totals('Adyar'), (5.0, 15.0, 35.0))
+
+    def test_readings_age_out_and_slots_are_recycled(self):
+        now = self.clock.now
+        self.ingestor.ingest(['Adyar'], [now], [10.0])
+        self.clock.now += 25 * HOUR
+        self.assertEqual(self.totals('Adyar'), (0.0, 0.0, 0.0))
+        self.ingestor.ingest(['Adyar'], [self.clock.now], [4.0])
+        self.assertEqual(self.totals('Adyar'), (4.0, 4.0, 4.0))
+
+    def test_readings_outside_horizon_are_dropped(self):
+        accepted = self.ingestor.ingest(['Adyar', 'Guindy'], [self.clock.now - 30 * HOUR, self.clock.now], [3.0, 1.0])
+        self.assertEqual(accepted, 1)
+        self.assertEqual(self.ingestor.dropped, 1)
+
+    def test_dropped_readings_do_not_register_zones(self):
+        now = self.clock.now
+        zones = ['Stale', 'Negative', 'Ghost', 'Adyar']
+        accepted = self.ingestor.ingest(zones, [now - 30 * HOUR, now, now, now], [3.0, -1.0, 2.0, 1.0], known_zones=set(zones) - {'Ghost'})
+        self.assertEqual(accepted, 1)
+        self.assertEqual(self.ingestor.aggregates()[0], ['Adyar'])
+
+
+class ObservedRainfallTests(unittest.TestCase):
+    def test_gauge_readings_raise_zone_risk(self):
+        service = FloodDefenseService()
+        before = service.zone_risk().set_index('zone_id')
+        now = datetime.fromtimestamp(time.time(), tz=timezone.utc)
+        service.ingest_gauges([GaugeReading(zone_id='Guindy', timestamp=now, rainfall_mm=400.0)])
+        after = service.zone_risk().set_index('zone_id')
+        self.assertEqual(after.loc['Guindy', 'predicted_rainfall'], 400.0)
+        self.assertGreater(after.loc['Guindy', 'flood_probability'], before.loc['Guindy', 'flood_probability'])
+        self.assertEqual(after.loc['Adyar', 'predicted_rainfall'], before.loc['Adyar', 'predicted_rainfall'])
+
+    def test_unknown_zones_are_rejected(self):
+        service = FloodDefenseService()
+        service.zone_risk()
+        now = datetime.fromtimestamp(time.time(), tz=timezone.utc)
+        accepted, dropped = service.ingest_gauges([GaugeReading(zone_id='Nowhere', timestamp=now, rainfall_mm=5.0)])
+        self.assertEqual((accepted, dropped), (0, 1))
+        self.assertEqual(service.gauges.aggregates()[0], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backend.app.services.inundation_service import InundationModel, rainfall_steps
+from backend.app.services.system_service import FloodDefenseService
+
+
+def slope_model():
+    # A (high) -> B (middle) -> C (low), 1 km apart.
+    return InundationModel(['A', 'B', 'C'], [10.0, 5.0, 1.0], [0.0, 0.0, 0.0], [0, 1], [1, 2], [1.0, 1.0])
+
+
+class InundationModelTests(unittest.TestCase):
+    def test_isolated_daily_step_matches_risk_engine_depth(self):
+        model = InundationModel(['A', 'B'], [3.0, 8.0], [20.0, 45.0], [], [], [])
+        series = model.run(np.array([[80.0, 30.0]]), step_hours=24.0)
+        np.testing.assert_allclose(series.depth_cm[0], [6.0, 0.0])
+
+    def test_transfer_conserves_volume_and_flows_downhill(self):
+        model = slope_model()
+        matrix = model.transfer(1.0).toarray()
+        np.testing.assert_allclose(matrix.sum(axis=0), 1.0)
+        self.assertGreater(matrix[1, 0], 0.0)
+        self.assertEqual(matrix[0, 1], 0.0)
+
+        rain = np.zeros((48, 3))
+        rain[0] = [100.0, 0.0, 0.0]
+        series = model.run(rain, step_hours=1.0)
+        self.assertAlmostEqual(series.depth_cm[-1].sum(), 10.0)
+        self.assertGreater(series.depth_cm[-1, 2], 0.0)
+        self.assertTrue(np.all(np.diff(series.depth_cm[:, 0]) <= 0))
+
+    def test_hourly_steps_spread_daily_rain(self):
+        forecast = pd.DataFrame(
+            {
+                'zone_id': ['A', 'A', 'B', 'B'],
+                'forecast_timestamp': ['2025-11-01', '2025-11-02'] * 2,
+                'predicted_rainfall': [48.0, 24.0, 0.0, 96.0],
+            }
+        )
+        rain, stamps = rainfall_steps(forecast, ['A', 'B', 'C'], step_hours=1.0, multiplier=2.0)
+        self.assertEqual(rain.shape, (48, 3))
+        np.testing.assert_allclose(rain[:24].sum(axis=0), [96.0, 0.0, 48.0])
+        np.testing.assert_allclose(rain[24:].sum(axis=0), [48.0, 192.0, 120.0])
+        self.assertEqual(stamps[0], pd.Timestamp('2025-11-01 01:00', tz='UTC'))
+        self.assertEqual(stamps[-1], pd.Timestamp('2025-11-03 00:00', tz='UTC'))
+
+
+class InundationServiceTests(unittest.TestCase):
+    def test_hourly_series_over_the_forecast(self):
+        service = FloodDefenseService()
+        series = service.inundation(50, 'hourly')
+        self.assertEqual(series.depth_cm.shape, (7 * 24, 5))
+        self.assertTrue(np.all(series.depth_cm >= 0))
+        self.assertIs(service._inundation_model(service._inputs(None)[1]), service._inundation[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from backend.app.core.metrics import Histogram, MetricsRegistry, SamplingProfiler, install_request_profiling, metrics, stage
+from backend.app.models.schemas import EmergencyUnit
+from backend.app.services.system_service import FloodDefenseService
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def unrelated_wait(seconds):
+    busy_wait(seconds)
+
+
+class HistogramTests(unittest.TestCase):
+    def test_quantiles_track_numpy_within_bucket_width(self):
+        values = np.random.default_rng(0).lognormal(mean=-4, sigma=1.0, size=20_000)
+        histogram = Histogram()
+        for value in values:
+            histogram.observe(value)
+        estimated = histogram.quantiles()
+        for q, value in estimated.items():
+            self.assertAlmostEqual(value, np.quantile(values, q), delta=0.1 * np.quantile(values, q))
+
+    def test_threads_write_their_own_shards(self):
+        histogram = Histogram()
+
+        def work():
+            for _ in range(5_000):
+                histogram.observe(0.001)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counts, total = histogram.snapshot()
+        self.assertEqual(sum(counts), 40_000)
+        self.assertAlmostEqual(total, 40.0)
+
+    def test_observe_overhead_is_small(self):
+        histogram = Histogram()
+        start = time.perf_counter()
+        for _ in range(100_000):
+            histogram.observe(0.0123)
+        per_call = (time.perf_counter() - start) / 100_000
+        self.assertLess(per_call, 5e-6)
+
+
+class RegistryTests(unittest.TestCase):
+    def test_prometheus_exposition(self):
+        registry = MetricsRegistry()
+        registry.histogram('demo_seconds', 'Demo latency', stage='a').observe(0.2)
+        registry.counter('demo_bytes_total', 'Demo bytes', query='forecast').inc(1024)
+        registry.add_collector(lambda: ['extra_metric 1'])
+        text = registry.render()
+        self.assertIn('# TYPE demo_seconds summary', text)
+        self.assertIn('demo_seconds{stage="a",quantile="0.99"}', text)
+        self.assertIn('demo_seconds_count{stage="a"} 1', text)
+        self.assertIn('demo_bytes_total{query="forecast"} 1024', text)
+        self.assertTrue(text.rstrip().endswith('extra_metric 1'))
+
+    def test_large_counters_render_exactly(self):
+        registry = MetricsRegistry()
+        counter = registry.counter('demo_bytes_total', 'Demo bytes')
+        counter.inc(1_234_567_890_123)
+        self.assertIn('demo_bytes_total 1234567890123\n', registry.render())
+        counter.inc(400_000)
+        self.assertIn('demo_bytes_total 1234568290123\n', registry.render())
+        registry.histogram('demo_seconds').observe(1234.5678912)
+        self.assertIn('demo_seconds_sum 1234.5678912\n', registry.render())
+
+    def test_service_stages_are_recorded(self):
+        service = FloodDefenseService()
+        units = [EmergencyUnit(unit_id='U1', current_zone='T_Nagar', speed_kmph=40)]
+        service.simulate(80, 'T_Nagar', 'Adyar', units)
+        text = metrics.render()
+        for name in ('simulate', 'compute_zone_risk', 'build_graph', 'assign_units', 'prioritize', 'forecast_rainfall'):
+            self.assertIn(f'flood_stage_seconds_count{{stage="{name}"}}', text)
+
+
+class SamplingProfilerTests(unittest.TestCase):
+    def test_collapsed_stacks_include_hot_function(self):
+        with SamplingProfiler(thread_id=threading.get_ident(), interval_seconds=0.001) as profiler:
+            with stage('profiled'):
+                busy_wait(0.1)
+        self.assertIn('busy_wait', profiler.collapsed())
+
+    def test_request_profile_leaves_out_other_work(self):
+        async def profiled_request():
+            with SamplingProfiler(interval_seconds=0.001) as profiler:
+                await asyncio.to_thread(busy_wait, 0.2)
+            return profiler
+
+        async def scenario():
+            install_request_profiling(asyncio.get_running_loop())
+            background = threading.Thread(target=unrelated_wait, args=(0.3,))
+            background.start()
+            profiler, _ = await asyncio.gather(profiled_request(), asyncio.to_thread(unrelated_wait, 0.3))
+            background.join()
+            return profiler
+
+        collapsed = asyncio.run(scenario()).collapsed()
+        self.assertIn('busy_wait', collapsed)
+        self.assertNotIn('unrelated_wait', collapsed)
+
+
+if __name__ == '__main__':
+    unittest.main()
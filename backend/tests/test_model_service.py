@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from backend.app.services.model_service import DEFAULT_MODEL_PATH, MODEL_FEATURES, CompactForest, ModelScorer, build_scorer
+from backend.app.services.risk_engine import RiskEngine
+
+
+class CountingModel:
+    """Logistic stand-in for the classifier that records every batch it is asked to score."""
+
+    classes_ = np.array([0, 1])
+
+    def __init__(self):
+        self.calls = []
+
+    def predict_proba(self, rows):
+        rows = np.asarray(rows, dtype=float)
+        self.calls.append(len(rows))
+        positive = 1.0 / (1.0 + np.exp(-(rows[:, 0] - rows[:, 2]) / 20.0))
+        return np.column_stack([1.0 - positive, positive])
+
+
+def zones_frame():
+    return pd.DataFrame(
+        {
+            'zone_id': ['A', 'B', 'C'],
+            'elevation': [2.0, 5.0, 8.0],
+            'drainage_capacity': [20.0, 40.0, 60.0],
+            'population_density': [1000.0, 2000.0, 3000.0],
+            'road_importance_score': [0.5, 0.6, 0.7],
+            'soil_moisture': [80.0, 50.0, 30.0],
+        }
+    )
+
+
+FORECAST = pd.DataFrame({'forecast_timestamp': ['2025-11-01'], 'predicted_rainfall': [50.0]})
+
+
+class ModelScorerTests(unittest.TestCase):
+    def test_quantised_rows_are_predicted_once(self):
+        model = CountingModel()
+        scorer = ModelScorer(model=model)
+        features = np.array([[50.0, 60.0, 20.0], [50.2, 60.1, 19.9], [90.0, 60.0, 20.0]])
+        first = scorer.predict(features)
+        self.assertEqual(model.calls, [2])
+        self.assertEqual(first[0], first[1])
+        np.testing.assert_array_equal(scorer.predict(features), first)
+        self.assertEqual(model.calls, [2])
+
+    def test_scenarios_are_scored_in_one_batch(self):
+        model = CountingModel()
+        engine = RiskEngine.from_frames(zones_frame(), FORECAST, scorer=ModelScorer(model=model))
+        model.calls.clear()
+        batch = engine.evaluate_scenarios(np.linspace(1.0, 3.0, 50))
+        self.assertEqual(len(model.calls), 1)
+        self.assertEqual(batch.flood_probability.shape, (50, 3))
+        for row, multiplier in zip(batch.flood_probability, batch.multipliers):
+            engine.set_multiplier(multiplier)
+            np.testing.assert_allclose(row, engine.flood_probability)
+
+    def test_engine_uses_model_probabilities_and_soil_moisture(self):
+        engine = RiskEngine.from_frames(zones_frame(), FORECAST, scorer=ModelScorer(model=CountingModel()))
+        expected = 1.0 / (1.0 + np.exp(-(50.0 - np.array([20.0, 40.0, 60.0])) / 20.0))
+        np.testing.assert_allclose(engine.flood_probability, expected)
+        np.testing.assert_array_equal(engine.soil_moisture, [80.0, 50.0, 30.0])
+
+        engine.update_zones(zones_frame().iloc[[1]].assign(drainage_capacity=0.0))
+        self.assertAlmostEqual(engine.flood_probability[1], 1.0 / (1.0 + np.exp(-50.0 / 20.0)))
+
+    def test_build_scorer_selects_backend(self):
+        self.assertIsNone(build_scorer('heuristic'))
+        self.assertIsNone(build_scorer('model', path='/nonexistent/model.pkl'))
+        with self.assertRaises(ValueError):
+            build_scorer('oracle')
+
+    @unittest.skipUnless(DEFAULT_MODEL_PATH.exists(), 'trained model not available')
+    def test_trained_model_loads_lazily(self):
+        scorer = build_scorer('model')
+        self.assertIsNone(scorer._model)
+        probability = scorer.predict(np.array([[150.0, 99.0, 5.0], [5.0, 20.0, 90.0]]))
+        self.assertGreater(probability[0], 0.5)
+        self.assertLess(probability[1], 0.5)
+
+
+class CompactForestTests(unittest.TestCase):
+    def test_matches_sklearn_after_round_trip(self):
+        rng = np.random.default_rng(1)
+        X = rng.uniform(0, 150, size=(400, 3))
+        y = (X[:, 0] - X[:, 2] + rng.normal(0, 20, 400) > 40).astype(int)
+        model = RandomForestClassifier(n_estimators=25, max_depth=6, random_state=0)
+        model.fit(pd.DataFrame(X, columns=list(MODEL_FEATURES)), y)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'forest.npz')
+            CompactForest.from_sklearn(model).save(path)
+            compact = CompactForest.load(path)
+        probe = rng.uniform(0, 150, size=(1000, 3))
+        expected = model.predict_proba(pd.DataFrame(probe, columns=list(MODEL_FEATURES)))
+        np.testing.assert_allclose(compact.predict_proba(probe), expected, atol=1e-6)
+        self.assertEqual(compact.feature_names, MODEL_FEATURES)
+        self.assertEqual(compact.n_trees, 25)
+
+
+if __name__ == '__main__':
+    unittest.main()
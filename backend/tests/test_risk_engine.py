@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backend.app.services.bigquery_service import BigQueryRepository
+from backend.app.services.risk_engine import RiskEngine, compute_zone_risk
+
+
+def reference_zone_risk(zones_df, forecast_df, rainfall_multiplier=1.0):
+    df = zones_df.copy()
+    df['predicted_rainfall'] = float(forecast_df['predicted_rainfall'].mean()) * rainfall_multiplier
+    raw = df['predicted_rainfall'] * 0.5 + (1.0 / df['elevation'].clip(lower=0.5)) * 0.2 + (1.0 / df['drainage_capacity'].clip(lower=1)) * 0.3
+    df['flood_probability'] = (raw - raw.min()) / (raw.max() - raw.min())
+    df['risk_level'] = pd.cut(
+        df['flood_probability'], bins=[-np.inf, 0.25, 0.5, 0.75, np.inf], labels=['LOW', 'MEDIUM', 'HIGH', 'CRITICAL']
+    ).astype(str)
+    df['estimated_water_depth'] = (df['predicted_rainfall'] - df['drainage_capacity']).clip(lower=0.0) / 10.0
+    return df
+
+
+class RiskEngineTests(unittest.TestCase):
+    def setUp(self):
+        self.zones = BigQueryRepository._mock_zones()
+        self.forecast = BigQueryRepository._mock_forecast()
+
+    def assertMatchesReference(self, result, zones, multiplier):
+        expected = reference_zone_risk(zones, self.forecast, multiplier)
+        np.testing.assert_allclose(result['flood_probability'], expected['flood_probability'])
+        np.testing.assert_allclose(result['estimated_water_depth'], expected['estimated_water_depth'])
+        self.assertEqual(list(result['risk_level']), list(expected['risk_level']))
+
+    def test_compute_zone_risk_matches_reference(self):
+        self.assertMatchesReference(compute_zone_risk(self.zones, self.forecast, 1.3), self.zones, 1.3)
+
+    def test_multiplier_delta_updates_depth(self):
+        engine = RiskEngine.from_frames(self.zones, self.forecast)
+        engine.set_multiplier(2.5)
+        self.assertMatchesReference(engine.to_frame(), self.zones, 2.5)
+
+    def test_zone_row_delta_matches_full_recompute(self):
+        engine = RiskEngine.from_frames(self.zones, self.forecast, 1.5)
+        updated = self.zones.copy()
+        updated.loc[updated['zone_id'] == 'Guindy', 'drainage_capacity'] = 5.0
+        engine.sync_zones(updated)
+        self.assertMatchesReference(engine.to_frame(), updated, 1.5)
+
+    def test_new_zone_rows_are_appended(self):
+        engine = RiskEngine.from_frames(self.zones, self.forecast)
+        new_zone = pd.DataFrame([['Mylapore', 7.0, 40.0, 30000.0, 0.9, 13.0368, 80.2676]], columns=self.zones.columns)
+        engine.update_zones(new_zone)
+        self.assertEqual(len(engine), 6)
+        self.assertMatchesReference(engine.to_frame(), pd.concat([self.zones, new_zone], ignore_index=True), 1.0)
+
+    def test_scenario_batch_matches_single_evaluations(self):
+        engine = RiskEngine.from_frames(self.zones, self.forecast)
+        batch = engine.evaluate_scenarios([1.0, 1.75, 4.0])
+        self.assertEqual(batch.flood_probability.shape, (3, 5))
+        for row, multiplier in enumerate(batch.multipliers):
+            expected = reference_zone_risk(self.zones, self.forecast, multiplier)
+            np.testing.assert_allclose(batch.estimated_water_depth[row], expected['estimated_water_depth'])
+            np.testing.assert_allclose(batch.flood_probability[row], expected['flood_probability'])
+            self.assertEqual(list(batch.risk_level[row]), list(expected['risk_level']))
+
+    def test_per_zone_forecast_applies_per_zone(self):
+        per_zone = pd.DataFrame(
+            {
+                'zone_id': ['Adyar', 'Adyar', 'Guindy', 'Guindy'],
+                'forecast_timestamp': ['2025-11-01', '2025-11-02'] * 2,
+                'predicted_rainfall': [100.0, 120.0, 20.0, 40.0],
+            }
+        )
+        engine = RiskEngine.from_frames(self.zones, per_zone)
+        rainfall = dict(zip(engine.zone_ids, engine.predicted_rainfall))
+        self.assertEqual(rainfall['Adyar'], 110.0)
+        self.assertEqual(rainfall['Guindy'], 30.0)
+        self.assertEqual(rainfall['T_Nagar'], 70.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import os
+import tempfile
+import unittest
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from backend.app.services.landmarks import LandmarkTable
+from backend.app.services.routing_service import BLOCKED_DEPTH_CM, BlockingWindows, RoadNetwork, RoutingEngine
+from backend.app.services.system_service import FloodDefenseService
+
+KM_PER_DEGREE = 111.2
+
+
+def grid_network(size, seed=0):
+    rng = np.random.default_rng(seed)
+    coordinates = {f'{r}_{c}': (13.0 + r / KM_PER_DEGREE, 80.2 + c / KM_PER_DEGREE) for r in range(size) for c in range(size)}
+    edges = []
+    for r in range(size):
+        for c in range(size):
+            if c + 1 < size:
+                edges.append((f'{r}_{c}', f'{r}_{c + 1}', float(rng.uniform(1, 5))))
+            if r + 1 < size:
+                edges.append((f'{r}_{c}', f'{r + 1}_{c}', float(rng.uniform(1, 5))))
+    return RoadNetwork.from_edges(edges, coordinates=coordinates)
+
+
+class RoutingEngineTests(unittest.TestCase):
+    def setUp(self):
+        self.network = grid_network(8)
+        self.engine = RoutingEngine(self.network)
+        rng = np.random.default_rng(1)
+        self.zone_ids = self.network.nodes.copy()
+        self.probability = rng.uniform(0, 1, len(self.zone_ids))
+        self.depth = rng.uniform(0, 30, len(self.zone_ids))
+
+    def reference_graph(self):
+        lookup = dict(zip(self.zone_ids, zip(self.probability, self.depth)))
+        graph = nx.Graph()
+        for source, target, distance in self.engine.base_edges:
+            depth = max(lookup[source][1], lookup[target][1])
+            if depth > BLOCKED_DEPTH_CM:
+                continue
+            probability = max(lookup[source][0], lookup[target][0])
+            graph.add_edge(source, target, weight=distance + probability * 100 + depth * 50)
+        return graph
+
+    def test_route_cost_matches_networkx(self):
+        graph = self.engine.reweight(self.zone_ids, self.probability, self.depth)
+        reference = self.reference_graph()
+        for source, target in [('0_0', '7_7'), ('3_1', '6_5'), ('7_0', '0_7')]:
+            route = self.engine.get_safe_route(graph, source, target)
+            if source in reference and target in reference and nx.has_path(reference, source, target):
+                expected = nx.dijkstra_path_length(reference, source, target)
+                self.assertAlmostEqual(route['total_cost'], round(expected, 2), places=2)
+                self.assertEqual(route['route'][0], source)
+            else:
+                self.assertEqual(route['algorithm'], 'none')
+
+    def test_unchanged_risk_state_reuses_graph_version(self):
+        first = self.engine.reweight(self.zone_ids, self.probability, self.depth)
+        second = self.engine.reweight(self.zone_ids, self.probability.copy(), self.depth.copy())
+        self.assertIs(first, second)
+        changed = self.engine.reweight(self.zone_ids, self.probability, self.depth + 1.0)
+        self.assertGreater(changed.version, first.version)
+
+    def test_blocked_edges_are_excluded(self):
+        depth = np.zeros(len(self.zone_ids))
+        depth[self.network.node_index['0_0']] = BLOCKED_DEPTH_CM + 1
+        graph = self.engine.reweight(self.zone_ids, self.probability, depth)
+        self.assertEqual(len(graph.blocked_edges), 2)
+        self.assertNotIn('0_0', graph.nodes)
+        self.assertEqual(self.engine.get_safe_route(graph, '0_0', '7_7')['algorithm'], 'none')
+
+    def test_heuristic_expands_fewer_nodes_than_dijkstra(self):
+        engine = RoutingEngine(grid_network(30))
+        zone_ids = engine.network.nodes
+        graph = engine.reweight(zone_ids, np.zeros(len(zone_ids)), np.zeros(len(zone_ids)))
+        source, target = engine.network.node_index['0_0'], engine.network.node_index['20_20']
+        _, informed_cost, informed = engine._astar(graph, source, target)
+        _, blind_cost, blind = engine._astar(graph, source, target, heuristic=[0.0] * engine.network.num_nodes)
+        self.assertAlmostEqual(informed_cost, blind_cost)
+        self.assertLess(informed, blind)
+
+    def test_disconnected_pair_fails_without_search(self):
+        depth = np.zeros(len(self.zone_ids))
+        for column in range(8):
+            depth[self.network.node_index[f'3_{column}']] = BLOCKED_DEPTH_CM + 1
+        graph = self.engine.reweight(self.zone_ids, self.probability, depth)
+        self.assertIn('0_0', graph.nodes)
+        self.assertIn('7_7', graph.nodes)
+        checks = []
+        connected = graph.connected
+        graph.connected = lambda source, target: checks.append(connected(source, target)) or checks[-1]
+        self.engine._astar = None
+        self.assertEqual(self.engine.get_safe_route(graph, '0_0', '7_7')['algorithm'], 'none')
+        self.assertEqual(checks, [False])
+
+    def test_batch_shares_trees_and_matches_networkx(self):
+        self.depth = self.depth * 0.8
+        graph = self.engine.reweight(self.zone_ids, self.probability, self.depth)
+        reference = self.reference_graph()
+        pairs = [('0_1', '7_7'), ('0_1', '3_5'), ('0_1', '7_7'), ('5_2', '1_6')]
+        batch = self.engine.get_routes(graph, pairs)
+        self.assertEqual([route['algorithm'] for route in batch], ['dijkstra', 'dijkstra', 'dijkstra', 'astar'])
+        for (source, target), route in zip(pairs, batch):
+            self.assertAlmostEqual(route['total_cost'], round(nx.dijkstra_path_length(reference, source, target), 2), places=2)
+        # Tree results are cached like single searches.
+        self.assertEqual(self.engine.get_safe_route(graph, '0_1', '3_5'), batch[1])
+
+    def test_alternatives_are_distinct_and_no_cheaper(self):
+        self.depth = np.zeros(len(self.zone_ids))
+        graph = self.engine.reweight(self.zone_ids, self.probability, self.depth)
+        reference = self.reference_graph()
+        best = self.engine.get_routes(graph, [('0_0', '7_7')], alternatives=3)[0]
+        routes = [best['route']] + [alternative['route'] for alternative in best['alternatives']]
+        self.assertEqual(len({tuple(route) for route in routes}), 4)
+        for alternative in best['alternatives']:
+            self.assertGreaterEqual(alternative['total_cost'], best['total_cost'])
+            self.assertAlmostEqual(alternative['total_cost'], round(nx.path_weight(reference, alternative['route'], 'weight'), 2), places=2)
+
+    def test_landmark_table_is_reloaded_when_topology_matches(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'landmarks.npz')
+            built = LandmarkTable.load_or_build(self.network, 4, path)
+            loaded = LandmarkTable.load(path)
+            self.assertEqual(loaded.fingerprint, built.fingerprint)
+            np.testing.assert_array_equal(loaded.distances, built.distances)
+            rebuilt = LandmarkTable.load_or_build(grid_network(5), 4, path)
+            self.assertNotEqual(rebuilt.fingerprint, built.fingerprint)
+
+
+class TimeDependentRoutingTests(unittest.TestCase):
+    def setUp(self):
+        # A-B directly (10 km) or A-C-B around (2 x 20 km); at 60 km/h: 10 minutes or 40.
+        self.engine = RoutingEngine(RoadNetwork.from_edges([('A', 'B', 10.0), ('A', 'C', 20.0), ('C', 'B', 20.0)]))
+        self.zone_ids = np.array(['A', 'B', 'C'], dtype=object)
+
+    def windows(self, hours_flooded, zone='B'):
+        depth = np.zeros((6, 3))
+        depth[:hours_flooded, list(self.zone_ids).index(zone)] = BLOCKED_DEPTH_CM + 1
+        return self.engine.blocking_windows(self.zone_ids, depth, step_hours=1.0)
+
+    def test_windows_from_depth_profile(self):
+        windows = self.windows(2)
+        self.assertTrue(windows.is_blocked(0, 1.5))
+        self.assertFalse(windows.is_blocked(0, 2.0))
+        self.assertFalse(windows.is_blocked(1, 0.0))
+        # Still flooded when the profile ends: never reopens.
+        self.assertEqual(self.windows(6).entry_time(0, 0.0, 0.1), float('inf'))
+
+    def test_waits_when_reopening_beats_the_detour(self):
+        # Flooding at B closes both ways in, so the only option is to wait until it drains.
+        route = self.engine.get_timed_route(self.windows(1), 'A', 'B', speed_kmph=60.0)
+        self.assertEqual(route['route'], ['A', 'B'])
+        self.assertAlmostEqual(route['legs'][0]['wait_hours'], 1.0)
+        self.assertAlmostEqual(route['arrive_hours'], 1.0 + 10.0 / 60.0)
+
+    def test_detours_around_a_road_that_floods_mid_trip(self):
+        blocked = np.zeros((6, 3), dtype=bool)
+        blocked[3:5, 0] = True
+        windows = BlockingWindows.from_blocked(3, np.arange(3), blocked, step_hours=1.0)
+        # The direct road closes for hours 3-5; leaving at 2.9 h cannot clear it in time.
+        self.assertEqual(self.engine.get_timed_route(windows, 'A', 'B', 2.8, 60.0)['route'], ['A', 'B'])
+        late = self.engine.get_timed_route(windows, 'A', 'B', 2.9, 60.0)
+        self.assertEqual(late['route'], ['A', 'C', 'B'])
+        self.assertAlmostEqual(late['arrive_hours'], 2.9 + 40.0 / 60.0)
+
+    def test_matches_static_route_without_flooding(self):
+        network = grid_network(8)
+        engine = RoutingEngine(network)
+        windows = engine.blocking_windows(network.nodes, np.zeros((4, network.num_nodes)), 1.0)
+        graph = engine.reweight(network.nodes, np.zeros(network.num_nodes), np.zeros(network.num_nodes))
+        timed = engine.get_timed_route(windows, '0_0', '7_7', speed_kmph=60.0)
+        static = engine.get_safe_route(graph, '0_0', '7_7')
+        self.assertAlmostEqual(timed['arrive_hours'] * 60.0, static['total_cost'], places=1)
+
+    def test_timed_route_reuses_blocking_windows(self):
+        service = FloodDefenseService()
+        inputs = service._inputs(None)
+        route, origin = service.timed_route('T_Nagar', 'Adyar', depart_at=pd.Timestamp.now(tz='UTC'), inputs=inputs)
+        windows = service._windows[3]
+        self.assertEqual(route['route'][0], 'T_Nagar')
+        self.assertEqual(route['route'][-1], 'Adyar')
+        self.assertGreater(route['arrive_hours'], route['depart_hours'])
+        service.timed_route('Adyar', 'T_Nagar', inputs=inputs)
+        self.assertIs(service._windows[3], windows)
+        self.assertEqual(windows.origin, origin)
+
+
+if __name__ == '__main__':
+    unittest.main()
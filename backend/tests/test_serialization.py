@@ -0,0 +1,45 @@
+import json
+import unittest
+
+import pandas as pd
+
+from backend.app.services.serialization import (
+    ARROW_STREAM_MEDIA_TYPE,
+    COLUMNAR_JSON_MEDIA_TYPE,
+    columnar_response,
+    negotiate,
+    pa,
+)
+
+
+class NegotiationTests(unittest.TestCase):
+    def test_row_oriented_json_is_the_default(self):
+        self.assertIsNone(negotiate(None))
+        self.assertIsNone(negotiate('*/*'))
+        self.assertIsNone(negotiate('application/json, application/vnd.apache.arrow.stream;q=0.5'))
+
+    def test_columnar_types_are_selected_by_preference(self):
+        self.assertEqual(negotiate('application/vnd.apache.arrow.stream'), ARROW_STREAM_MEDIA_TYPE)
+        self.assertEqual(negotiate('application/json;q=0.2, application/vnd.flood.columnar+json'), COLUMNAR_JSON_MEDIA_TYPE)
+
+
+class ColumnarResponseTests(unittest.TestCase):
+    def setUp(self):
+        self.table = pd.DataFrame({'zone_id': ['Adyar', 'Guindy'], 'flood_probability': [1.0, 0.25]})
+
+    def test_columnar_json_body(self):
+        response = columnar_response(COLUMNAR_JSON_MEDIA_TYPE, self.table, {'rainfall_multiplier': 1.5})
+        body = json.loads(response.body)
+        self.assertEqual(body['columns'], {'zone_id': ['Adyar', 'Guindy'], 'flood_probability': [1.0, 0.25]})
+        self.assertEqual(body['meta'], {'rainfall_multiplier': 1.5})
+
+    @unittest.skipIf(pa is None, 'pyarrow not installed')
+    def test_arrow_stream_round_trip(self):
+        response = columnar_response(ARROW_STREAM_MEDIA_TYPE, self.table, {'source': 'test'})
+        table = pa.ipc.open_stream(response.body).read_all()
+        self.assertEqual(table.column('zone_id').to_pylist(), ['Adyar', 'Guindy'])
+        self.assertEqual(json.loads(table.schema.metadata[b'meta']), {'source': 'test'})
+
+
+if __name__ == '__main__':
+    unittest.main()
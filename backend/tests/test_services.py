@@ -33,6 +33,14 @@ class FloodDefenseServiceTests(unittest.TestCase):
         self.assertIsNotNone(route)
         self.assertIsInstance(clearance, list)
 
+    def test_batch_simulation_matches_single_runs(self):
+        pcts, batch, edges, blocked, thresholds = self.service.simulate_batch(start_pct=0, stop_pct=500, step_pct=50)
+        self.assertEqual(len(pcts), 11)
+        for i, pct in enumerate(pcts):
+            _, _, blocked_single, _, _, _ = self.service.simulate(pct, None, None, [])
+            self.assertEqual(sorted(edges[j] for j in blocked[i].nonzero()[0]), sorted(blocked_single))
+            self.assertTrue(((thresholds < pct) == blocked[i]).all())
+
 
 if __name__ == '__main__':
     unittest.main()
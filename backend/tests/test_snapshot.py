@@ -0,0 +1,116 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+import numpy as np
+
+from backend.app.models.schemas import GaugeReading
+from backend.app.services.snapshot_service import SnapshotStore
+from backend.app.services.system_service import FloodDefenseService
+
+
+def refuse_queries(service):
+    def fail(*_args, **_kwargs):
+        raise AssertionError('reader worker queried the warehouse')
+
+    service.repo.forecast_rainfall = fail
+    service.repo.fetch_zones = fail
+    service.async_repo = None
+
+
+class SnapshotStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'risk.snap')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_is_zero_copy_and_read_only(self):
+        writer = SnapshotStore(self.path)
+        weight = np.linspace(0.0, 1.0, 17)
+        version = writer.write({'weight': weight, 'blocked': weight > 0.5, 'ids': np.array(['a', 'bb'])}, {'k': 1})
+
+        snapshot = SnapshotStore(self.path).read()
+        self.assertEqual(snapshot.version, version)
+        self.assertEqual(snapshot.meta, {'k': 1})
+        np.testing.assert_array_equal(snapshot.arrays['weight'], weight)
+        np.testing.assert_array_equal(snapshot.arrays['blocked'], weight > 0.5)
+        self.assertEqual(snapshot.arrays['ids'].tolist(), ['a', 'bb'])
+        self.assertFalse(snapshot.arrays['weight'].flags.writeable)
+        self.assertFalse(snapshot.arrays['weight'].flags.owndata)
+        self.assertEqual(snapshot.arrays['weight'].ctypes.data % 64, 0)
+
+    def test_reader_remaps_only_on_new_version(self):
+        writer = SnapshotStore(self.path)
+        reader = SnapshotStore(self.path)
+        self.assertIsNone(reader.read())
+
+        writer.write({'x': np.arange(3.0)})
+        first = reader.read()
+        self.assertIs(reader.read(), first)
+
+        writer.write({'x': np.arange(4.0)})
+        second = reader.read()
+        self.assertEqual(second.version, first.version + 1)
+        self.assertEqual(len(second.arrays['x']), 4)
+        self.assertEqual(len(first.arrays['x']), 3)
+
+    def test_single_publisher(self):
+        first, second = SnapshotStore(self.path), SnapshotStore(self.path)
+        self.assertTrue(first.try_become_publisher())
+        self.assertFalse(second.try_become_publisher())
+
+
+class SharedSnapshotServiceTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, 'risk.snap')
+        self.publisher = FloodDefenseService()
+        self.reader = FloodDefenseService()
+        self.publisher.snapshots = SnapshotStore(path)
+        self.reader.snapshots = SnapshotStore(path)
+        self.version = self.publisher.publish_snapshot()
+        refuse_queries(self.reader)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reader_serves_published_state(self):
+        expected = self.publisher.zone_risk()
+        inputs = asyncio.run(self.reader.fetch_inputs())
+        zones = self.reader.zone_risk(inputs=inputs)
+        self.assertEqual(zones['zone_id'].tolist(), expected['zone_id'].tolist())
+        np.testing.assert_allclose(zones['flood_probability'], expected['flood_probability'])
+        self.assertIs(self.reader.zone_risk(), zones)
+
+        route, _, blocked = self.reader.route('T_Nagar', 'Adyar')
+        expected_route, _, expected_blocked = self.publisher.route('T_Nagar', 'Adyar')
+        self.assertEqual(route['route'], expected_route['route'])
+        self.assertEqual(blocked, expected_blocked)
+
+    def test_reader_scenarios_use_snapshot_inputs(self):
+        _, zones, _, _, _, _ = self.reader.simulate(80, None, None, [])
+        _, expected, _, _, _, _ = self.publisher.simulate(80, None, None, [])
+        np.testing.assert_allclose(zones['estimated_water_depth'], expected['estimated_water_depth'])
+
+    def test_unchanged_state_keeps_version(self):
+        self.assertEqual(self.publisher.publish_snapshot(), self.version)
+
+    def test_reader_gauges_reach_publisher(self):
+        now = datetime.now(timezone.utc)
+        accepted, _ = self.reader.ingest_gauges([GaugeReading(zone_id='Guindy', timestamp=now, rainfall_mm=400.0)])
+        self.assertEqual(accepted, 1)
+
+        version = self.publisher.publish_snapshot()
+        self.assertEqual(version, self.version + 1)
+        zone_ids, totals = self.reader.gauge_aggregates()
+        self.assertEqual(totals[24][zone_ids.index('Guindy')], 400.0)
+        zones = self.reader.zone_risk()
+        self.assertEqual(zones.loc[zones['zone_id'] == 'Guindy', 'risk_level'].item(), 'CRITICAL')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from backend.app.models.schemas import Coordinates, EmergencyUnit
+from backend.app.services.landmarks import haversine_km
+from backend.app.services.routing_service import RoadNetwork
+from backend.app.services.spatial_service import SpatialIndex, ZonePolygons
+from backend.app.services.system_service import FloodDefenseService
+
+
+def square(x0, y0, size):
+    return [[x0, y0], [x0 + size, y0], [x0 + size, y0 + size], [x0, y0 + size], [x0, y0]]
+
+
+class ZonePolygonTests(unittest.TestCase):
+    def test_holes_and_multipolygons(self):
+        # Zone A is a square with a hole; zone B is two separate squares; zone C fills A's hole.
+        polygons = ZonePolygons(
+            ['A', 'B', 'C'],
+            [
+                [np.array(square(0, 0, 4)), np.array(square(1, 1, 2))],
+                [np.array(square(5, 0, 1)), np.array(square(5, 3, 1))],
+                [np.array(square(1.5, 1.5, 1))],
+            ],
+        )
+        x = np.array([0.5, 1.2, 2.0, 5.5, 5.5, 5.5, 10.0, 3.5])
+        y = np.array([0.5, 1.2, 2.0, 0.5, 3.5, 2.0, 10.0, 2.0])
+        np.testing.assert_array_equal(polygons.locate(x, y), [0, -1, 2, 1, 1, -1, -1, 0])
+
+    def test_grid_lookup_matches_exact_containment(self):
+        n = 40
+        rings = [[np.array(square(80 + i * 0.01, 13 + j * 0.01, 0.01))] for i in range(n) for j in range(n)]
+        polygons = ZonePolygons([f'{i}_{j}' for i in range(n) for j in range(n)], rings)
+        rng = np.random.default_rng(0)
+        x = 80 + rng.random(5000) * n * 0.01
+        y = 13 + rng.random(5000) * n * 0.01
+        expected = np.floor((x - 80) / 0.01).astype(int) * n + np.floor((y - 13) / 0.01).astype(int)
+        np.testing.assert_array_equal(polygons.locate(x, y), expected)
+
+    def test_loads_geojson_features(self):
+        collection = {
+            'type': 'FeatureCollection',
+            'features': [
+                {'type': 'Feature', 'properties': {'zone_id': 'A'}, 'geometry': {'type': 'Polygon', 'coordinates': [square(0, 0, 1)]}},
+                {
+                    'type': 'Feature',
+                    'properties': {'zone_id': 'B'},
+                    'geometry': {'type': 'MultiPolygon', 'coordinates': [[square(2, 0, 1)], [square(4, 0, 1)]]},
+                },
+                {'type': 'Feature', 'properties': {}, 'geometry': {'type': 'Polygon', 'coordinates': [square(6, 0, 1)]}},
+            ],
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'zones.geojson')
+            with open(path, 'w', encoding='utf-8') as handle:
+                json.dump(collection, handle)
+            polygons = ZonePolygons.from_geojson(path)
+        self.assertEqual(list(polygons.zone_ids), ['A', 'B'])
+        np.testing.assert_array_equal(polygons.locate(np.array([0.5, 4.5, 6.5]), np.array([0.5, 0.5, 0.5])), [0, 1, -1])
+
+
+class SpatialIndexTests(unittest.TestCase):
+    def network(self):
+        edges = [('n1', 'n2', 1.0), ('n2', 'n3', 1.0), ('n3', 'n4', 1.0)]
+        coordinates = {'n1': (13.00, 80.20), 'n2': (13.00, 80.21), 'n3': (13.01, 80.21)}
+        return RoadNetwork.from_edges(edges, node_zone={'n1': 'A', 'n2': 'A', 'n3': 'B', 'n4': 'B'}, coordinates=coordinates)
+
+    def test_nearest_node_and_its_zone_without_polygons(self):
+        snapped = SpatialIndex(self.network()).snap([13.0004, 13.0098], [80.2101, 80.2095])
+        self.assertEqual(list(snapped.node), ['n2', 'n3'])
+        self.assertEqual(list(snapped.zone_id), ['A', 'B'])
+        np.testing.assert_allclose(snapped.distance_km[0], haversine_km(13.0004, 80.2101, 13.00, 80.21), rtol=1e-6)
+
+    def test_polygon_zone_overrides_node_zone(self):
+        polygons = ZonePolygons(['C'], [[np.array(square(80.205, 12.99, 0.02))]])
+        snapped = SpatialIndex(self.network(), polygons).snap([13.0, 13.0], [80.209, 80.201])
+        self.assertEqual(list(snapped.zone_id), ['C', 'A'])
+        self.assertEqual(list(snapped.node), ['n2', 'n1'])
+
+
+class CoordinateServiceTests(unittest.TestCase):
+    def test_routes_and_units_from_coordinates(self):
+        service = FloodDefenseService()
+        source, destination = service.resolve_places(
+            [None, 'Adyar'], [Coordinates(latitude=13.0420, longitude=80.2338), None]
+        )
+        self.assertEqual((source, destination), ('T_Nagar', 'Adyar'))
+        with self.assertRaises(ValueError):
+            service.resolve_places([None], [None])
+
+        units = [EmergencyUnit(unit_id='U1', location=Coordinates(latitude=12.9817, longitude=80.2182))]
+        located, nodes = service._locate_units(units)
+        self.assertEqual(located[0].current_zone, 'Velachery')
+        self.assertEqual(service.routing.network.nodes[nodes[0]], 'Velachery')
+        self.assertIs(service.spatial, service.spatial)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from backend.app.services.snapshot_service import SnapshotStore
+from backend.app.services.system_service import FloodDefenseService
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def refuse_queries(service):
+    def fail(*_args, **_kwargs):
+        raise AssertionError('warm-started worker queried the warehouse')
+
+    service.repo.forecast_rainfall = fail
+    service.repo.fetch_zones = fail
+    service.async_repo = None
+
+
+class WarmStartTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'warm.snap')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def service(self):
+        service = FloodDefenseService()
+        service.warm_start = SnapshotStore(self.path)
+        return service
+
+    def test_serves_persisted_state_until_refreshed(self):
+        writer = self.service()
+        self.assertEqual(writer.refresh_warm_start(), 1)
+        self.assertIsNone(writer.refresh_warm_start())
+        expected = writer.zone_risk()
+
+        service = self.service()
+        self.assertEqual(service.readiness, 'starting')
+        self.assertTrue(service.load_warm_start())
+        self.assertEqual(service.readiness, 'warm_start')
+        repo, async_repo = service.repo, service.async_repo
+        refuse_queries(service)
+
+        zones = service.zone_risk(inputs=asyncio.run(service.fetch_inputs()))
+        np.testing.assert_allclose(zones['flood_probability'], expected['flood_probability'])
+        route, _, blocked = service.route('T_Nagar', 'Adyar')
+        expected_route, _, expected_blocked = writer.route('T_Nagar', 'Adyar')
+        self.assertEqual(route['route'], expected_route['route'])
+        self.assertEqual(blocked, expected_blocked)
+
+        del repo.forecast_rainfall, repo.fetch_zones
+        service.async_repo = async_repo
+        service.refresh_warm_start()
+        self.assertEqual(service.readiness, 'live')
+        self.assertIsNone(service._snapshot())
+
+    def test_unreadable_file_starts_cold(self):
+        with open(self.path, 'wb') as handle:
+            handle.write(b'not a snapshot at all')
+        service = self.service()
+        with self.assertLogs('backend.app.services.system_service', level='ERROR'):
+            self.assertFalse(service.load_warm_start())
+        self.assertEqual(service.readiness, 'starting')
+
+    def test_background_refresh_without_a_file(self):
+        service = FloodDefenseService()
+        service.start_warm_start()
+        service._warm_start_thread.join(timeout=30)
+        self.assertEqual(service.readiness, 'live')
+        service.stop_warm_start()
+
+
+class ImportTests(unittest.TestCase):
+    def test_app_import_defers_heavy_modules(self):
+        heavy = ['pandas', 'scipy', 'networkx', 'google.cloud.bigquery', 'backend.app.services.system_service']
+        code = f'import json, sys, backend.main; print(json.dumps([name for name in {heavy!r} if name in sys.modules]))'
+        completed = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual(json.loads(completed.stdout), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
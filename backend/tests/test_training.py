@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backend.app.services.model_service import CompactForest
+from ml_models.train_flood_model import export, load_training_data, load_zone_features, search, train
+
+
+def history_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    zone = rng.integers(0, 4, rows)
+    rainfall = rng.gamma(3.0, 20.0, rows).round(1)
+    drain = np.array([80.0, 50.0, 30.0, 10.0])[zone]
+    return pd.DataFrame(
+        {
+            'zone_id': [f'Z{i}' for i in zone],
+            'rainfall_mm': rainfall,
+            'flooded': (rainfall - drain > 20).astype(int),
+        }
+    )
+
+
+ZONES = pd.DataFrame(
+    {
+        'zone_id': ['Z0', 'Z1', 'Z2', 'Z3'],
+        'elevation': [9.0, 6.0, 4.0, 2.0],
+        'drainage_capacity': [80.0, 50.0, 30.0, 10.0],
+        'soil_moisture': [30.0, 50.0, 70.0, 90.0],
+    }
+)
+
+
+class TrainingPipelineTests(unittest.TestCase):
+    def test_chunked_files_join_zone_features(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            history = history_frame(500)
+            history.iloc[:300].to_csv(os.path.join(tmp, 'a.csv'), index=False)
+            history.iloc[300:].to_parquet(os.path.join(tmp, 'b.parquet'), index=False)
+            ZONES.to_csv(os.path.join(tmp, 'zones.csv'), index=False)
+            paths = [Path(tmp) / 'a.csv', Path(tmp) / 'b.parquet']
+            X, y = load_training_data(paths, load_zone_features(Path(tmp) / 'zones.csv'), chunk_rows=64)
+        self.assertEqual(X.shape, (500, 3))
+        self.assertEqual(X.dtype, np.float32)
+        np.testing.assert_array_equal(np.sort(y), np.sort(history['flooded'].to_numpy()))
+        self.assertEqual(set(X[:, 2]), {80.0, 50.0, 30.0, 10.0})
+
+    def test_search_ranks_configurations_and_exports(self):
+        history = history_frame(300, seed=1).merge(ZONES, on='zone_id')
+        X = history[['rainfall_mm', 'soil_moisture', 'drainage_capacity']].to_numpy(dtype=np.float32)
+        y = history['flooded'].to_numpy(dtype=np.int8)
+        grid = [{'n_estimators': 10, 'max_depth': 1}, {'n_estimators': 10, 'max_depth': 6}]
+        ranked = search(X, y, grid, folds=3, workers=2)
+        self.assertEqual(ranked[0][0]['max_depth'], 6)
+        self.assertLessEqual(ranked[0][1], ranked[1][1])
+        with tempfile.TemporaryDirectory() as tmp:
+            model = train(X, y, ranked[0][0])
+            export(model, Path(tmp) / 'model.npz')
+            compact = CompactForest.load(Path(tmp) / 'model.npz')
+        np.testing.assert_allclose(compact.predict_proba(X[:50]), model.predict_proba(pd.DataFrame(X[:50], columns=model.feature_names_in_)), atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
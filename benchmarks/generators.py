@@ -0,0 +1,137 @@
+"""Seeded synthetic city generators for benchmarks: zones, forecasts, road graphs, zone polygons, unit fleets and GPS fixes."""
+
+from __future__ import annotations
+
+import math
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from backend.app.models.schemas import EmergencyUnit
+from backend.app.services.landmarks import haversine_km
+from backend.app.services.routing_service import RoadNetwork
+from backend.app.services.spatial_service import ZonePolygons
+
+# Greater Chennai bounding box; zones are scattered inside it.
+LAT_RANGE = (12.85, 13.25)
+LON_RANGE = (80.10, 80.32)
+KM_PER_DEGREE_LAT = 111.0
+
+
+def zone_ids(n: int) -> np.ndarray:
+    width = len(str(max(n - 1, 0)))
+    return np.array([f"Z{i:0{width}d}" for i in range(n)], dtype=object)
+
+
+def zone_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    """``n`` zones with the columns the zones table provides."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "zone_id": zone_ids(n),
+            "elevation": rng.gamma(2.0, 3.0, n).round(2),
+            "drainage_capacity": rng.uniform(10.0, 60.0, n).round(1),
+            "population_density": rng.lognormal(10.0, 0.4, n).round(0),
+            "road_importance_score": rng.uniform(0.3, 1.0, n).round(3),
+            "latitude": rng.uniform(*LAT_RANGE, n),
+            "longitude": rng.uniform(*LON_RANGE, n),
+        }
+    )
+
+
+def forecast_frame(days: int = 7, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    periods = pd.date_range("2025-11-01", periods=days, freq="D")
+    return pd.DataFrame(
+        {
+            "forecast_timestamp": periods.astype(str),
+            "predicted_rainfall": rng.gamma(6.0, 10.0, days).round(1),
+        }
+    )
+
+
+def grid_network(n: int, seed: int = 0) -> RoadNetwork:
+    """Roughly square street grid of ``n`` nodes (one per zone, ~1 km apart)."""
+    rng = np.random.default_rng(seed)
+    side = max(1, math.ceil(math.sqrt(n)))
+    idx = np.arange(n)
+    row, col = idx // side, idx % side
+    right = idx[(col + 1 < side) & (idx + 1 < n)]
+    down = idx[idx + side < n]
+    source = np.concatenate([right, down])
+    target = np.concatenate([right + 1, down + side])
+    latitude = LAT_RANGE[0] + row / KM_PER_DEGREE_LAT
+    longitude = LON_RANGE[0] + col / (KM_PER_DEGREE_LAT * math.cos(math.radians(13.0)))
+    return _network(source, target, latitude, longitude, rng)
+
+
+def scale_free_network(n: int, edges_per_node: int = 2, seed: int = 0) -> RoadNetwork:
+    """Barabasi-Albert preferential-attachment graph: a few hub junctions, many side streets."""
+    rng = np.random.default_rng(seed)
+    m = max(1, min(edges_per_node, n - 1)) if n > 1 else 0
+    sources: List[np.ndarray] = []
+    targets: List[np.ndarray] = []
+    # Every endpoint ever added, so sampling from it is proportional to degree.
+    endpoints = np.empty(2 * m * max(n, 1) + m, dtype=np.intp)
+    endpoints[:m] = np.arange(m)
+    filled = m
+    for node in range(m, n):
+        chosen = np.unique(endpoints[rng.integers(0, filled, size=m)])
+        sources.append(np.full(len(chosen), node, dtype=np.intp))
+        targets.append(chosen)
+        count = len(chosen)
+        endpoints[filled : filled + count] = chosen
+        endpoints[filled + count : filled + 2 * count] = node
+        filled += 2 * count
+    source = np.concatenate(sources) if sources else np.empty(0, dtype=np.intp)
+    target = np.concatenate(targets) if targets else np.empty(0, dtype=np.intp)
+    latitude = rng.uniform(*LAT_RANGE, n)
+    longitude = rng.uniform(*LON_RANGE, n)
+    return _network(source, target, latitude, longitude, rng)
+
+
+def _network(source, target, latitude, longitude, rng) -> RoadNetwork:
+    names = zone_ids(len(latitude))
+    # Road length is the straight-line distance stretched by a random detour factor.
+    straight = haversine_km(latitude[source], longitude[source], latitude[target], longitude[target])
+    distance = np.maximum(straight * rng.uniform(1.1, 1.6, len(source)), 0.05)
+    return RoadNetwork(
+        nodes=names,
+        node_zone=names.copy(),
+        edge_source=source.astype(np.intp),
+        edge_target=target.astype(np.intp),
+        base_distance=distance,
+        latitude=np.asarray(latitude, dtype=float),
+        longitude=np.asarray(longitude, dtype=float),
+    )
+
+
+def zone_polygons(network: RoadNetwork) -> ZonePolygons:
+    """A square zone around each road node, sized so the squares cover the network's extent about once."""
+    km_per_degree_lon = KM_PER_DEGREE_LAT * math.cos(math.radians(13.0))
+    extent_km2 = max(np.ptp(network.latitude) * KM_PER_DEGREE_LAT * np.ptp(network.longitude) * km_per_degree_lon, 1.0)
+    half_km = 0.5 * math.sqrt(extent_km2 / max(network.num_nodes, 1))
+    half_lat = half_km / KM_PER_DEGREE_LAT
+    half_lon = half_km / km_per_degree_lon
+    corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]) * [half_lon, half_lat]
+    centres = np.column_stack([network.longitude, network.latitude])
+    return ZonePolygons(network.node_zone, [[centre + corners] for centre in centres])
+
+
+def gps_fixes(m: int, seed: int = 0):
+    """``m`` random (latitude, longitude) positions inside the city bounding box."""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(*LAT_RANGE, m), rng.uniform(*LON_RANGE, m)
+
+
+def unit_fleet(m: int, zones, seed: int = 0) -> List[EmergencyUnit]:
+    """``m`` emergency units stationed in random zones."""
+    rng = np.random.default_rng(seed)
+    zones = np.asarray(zones, dtype=object)
+    stations = zones[rng.integers(0, len(zones), size=m)]
+    speeds = rng.uniform(25.0, 60.0, m).round(1)
+    return [
+        EmergencyUnit(unit_id=f"U{i:05d}", current_zone=str(zone), speed_kmph=float(speed))
+        for i, (zone, speed) in enumerate(zip(stations, speeds))
+    ]
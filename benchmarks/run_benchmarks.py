@@ -0,0 +1,260 @@
+"""Scaling benchmarks for the flood-defense pipeline.
+
+Usage:
+    python -m benchmarks.run_benchmarks --sizes 10,100,1000 --output results.json
+    python -m benchmarks.run_benchmarks --baseline previous.json --tolerance 0.25
+
+Every case runs on seeded synthetic data, so two runs of the same commit on the
+same machine are comparable. Startup cases time fresh interpreters importing the
+app and answering a first request, cold and from a warm-start file. Results are
+written as JSON; with ``--baseline`` the run exits non-zero when any case's median
+latency regresses past the tolerance.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from backend.app.services.clearance_service import RoadClearanceService
+from backend.app.services.deployment_service import EmergencyDeploymentService
+from backend.app.services.risk_engine import compute_zone_risk
+from backend.app.services.routing_service import RoutingEngine
+from backend.app.services.snapshot_service import SnapshotStore
+from backend.app.services.spatial_service import SpatialIndex
+from backend.app.services.system_service import FloodDefenseService
+from benchmarks import generators
+
+DEFAULT_SIZES = (10, 100, 1_000, 10_000, 100_000)
+SCHEMA_VERSION = 1
+# Heavier rain than the forecast so larger cities actually have blocked roads.
+STRESS_MULTIPLIER = 4.0
+GPS_FIXES = 10_000
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    topology: str
+    size: int
+    units: int
+    repeats: int
+    min_ms: float
+    median_ms: float
+    p95_ms: float
+    mean_ms: float
+    ops_per_sec: float
+    items_per_sec: float
+
+
+def measure(func: Callable[[], object], items: int, min_repeats: int = 3, max_repeats: int = 50, budget_seconds: float = 1.0) -> Dict[str, float]:
+    """Run ``func`` until the time budget is spent (within the repeat bounds) and summarise."""
+    func()  # warm caches and lazy imports outside the measurement
+    samples: List[float] = []
+    deadline = time.perf_counter() + budget_seconds
+    while len(samples) < max_repeats and (len(samples) < min_repeats or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return summarise(samples, items)
+
+
+def summarise(samples: List[float], items: int) -> Dict[str, float]:
+    times = np.array(samples)
+    median = float(np.median(times))
+    return {
+        "repeats": len(samples),
+        "min_ms": float(times.min() * 1e3),
+        "median_ms": median * 1e3,
+        "p95_ms": float(np.percentile(times, 95) * 1e3),
+        "mean_ms": float(times.mean() * 1e3),
+        "ops_per_sec": 1.0 / median if median > 0 else float("inf"),
+        "items_per_sec": items / median if median > 0 else float("inf"),
+    }
+
+
+def fleet_size(size: int) -> int:
+    return int(min(max(size // 100, 5), 200))
+
+
+def run_size(size: int, topology: str, seed: int, budget_seconds: float, routes: int = 20) -> List[BenchmarkResult]:
+    zones = generators.zone_frame(size, seed)
+    forecast = generators.forecast_frame(seed=seed)
+    if topology == "grid":
+        network = generators.grid_network(size, seed)
+    else:
+        network = generators.scale_free_network(size, seed=seed)
+    units = generators.unit_fleet(fleet_size(size), zones["zone_id"], seed)
+    rng = np.random.default_rng(seed)
+    pairs = zones["zone_id"].to_numpy()[rng.integers(0, size, size=(routes, 2))]
+
+    results: List[BenchmarkResult] = []
+
+    def record(name: str, func: Callable[[], object], items: int) -> None:
+        stats = measure(func, items, budget_seconds=budget_seconds)
+        results.append(BenchmarkResult(name=name, topology=topology, size=size, units=len(units), **stats))
+
+    started = time.perf_counter()
+    routing = RoutingEngine(network)
+    init_ms = (time.perf_counter() - started) * 1e3
+    results.append(
+        BenchmarkResult("routing_engine_init", topology, size, len(units), 1, init_ms, init_ms, init_ms, init_ms, 1e3 / init_ms, size * 1e3 / init_ms)
+    )
+
+    record("compute_zone_risk", lambda: compute_zone_risk(zones, forecast, STRESS_MULTIPLIER), size)
+    zone_df = compute_zone_risk(zones, forecast, STRESS_MULTIPLIER)
+
+    # A distinct multiplier per call defeats the reweight state cache, so this is a real rebuild.
+    multipliers = iter(np.linspace(1.0, STRESS_MULTIPLIER, 10_000))
+    record("build_graph", lambda: routing.build_graph(compute_zone_risk(zones, forecast, next(multipliers)))[0], size)
+    graph, blocked_edges = routing.build_graph(zone_df)
+
+    def route_batch():
+        graph.routes.clear()
+        for source, destination in pairs:
+            routing.get_safe_route(graph, source, destination)
+
+    record("get_safe_route", route_batch, routes)
+
+    deployment = EmergencyDeploymentService()
+
+    def assign():
+        deployment.route_matrix._rows.clear()
+        deployment.assign_units(units, zone_df, graph)
+
+    record("assign_units", assign, len(units))
+
+    clearance = RoadClearanceService()
+    record("prioritize", lambda: clearance.prioritize(blocked_edges, zone_df), max(len(blocked_edges), 1))
+
+    spatial = SpatialIndex(network, generators.zone_polygons(network))
+    latitude, longitude = generators.gps_fixes(GPS_FIXES, seed)
+    record("snap_positions", lambda: spatial.snap(latitude, longitude), GPS_FIXES)
+
+    service = FloodDefenseService()
+    service.routing = routing
+    inputs = (forecast, zones)
+    pcts = iter(np.linspace(0.0, (STRESS_MULTIPLIER - 1.0) * 100.0, 10_000))
+    source, destination = pairs[0]
+    record("simulate", lambda: service.simulate(next(pcts), source, destination, units, inputs=inputs), size)
+    return results
+
+
+def probe_startup(warm_start_path: str = "") -> Dict[str, float]:
+    env = {name: value for name, value in os.environ.items() if name != "WARM_START_PATH"}
+    if warm_start_path:
+        env["WARM_START_PATH"] = warm_start_path
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup_probe"], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_startup(repeats: int = 3) -> List[BenchmarkResult]:
+    """App import time and time to first response in fresh processes, cold and from a warm-start file."""
+    results: List[BenchmarkResult] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "warm.snap")
+        service = FloodDefenseService()
+        service.warm_start = SnapshotStore(path)
+        service.refresh_warm_start()
+        for topology, warm_start_path in (("cold", ""), ("warm_start", path)):
+            probes = [probe_startup(warm_start_path) for _ in range(repeats)]
+            for name, key in (("app_import", "import"), ("first_response", "first_response")):
+                stats = summarise([probe[key] for probe in probes], 1)
+                results.append(BenchmarkResult(name=name, topology=topology, size=0, units=0, **stats))
+    return results
+
+
+def environment() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    """Cases whose median latency grew by more than ``tolerance`` (a fraction) over the baseline."""
+    previous = {(row["name"], row["topology"], row["size"]): row for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get((row["name"], row["topology"], row["size"]))
+        if before is None or before["median_ms"] <= 0:
+            continue
+        change = row["median_ms"] / before["median_ms"] - 1.0
+        if change > tolerance:
+            regressions.append(
+                f"{row['name']}[{row['topology']}, n={row['size']}]: {before['median_ms']:.3f} ms -> {row['median_ms']:.3f} ms (+{change:.0%})"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated zone counts")
+    parser.add_argument("--topologies", default="grid,scale_free", help="grid and/or scale_free")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds spent repeating each case")
+    parser.add_argument("--output", default="", help="results JSON path (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--baseline", default="", help="earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median slowdown before failing")
+    parser.add_argument("--startup-repeats", type=int, default=3, help="fresh processes per startup case (0 skips them)")
+    args = parser.parse_args(argv)
+
+    env = environment()
+    results: List[BenchmarkResult] = []
+
+    def report(result: BenchmarkResult) -> None:
+        results.append(result)
+        print(
+            f"{result.name:<20} {result.topology:<10} n={result.size:<7} median={result.median_ms:10.3f} ms "
+            f"p95={result.p95_ms:10.3f} ms  {result.items_per_sec:12.0f} items/s",
+            flush=True,
+        )
+
+    if args.startup_repeats > 0:
+        for result in run_startup(args.startup_repeats):
+            report(result)
+    for topology in args.topologies.split(","):
+        for size in (int(value) for value in args.sizes.split(",")):
+            for result in run_size(size, topology, args.seed, args.budget):
+                report(result)
+
+    rows = [asdict(result) for result in results]
+    output = Path(args.output or Path(__file__).parent / "results" / f"{env['commit']}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"schema": SCHEMA_VERSION, "environment": env, "seed": args.seed, "results": rows}, indent=2))
+    print(f"wrote {output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["results"]
+        regressions = compare(rows, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
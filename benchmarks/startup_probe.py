@@ -0,0 +1,58 @@
+"""Cold-start probe: run in a fresh interpreter by ``run_benchmarks``.
+
+Prints JSON with the seconds spent importing the app and the seconds until the
+first ``GET /zones`` response, both counted from just before the import. The
+request goes straight through the ASGI app, with its lifespan running, so no
+server or HTTP client is needed.
+"""
+
+from __future__ import annotations
+
+import time
+
+STARTED = time.perf_counter()
+
+import asyncio  # noqa: E402
+import json  # noqa: E402
+
+
+async def first_response(app, path: str):
+    """Status of ``GET path`` and when its response started, in seconds since ``STARTED``."""
+    started = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            started.update(status=message["status"], at=time.perf_counter() - STARTED)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"probe")],
+        "client": ("127.0.0.1", 0),
+        "server": ("probe", 80),
+    }
+    async with app.router.lifespan_context(app):
+        await app(scope, receive, send)
+    return started["status"], started["at"]
+
+
+def main() -> None:
+    from backend import main as app_module
+
+    imported = time.perf_counter()
+    status, responded = asyncio.run(first_response(app_module.app, "/zones"))
+    print(json.dumps({"import": imported - STARTED, "first_response": responded, "status": status}))
+
+
+if __name__ == "__main__":
+    main()
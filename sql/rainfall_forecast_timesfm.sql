@@ -1,15 +1,27 @@
+-- rainfall_history is partitioned by DATE(timestamp) and clustered by zone_id, so the
+-- constant lookback bound below limits the scan to the last 90 days of partitions.
+WITH context AS (
+  SELECT
+    CAST(zone_id AS STRING) AS zone_id,
+    timestamp,
+    rainfall_mm
+  FROM `PROJECT_ID.chennai_flood.rainfall_history`
+  WHERE timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 90 DAY)
+)
 SELECT
+  zone_id,
   forecast_timestamp,
-  forecast_value AS predicted_rainfall
+  forecast_value AS predicted_rainfall,
+  prediction_interval_lower_bound AS lower_bound,
+  prediction_interval_upper_bound AS upper_bound,
+  (SELECT MAX(timestamp) FROM context) AS history_watermark
 FROM AI.FORECAST(
-  MODEL `bigquery-public-data.ml_datasets.timesfm_model`,
-  (
-    SELECT
-      timestamp,
-      rainfall_mm
-    FROM `PROJECT_ID.chennai_flood.rainfall_history`
-    ORDER BY timestamp
-  ),
-  STRUCT(7 AS horizon, 0.8 AS confidence_level)
+  (SELECT * FROM context),
+  data_col => 'rainfall_mm',
+  timestamp_col => 'timestamp',
+  model => 'TimesFM 2.0',
+  id_cols => ['zone_id'],
+  horizon => 7,
+  confidence_level => 0.8
 )
-ORDER BY forecast_timestamp;
+ORDER BY zone_id, forecast_timestamp;